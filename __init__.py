@@ -1,10 +1,33 @@
 import os
 
-from .geonames import GeoNames, get_admin1, get_admin2, get_cities, get_countries
-from .wb import WB, get_indicators, get_topics, search, wb_get_countries
-from .yahoo.misc import get_currencies, get_exchanges, get_market_summary, get_trending
-from .yahoo.screener import Screener
-from .yahoo.ticker import Ticker
+from ._lazy import lazy_attributes
+
+# Public names and the submodule defining them. Submodules pull in pandas,
+# requests and large lookup tables, so they are only imported on first
+# attribute access (PEP 562)
+_LAZY = {
+    "GeoNames": ".geonames",
+    "get_admin1": ".geonames",
+    "get_admin2": ".geonames",
+    "get_cities": ".geonames",
+    "get_countries": ".geonames",
+    "WB": ".wb",
+    "get_indicators": ".wb",
+    "get_topics": ".wb",
+    "search": ".wb",
+    "wb_get_countries": ".wb",
+    "get_currencies": ".yahoo.misc",
+    "get_exchanges": ".yahoo.misc",
+    "get_market_summary": ".yahoo.misc",
+    "get_trending": ".yahoo.misc",
+    "Screener": ".yahoo.screener",
+    "Ticker": ".yahoo.ticker",
+}
+
+__all__ = sorted(_LAZY)
+
+__getattr__, __dir__ = lazy_attributes(globals(), _LAZY)
+
 
 # Directory to export values to
 # NEO4J_IMPORT = "/home/dundy/Desktop/dummyApp/data/testdata"
@@ -14,12 +37,11 @@ WB_API_URL = "https://api.worldbank.org/v2"
 EXPORT_DIR = "geodataimport/data/"
 
 
-# Update Environment Variables
-os.environ.update({"NEO4J_IMPORT": NEO4J_IMPORT})
-os.environ.update({"GEONAMES_DUMP": GEONAMES_DUMP})
-os.environ.update({"GEONAMES_ZIP": GEONAMES_ZIP})
-os.environ.update({"EXPORT_DIR": EXPORT_DIR})
-os.environ.update({"WB_URL": WB_API_URL})
+# Default Environment Variables, keeping any set by the user
+os.environ.setdefault("GEONAMES_DUMP", GEONAMES_DUMP)
+os.environ.setdefault("GEONAMES_ZIP", GEONAMES_ZIP)
+os.environ.setdefault("EXPORT_DIR", EXPORT_DIR)
+os.environ.setdefault("WB_URL", WB_API_URL)
 
 PKG = os.path.dirname(__file__)
 
@@ -0,0 +1,40 @@
+import importlib
+import importlib.util
+
+
+def lazy_attributes(namespace, lazy):
+    """
+    Module ``__getattr__`` and ``__dir__`` importing attributes on first access
+
+    Parameters
+    ----------
+    namespace : dict
+        ``globals()`` of the package, which caches each imported attribute
+    lazy : dict
+        Public names and the relative submodule defining them
+
+    Returns
+    -------
+    tuple of function
+        ``__getattr__`` and ``__dir__`` (PEP 562)
+    """
+    package = namespace["__name__"]
+
+    def __getattr__(name):
+        if name in lazy:
+            value = getattr(importlib.import_module(lazy[name], package), name)
+        elif importlib.util.find_spec("." + name, package) is not None:
+            # Submodules, e.g. geodataimport.geonames or
+            # geodataimport.yahoo.ticker, without importing them first
+            value = importlib.import_module("." + name, package)
+        else:
+            raise AttributeError(
+                "module {!r} has no attribute {!r}".format(package, name)
+            )
+        namespace[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(namespace) | set(lazy))
+
+    return __getattr__, __dir__
@@ -1,6 +1,18 @@
+import base64
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 import wrapt
 
+from geodataimport.utils import DEFAULT_TIMEOUT, TimeoutHTTPAdapter
+from geodataimport.utils.storage import _atomic
+
 
 def skip_on_exception(exp):
  
@@ -15,3 +27,358 @@ def skip_on_exception(exp):
             skip(str(e))
 
     return wrapper
+
+
+# Set by the server and transport per response, not replayed from a cassette
+_HOP_HEADERS = {
+    "connection",
+    "content-encoding",
+    "content-length",
+    "keep-alive",
+    "transfer-encoding",
+}
+
+
+def _match_key(method, url, ignore=()):
+    """Method and URL with a sorted query string, minus ignored parameters"""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query) if k not in ignore)
+    return method.upper(), urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class Cassette(object):
+    """
+    Recorded HTTP interactions, stored as JSON
+
+    Each interaction holds the method, URL, status, headers and body of one
+    response. Text bodies are kept as text and binary ones (e.g. GeoNames
+    zip archives) as base64. Requests are matched on method and URL with
+    the query string sorted; responses recorded several times for the same
+    request are served in turn, the last one repeating.
+
+    Parameters
+    ----------
+    path : str
+        JSON file the interactions are loaded from and saved to
+    ignore : tuple of str, default ("crumb",)
+        Query parameters left out when matching, e.g. tokens or timestamps
+    """
+
+    def __init__(self, path, ignore=("crumb",)):
+        self.path = path
+        self.ignore = tuple(ignore)
+        self.interactions = []
+        self._lock = threading.Lock()
+        self._keys, self._served = {}, {}
+        if os.path.isfile(path):
+            self.load()
+
+    def __len__(self):
+        return len(self.interactions)
+
+    def load(self):
+        with open(self.path) as f:
+            self.interactions = json.load(f)["interactions"]
+        self._index()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with _atomic(self.path) as partial, open(partial, "w") as f:
+            json.dump(
+                {"version": 1, "interactions": self.interactions}, f, indent=1
+            )
+
+    def _index(self):
+        self._keys = {}
+        for i, interaction in enumerate(self.interactions):
+            key = _match_key(interaction["method"], interaction["url"], self.ignore)
+            self._keys.setdefault(key, []).append(i)
+        self._served = {}
+
+    def add(self, method, url, status, headers, body):
+        """Append an interaction; body is bytes"""
+        try:
+            text, encoding = body.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            text, encoding = base64.b64encode(body).decode("ascii"), "base64"
+        headers = {
+            k: v for k, v in headers.items() if k.lower() not in _HOP_HEADERS
+        }
+        with self._lock:
+            self.interactions.append(
+                {
+                    "method": method.upper(),
+                    "url": url,
+                    "status": status,
+                    "headers": headers,
+                    "body": text,
+                    "encoding": encoding,
+                }
+            )
+            self._index()
+
+    def find(self, method, url):
+        """
+        Recorded (status, headers, body) for a request, or None
+
+        Returns
+        -------
+        tuple of int, dict, bytes
+        """
+        key = _match_key(method, url, self.ignore)
+        with self._lock:
+            positions = self._keys.get(key)
+            if not positions:
+                return None
+            served = self._served.get(key, 0)
+            self._served[key] = served + 1
+        interaction = self.interactions[positions[min(served, len(positions) - 1)]]
+        body = interaction["body"]
+        if interaction.get("encoding") == "base64":
+            body = base64.b64decode(body)
+        else:
+            body = body.encode("utf-8")
+        return interaction["status"], dict(interaction["headers"]), body
+
+
+class RecordingAdapter(TimeoutHTTPAdapter):
+    """Transport adapter that sends requests and records their responses"""
+
+    def __init__(self, cassette, *args, **kwargs):
+        self.cassette = cassette
+        super(RecordingAdapter, self).__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        response = super(RecordingAdapter, self).send(request, **kwargs)
+        self.cassette.add(
+            request.method,
+            request.url,
+            response.status_code,
+            dict(response.headers),
+            response.content,
+        )
+        return response
+
+
+@contextmanager
+def record(session, cassette):
+    """
+    Record every response a session receives into a cassette, which is
+    saved when the block exits
+
+    Parameters
+    ----------
+    session : requests.Session
+        e.g. ``Ticker(...).session`` or ``WB(...).session``
+    cassette : Cassette
+
+    Examples
+    --------
+    >>> ticker = Ticker("aapl")
+    >>> with record(ticker.session, Cassette("cassettes/yahoo.json")):
+    ...     ticker.history(period="1y")
+    """
+    previous = _swap_adapters(
+        session,
+        lambda adapter: RecordingAdapter(
+            cassette, max_retries=adapter.max_retries, timeout=_timeout(adapter)
+        ),
+    )
+    try:
+        yield cassette
+    finally:
+        for prefix, adapter in previous.items():
+            session.mount(prefix, adapter)
+        cassette.save()
+
+
+def _timeout(adapter):
+    return getattr(adapter, "timeout", DEFAULT_TIMEOUT)
+
+
+def _swap_adapters(session, make):
+    """Mount make(old adapter) for http and https, returning the old ones"""
+    previous = {}
+    for prefix in ("https://", "http://"):
+        adapter = session.get_adapter(prefix)
+        previous[prefix] = adapter
+        session.mount(prefix, make(adapter))
+    return previous
+
+
+class _ServerAdapter(TimeoutHTTPAdapter):
+    """Transport adapter that sends every request to a ReplayServer"""
+
+    def __init__(self, server, *args, **kwargs):
+        self.server = server
+        super(_ServerAdapter, self).__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        url = request.url
+        local = request.copy()
+        local.url = self.server.url_for(url)
+        response = super(_ServerAdapter, self).send(local, **kwargs)
+        # readers parse symbols out of the URL, so hide the rewrite
+        response.url = url
+        response.request = request
+        return response
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.replay.handle(self)
+
+    do_POST = do_HEAD = do_GET
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer(object):
+    """
+    Local HTTP stand-in that serves the responses of a cassette
+
+    Requests for ``https://host/path?query`` are sent to
+    ``http://127.0.0.1:<port>/https/host/path?query``, either by mounting
+    the server on a session or, for code using urllib, through
+    ``url_for``. Unknown requests get a 404. Each request can be delayed
+    and failed at random to exercise retries and concurrency.
+
+    Parameters
+    ----------
+    cassette : Cassette or str
+    latency : float, default 0
+        Seconds each response is delayed by
+    jitter : float, default 0
+        Extra delay drawn uniformly from [0, jitter] seconds
+    error_rate : float, default 0
+        Fraction of requests answered with error_status instead
+    error_status : int, default 503
+    seed : int, default None
+        Seed of the latency and error draws, for reproducible runs
+
+    Attributes
+    ----------
+    stats : dict
+        Counts of ``served``, ``errors`` and ``missed`` requests and the
+        ``peak`` number handled at the same time
+
+    Examples
+    --------
+    >>> ticker = Ticker("aapl", retry=2)
+    >>> with ReplayServer("cassettes/yahoo.json", latency=0.05) as server:
+    ...     server.mount(ticker.session)
+    ...     df = ticker.history(period="1y")
+    """
+
+    def __init__(
+        self,
+        cassette,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        error_status=503,
+        seed=None,
+    ):
+        if not isinstance(cassette, Cassette):
+            cassette = Cassette(cassette)
+        self.cassette = cassette
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._active = 0
+        self.stats = {"served": 0, "errors": 0, "missed": 0, "peak": 0}
+        self._httpd = None
+        self._thread = None
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _ReplayHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.replay = self
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05}
+        )
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._thread.join()
+            self._httpd = self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def url_for(self, url):
+        """Address of a remote URL on this server"""
+        parts = urlsplit(url)
+        return "{}/{}/{}{}".format(
+            self.url,
+            parts.scheme,
+            parts.netloc,
+            urlunsplit(("", "", parts.path, parts.query, "")),
+        )
+
+    def mount(self, session):
+        """Send every request of a session to this server, keeping its retries"""
+        _swap_adapters(
+            session,
+            lambda adapter: _ServerAdapter(
+                self, max_retries=adapter.max_retries, timeout=_timeout(adapter)
+            ),
+        )
+        return session
+
+    def _draw(self):
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate
+            self._active += 1
+            self.stats["peak"] = max(self.stats["peak"], self._active)
+        return delay, failed
+
+    def handle(self, handler):
+        length = int(handler.headers.get("Content-Length") or 0)
+        if length:
+            handler.rfile.read(length)
+        delay, failed = self._draw()
+        stat = "errors"
+        try:
+            if delay:
+                time.sleep(delay)
+            scheme, _, rest = handler.path.lstrip("/").partition("/")
+            found = self.cassette.find(handler.command, scheme + "://" + rest)
+            if failed:
+                status, headers, body, stat = self.error_status, {}, b"", "errors"
+            elif found is None:
+                status, headers, body = 404, {}, b"No recorded response"
+                stat = "missed"
+            else:
+                (status, headers, body), stat = found, "served"
+            handler.send_response(status)
+            for key, value in headers.items():
+                handler.send_header(key, value)
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            if handler.command != "HEAD":
+                handler.wfile.write(body)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self.stats[stat] += 1
@@ -7,6 +7,7 @@ from pandas import read_csv
 
 from geodataimport.compat import StringIO, binary_type, bytes_to_str
 from geodataimport.utils import RemoteDataError, _init_session, _sanitize_dates
+from geodataimport.utils.metrics import record_request, span
 
 
 class _GeoData(object):
@@ -93,7 +94,8 @@ class _GeoData(object):
             out = self._get_response(url, params=params).json()
         else:
             raise NotImplementedError(self._format)
-        return self._read_lines(out)
+        with span(self.__class__.__name__, "read_lines"):
+            return self._read_lines(out)
 
     def _read_url_as_StringIO(self, url, params=None):
         """
@@ -122,7 +124,7 @@ class _GeoData(object):
         """
         return response.content
 
-    def _get_response(self, url, params=None, headers=None):
+    def _get_response(self, url, params=None, headers=None, stream=False):
         """ send raw HTTP request to get requests.Response from the specified url
         Parameters
         ----------
@@ -130,15 +132,18 @@ class _GeoData(object):
             target URL
         params : dict or None
             parameters passed to the URL
+        stream : bool, default False
+            Defer downloading the response body until it is iterated
         """
 
         # initial attempt + retry
         pause = self.pause
         last_response_text = ""
-        for _ in range(self.retry_count + 1):
+        for attempt in range(self.retry_count + 1):
             response = self.session.get(
-                url, params=params, headers=headers, timeout=self.timeout
+                url, params=params, headers=headers, timeout=self.timeout, stream=stream
             )
+            record_request(response, self.__class__.__name__, attempt, stream)
             if response.status_code == requests.codes["ok"]:
                 return response
 
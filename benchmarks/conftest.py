@@ -0,0 +1,137 @@
+"""
+Shared payloads and helpers for the benchmark suite
+
+Payloads are synthetic but shaped like the responses of each service, and
+seeded so that every run parses exactly the same data.
+"""
+import json
+import tracemalloc
+
+import numpy as np
+import pytest
+
+# Peak memory of every benchmark run in this session, by test id
+_peaks = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("memory", "peak memory of benchmarks")
+    group.addoption(
+        "--memory-save",
+        metavar="PATH",
+        help="Save the peak memory of each benchmark to a JSON file",
+    )
+    group.addoption(
+        "--memory-compare",
+        metavar="PATH",
+        help="Compare peak memory with a file written by --memory-save",
+    )
+    group.addoption(
+        "--memory-compare-fail",
+        metavar="PERCENT",
+        type=float,
+        default=10.0,
+        help="Fail benchmarks whose peak memory grew by more than PERCENT "
+        "over --memory-compare (default 10)",
+    )
+
+
+def pytest_sessionfinish(session):
+    path = session.config.getoption("--memory-save")
+    if path and _peaks:
+        with open(path, "w") as f:
+            json.dump(_peaks, f, indent=2, sort_keys=True)
+
+
+@pytest.fixture(scope="session")
+def memory_baseline(pytestconfig):
+    path = pytestconfig.getoption("--memory-compare")
+    if not path:
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def measure(request, benchmark, memory_baseline):
+    """
+    Benchmark ``func(*make_args())`` and record its peak memory
+
+    Arguments are rebuilt before every round, outside the timed call, so
+    functions that modify their input in place are timed on fresh data.
+    Peak memory, in bytes, is traced on one extra call and saved with the
+    timings as ``extra_info["peak_memory"]``. With ``--memory-compare`` the
+    benchmark fails when its peak grew by more than ``--memory-compare-fail``
+    percent over the saved baseline.
+    """
+
+    def run(func, make_args=tuple, rounds=10):
+        args = make_args()
+        tracemalloc.start()
+        try:
+            func(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_memory"] = peak
+        _peaks[request.node.nodeid] = peak
+        result = benchmark.pedantic(
+            func, setup=lambda: (make_args(), {}), rounds=rounds, iterations=1
+        )
+        baseline = memory_baseline.get(request.node.nodeid)
+        tolerance = request.config.getoption("--memory-compare-fail")
+        if baseline and peak > baseline * (1 + tolerance / 100.0):
+            pytest.fail(
+                "Peak memory grew from %d to %d bytes (%+.1f%%, limit %.1f%%)"
+                % (baseline, peak, 100.0 * (peak / baseline - 1), tolerance)
+            )
+        return result
+
+    return run
+
+
+@pytest.fixture(scope="session")
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.fixture(scope="session")
+def symbols():
+    return ["S{:03d}".format(i) for i in range(50)]
+
+
+@pytest.fixture(scope="session")
+def chart_payload(symbols, rng):
+    """Chart responses of 10 years of daily quotes per symbol"""
+    n = 2520
+    timestamps = (1262610000 + 86400 * np.arange(n)).tolist()
+    data = {}
+    for symbol in symbols:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        quote = {
+            "open": close.tolist(),
+            "high": (close * 1.01).tolist(),
+            "low": (close * 0.99).tolist(),
+            "close": close.tolist(),
+            "volume": rng.integers(1e5, 1e7, n).tolist(),
+        }
+        dividends = {
+            str(ts): {"amount": 0.2, "date": ts} for ts in timestamps[::63]
+        }
+        splits = {
+            str(timestamps[n // 2]): {
+                "date": timestamps[n // 2],
+                "numerator": 2,
+                "denominator": 1,
+            }
+        }
+        data[symbol] = {
+            "meta": {"gmtoffset": -18000},
+            "timestamp": timestamps,
+            "indicators": {
+                "quote": [quote],
+                "adjclose": [{"adjclose": quote["close"]}],
+            },
+            "events": {"dividends": dividends, "splits": splits},
+        }
+    return data
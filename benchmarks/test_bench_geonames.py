@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from geodataimport.geonames import GeoNames
+from geodataimport.utils.config import _CONFIG
+
+ROWS = 100000
+
+
+def _places(location, rng):
+    config = _CONFIG["geonames"][location]
+    ids = np.arange(ROWS)
+    countries = rng.choice(["US", "CA", "MX", "FR", "DE", "IN"], ROWS)
+    admin1 = rng.integers(1, 60, ROWS).astype(str)
+    admin2 = rng.integers(1, 200, ROWS).astype(str)
+    if location in ("admin1", "admin2"):
+        code = pd.Series(countries).str.cat(admin1, sep=".")
+        if location == "admin2":
+            code = code.str.cat(admin2, sep=".")
+        columns = {
+            "code": code,
+            "name": ["Region {}".format(i) for i in ids],
+            "name_ascii": ["Region {}".format(i) for i in ids],
+            "geonameid": ids,
+        }
+    else:
+        population = rng.integers(0, 1000000, ROWS)
+        columns = {name: np.nan for name in config["names"]}
+        columns.update(
+            {
+                "geonameid": ids,
+                "name": ["Place {}".format(i) for i in ids],
+                "asciiname": ["Place {}".format(i) for i in ids],
+                "latitude": rng.uniform(-90, 90, ROWS),
+                "longitude": rng.uniform(-180, 180, ROWS),
+                "feature class": "P",
+                "feature code": "PPL",
+                "country code": countries,
+                "admin1 code": admin1,
+                "admin2 code": admin2,
+                "population": np.where(population % 7 == 0, 0, population),
+                "timezone": "UTC",
+            }
+        )
+    df = pd.DataFrame(columns, columns=config["names"])
+    return df.astype(config.get("dtype", {}))
+
+
+@pytest.mark.parametrize("location", ["cities", "admin1", "admin2", "gazetteer"])
+def test_standardize_geo_data(measure, rng, location):
+    reader = GeoNames(symbols=[location])
+    df = _places(location, rng)
+    measure(reader.standardize_geo_data, lambda: (location, df.copy()))
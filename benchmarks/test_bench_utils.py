@@ -0,0 +1,22 @@
+import pandas as pd
+import pytest
+
+from geodataimport.edgar import EDGAR_CIK_FILE
+from geodataimport.utils import search, search_index
+
+
+@pytest.fixture(scope="module")
+def table():
+    df = pd.read_csv(EDGAR_CIK_FILE, index_col=0)
+    # repeat the EDGAR listing to reach the size of a screener universe
+    return pd.concat([df] * 20, ignore_index=True)
+
+
+@pytest.mark.parametrize("pattern", ["bank", "^berk", r"\bcorp\b$"])
+def test_search(measure, table, pattern):
+    measure(search, lambda: (table, pattern))
+
+
+def test_search_with_index(measure, table):
+    index = search_index(table)
+    measure(search, lambda: (table, "bank", None, index))
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+import requests
+
+from geodataimport._testing import Cassette, ReplayServer
+from geodataimport.utils.countries import country_codes
+from geodataimport.wb import WB
+
+INDICATORS = ["NY.GDP.MKTP.CD", "NY.GNS.ICTR.ZS", "SP.POP.TOTL"]
+COUNTRIES = [code for code in country_codes if len(code) == 2][:200]
+
+
+def _indicator_response(indicator, start=1960, end=2019):
+    records = [
+        {
+            "indicator": {"id": indicator, "value": indicator},
+            "country": {"id": country, "value": "Country " + country},
+            "countryiso3code": country,
+            "date": str(year),
+            "value": 1.5e9 + year,
+            "unit": "",
+            "obs_status": "",
+            "decimal": 0,
+        }
+        for country in COUNTRIES
+        for year in range(end, start - 1, -1)
+    ]
+    meta = {"page": 1, "pages": 1, "per_page": 25000, "total": len(records)}
+    return [meta, records]
+
+
+@pytest.fixture(scope="module")
+def wb():
+    return WB(INDICATORS, countries=COUNTRIES, start="1960", end="2019", retry_count=0)
+
+
+def test_read_lines(measure, wb):
+    out = _indicator_response(INDICATORS[0])
+    measure(wb._read_lines, lambda: (out,))
+
+
+def test_read(measure, wb, tmp_path):
+    """Full read of recorded responses through the local replay server"""
+    cassette = Cassette(str(tmp_path / "wb.json"))
+    for indicator in INDICATORS:
+        url = requests.Request("GET", wb.url + indicator, params=wb.params)
+        body = json.dumps(_indicator_response(indicator)).encode()
+        cassette.add("GET", url.prepare().url, 200, {}, body)
+    with ReplayServer(cassette) as server:
+        server.mount(wb.session)
+        measure(wb._read)
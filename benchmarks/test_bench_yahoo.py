@@ -0,0 +1,121 @@
+import copy
+
+import pytest
+
+from geodataimport.utils import _history_dataframe
+from geodataimport.yahoo import Ticker
+
+
+def _quote_summary(symbols):
+    module = {"field{}".format(i): {"raw": i, "fmt": str(i)} for i in range(60)}
+    module.update(
+        {
+            "exDividendDate": {"raw": 1573084800, "fmt": "2019-11-07"},
+            "earningsDate": [{"raw": 1573084800, "fmt": "2019-11-07"}] * 2,
+            "governanceEpochDate": 1570147200,
+            "companyOfficers": [
+                {"name": "Officer", "age": 50, "totalPay": {"raw": 1, "fmt": "1"}}
+            ]
+            * 10,
+            "range": {"min": 1, "max": 2},
+        }
+    )
+    return {
+        symbol: {"summaryDetail": copy.deepcopy(module), "assetProfile": module}
+        for symbol in symbols
+    }
+
+
+def _fundamentals(symbols, types, prefix, period_type):
+    data = {}
+    for symbol in symbols:
+        data[symbol] = []
+        for name in [prefix + t for t in types] + ["trailing" + t for t in types]:
+            records = [
+                {
+                    "asOfDate": "{}-09-30".format(year),
+                    "periodType": period_type,
+                    "currencyCode": "USD",
+                    "reportedValue": {"raw": 1.5e9 * year, "fmt": "1.5B"},
+                }
+                for year in range(2016, 2020)
+            ]
+            data[symbol].append(
+                {"meta": {"type": [name], "symbol": [symbol]}, name: records}
+            )
+    return data
+
+
+def _options(symbols):
+    def contracts(expiration, kind):
+        return [
+            {
+                "contractSymbol": "{}{}{}".format(kind, expiration, strike),
+                "strike": float(strike),
+                "lastPrice": 1.0,
+                "bid": 0.9,
+                "ask": 1.1,
+                "volume": 10,
+                "openInterest": 100,
+                "impliedVolatility": 0.3,
+                "inTheMoney": strike < 100,
+                "expiration": expiration,
+                "lastTradeDate": expiration - 86400,
+            }
+            for strike in range(50, 150)
+        ]
+
+    expirations = [1704412800 + 604800 * i for i in range(20)]
+    chain = [
+        {
+            "expirationDate": e,
+            "calls": contracts(e, "C"),
+            "puts": contracts(e, "P"),
+        }
+        for e in expirations
+    ]
+    return {symbol: {"options": chain} for symbol in symbols}
+
+
+def _ticker(symbols, payload):
+    ticker = Ticker(symbols)
+    # serve the payload in place of the chart/quote endpoints
+    ticker._get_data = lambda key, params={}, **kwargs: payload
+    return ticker
+
+
+def test_format_data(measure, symbols):
+    ticker = Ticker(symbols)
+    payload = _quote_summary(symbols)
+    dates = ["exDividendDate", "earningsDate", "governanceEpochDate"]
+    measure(ticker._format_data, lambda: (copy.deepcopy(payload), dates))
+
+
+def test_history_dataframe(measure, symbols, chart_payload):
+    params = {"interval": "1d"}
+
+    def parse(data):
+        return [_history_dataframe(data, symbol, params) for symbol in symbols]
+
+    measure(parse, lambda: (chart_payload,))
+
+
+@pytest.mark.parametrize("frequency", ["a", "q"])
+def test_financials(measure, symbols, frequency):
+    time_args = Ticker.FUNDAMENTALS_TIME_ARGS[frequency]
+    types = Ticker._CONFIG["fundamentals"]["query"]["type"]["options"]
+    # one frame per symbol and type is built, so keep to a few symbols
+    symbols = symbols[:5]
+    payload = _fundamentals(
+        symbols,
+        types["income_statement"],
+        time_args["prefix"],
+        time_args["period_type"],
+    )
+    ticker = _ticker(symbols, payload)
+    measure(ticker._financials, lambda: ("income_statement", frequency))
+
+
+def test_option_chain(measure, symbols):
+    ticker = _ticker(symbols[:10], _options(symbols[:10]))
+    measure(lambda: ticker.option_chain)
@@ -0,0 +1,186 @@
+import csv
+import os
+import re
+import threading
+
+EDGAR_CIK_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "edgar", "edgar_cik.csv"
+)
+
+
+def _normalize_ticker(ticker):
+    """EDGAR writes share classes with a dash: brk.a -> BRK-A"""
+    return str(ticker).strip().upper().replace(".", "-")
+
+
+def _normalize_title(title):
+    return " ".join(re.sub(r"[\W_]+", " ", str(title).casefold()).split())
+
+
+class CIKResolver(object):
+    """
+    Resolve tickers, SEC Central Index Keys (CIK) and company titles
+
+    The EDGAR ticker file is parsed with the csv module on first use into
+    ticker -> CIK and CIK -> title dictionaries, plus a sorted list of
+    normalized titles for prefix and fuzzy search. Loading happens once,
+    under a lock, so one resolver can be shared between threads.
+
+    Parameters
+    ----------
+    path : str, default EDGAR_CIK_FILE
+        CSV with ``cik_str``, ``ticker`` and ``title`` columns
+
+    Examples
+    --------
+    >>> resolver = CIKResolver()
+    >>> resolver.ciks(["AAPL", "msft", "BRK.A"])
+    [320193, 789019, 1067983]
+    """
+
+    def __init__(self, path=EDGAR_CIK_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            cik_by_ticker, title_by_cik, tickers_by_cik = {}, {}, {}
+            with open(self.path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    cik = int(row["cik_str"])
+                    ticker = _normalize_ticker(row["ticker"])
+                    cik_by_ticker[ticker] = cik
+                    title_by_cik.setdefault(cik, row["title"])
+                    tickers_by_cik.setdefault(cik, []).append(ticker)
+            titles = sorted(
+                (_normalize_title(title), cik) for cik, title in title_by_cik.items()
+            )
+            self._cik_by_ticker = cik_by_ticker
+            self._title_by_cik = title_by_cik
+            self._tickers_by_cik = tickers_by_cik
+            self._title_keys = [key for key, _ in titles]
+            self._title_ciks = [cik for _, cik in titles]
+            self._loaded = True
+
+    def __len__(self):
+        self._load()
+        return len(self._cik_by_ticker)
+
+    def cik(self, ticker, default=None):
+        """CIK of a ticker, or default when unknown"""
+        self._load()
+        return self._cik_by_ticker.get(_normalize_ticker(ticker), default)
+
+    def ciks(self, tickers, default=None):
+        """CIKs of a sequence of tickers, default for unknown ones"""
+        self._load()
+        get = self._cik_by_ticker.get
+        return [get(_normalize_ticker(ticker), default) for ticker in tickers]
+
+    def title(self, cik, default=None):
+        """Company title of a CIK, or default when unknown"""
+        self._load()
+        return self._title_by_cik.get(int(cik), default)
+
+    def titles(self, ciks, default=None):
+        """Company titles of a sequence of CIKs, default for unknown ones"""
+        self._load()
+        get = self._title_by_cik.get
+        return [get(int(cik), default) for cik in ciks]
+
+    def tickers(self, cik):
+        """Every ticker filed under a CIK"""
+        self._load()
+        return list(self._tickers_by_cik.get(int(cik), []))
+
+    def search(self, prefix, limit=10):
+        """
+        Companies whose title starts with a prefix
+
+        Parameters
+        ----------
+        prefix : str
+            Matched against titles ignoring case and punctuation
+        limit : int, default 10
+
+        Returns
+        -------
+        list of (title, cik)
+        """
+        from geodataimport.utils.matching import prefix_range
+
+        self._load()
+        start, stop = prefix_range(self._title_keys, _normalize_title(prefix))
+        ciks = self._title_ciks[start : min(stop, start + limit)]
+        return [(self._title_by_cik[cik], cik) for cik in ciks]
+
+    def fuzzy(self, title, limit=5, cutoff=0.8):
+        """
+        Companies whose title is close to the given one
+
+        Candidates share the first letter of the title; see
+        ``utils.matching.fuzzy_matches``.
+
+        Parameters
+        ----------
+        title : str
+        limit : int, default 5
+        cutoff : float, default 0.8
+            Minimum similarity ratio in [0, 1]
+
+        Returns
+        -------
+        list of (title, cik, score)
+        """
+        from geodataimport.utils.matching import fuzzy_matches
+
+        self._load()
+        matches = fuzzy_matches(
+            self._title_keys, _normalize_title(title), limit, cutoff
+        )
+        ciks = [(score, self._title_ciks[pos]) for score, pos in matches]
+        return [(self._title_by_cik[cik], cik, score) for score, cik in ciks]
+
+
+_resolver = CIKResolver()
+
+
+def get_cik(tickers):
+    """
+    Look up the SEC CIK of one or more tickers in the bundled EDGAR file
+
+    Parameters
+    ----------
+    tickers : str or list of str
+
+    Returns
+    -------
+    int or list
+        None for unknown tickers
+    """
+    if isinstance(tickers, str):
+        return _resolver.cik(tickers)
+    return _resolver.ciks(tickers)
+
+
+def get_company_title(ciks):
+    """
+    Look up the company title of one or more CIKs in the bundled EDGAR file
+
+    Parameters
+    ----------
+    ciks : int or list of int
+
+    Returns
+    -------
+    str or list
+        None for unknown CIKs
+    """
+    if isinstance(ciks, (int, str)):
+        return _resolver.title(ciks)
+    return _resolver.titles(ciks)
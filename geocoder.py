@@ -0,0 +1,170 @@
+import numpy as np
+from pandas import merge
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine(lat1, lon1, lat2, lon2, radius=EARTH_RADIUS_KM):
+    """
+    Great-circle distance between points given in degrees
+
+    Parameters
+    ----------
+    lat1, lon1, lat2, lon2 : float or array-like
+        Coordinates in decimal degrees. Arrays are broadcast against each other
+    radius : float, default EARTH_RADIUS_KM
+        Sphere radius, which sets the unit of the result
+
+    Returns
+    -------
+    distance : float or numpy.ndarray
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * radius * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _to_unit_xyz(lat, lon):
+    """Project degrees onto the unit sphere so chord length orders distances"""
+    lat = np.radians(np.asarray(lat, dtype="float64"))
+    lon = np.radians(np.asarray(lon, dtype="float64"))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+class ReverseGeocoder(object):
+    """
+    Reverse geocoding over GeoNames places
+
+    Places are indexed in a KD-tree on unit-sphere coordinates, so each
+    query point costs O(log n) instead of a scan over every place.
+
+    Parameters
+    ----------
+    places : DataFrame
+        Places with ``latitude`` and ``longitude`` columns in degrees, such as
+        GeoNames cities merged with coordinates (see ``from_geonames``)
+    leafsize : int, default 16
+        Number of points at which the tree switches to brute force
+
+    Examples
+    --------
+    >>> cities = GeoNames(symbols=["cities", "coordinates"]).read()
+    >>> geocoder = ReverseGeocoder.from_geonames(*cities)
+    >>> geocoder.nearest([40.71, 51.51], [-74.01, -0.13], k=3)
+    """
+
+    def __init__(self, places, leafsize=16):
+        places = places.dropna(subset=["latitude", "longitude"])
+        self.places = places.reset_index(drop=True)
+        self._latitude = self.places["latitude"].to_numpy(dtype="float64")
+        self._longitude = self.places["longitude"].to_numpy(dtype="float64")
+        self._tree = cKDTree(
+            _to_unit_xyz(self._latitude, self._longitude), leafsize=leafsize
+        )
+
+    @classmethod
+    def from_geonames(cls, cities, coordinates, **kwargs):
+        """
+        Build a geocoder from the GeoNames cities and coordinates frames
+
+        Parameters
+        ----------
+        cities : DataFrame
+            Output of ``get_cities`` or ``GeoNames(symbols="cities")``
+        coordinates : DataFrame
+            Output of ``GeoNames(symbols="coordinates")``
+        kwargs:
+            keywords passed to ReverseGeocoder
+        """
+        places = merge(cities, coordinates, on="geonameId", how="inner")
+        return cls(places, **kwargs)
+
+    def __len__(self):
+        return len(self.places)
+
+    def _result(self, query, index, lat, lon):
+        distance = haversine(
+            lat[query], lon[query], self._latitude[index], self._longitude[index]
+        )
+        out = self.places.iloc[index].reset_index(drop=True)
+        out.insert(0, "distance", distance)
+        out.insert(0, "query", query)
+        return out
+
+    def nearest(self, lat, lon, k=1):
+        """
+        Find the k nearest places to each query point
+
+        Parameters
+        ----------
+        lat, lon : float or array-like
+            Query coordinates in decimal degrees
+        k : int, default 1
+            Number of places returned per query point
+
+        Returns
+        -------
+        DataFrame
+            One row per (query, match) with the query position, ``distance``
+            in kilometres and the place columns, ordered by query then
+            distance
+        """
+        lat = np.atleast_1d(np.asarray(lat, dtype="float64"))
+        lon = np.atleast_1d(np.asarray(lon, dtype="float64"))
+        k = min(k, len(self))
+        _, index = self._tree.query(_to_unit_xyz(lat, lon), k=k)
+        index = index.reshape(len(lat), k)
+        query = np.repeat(np.arange(len(lat)), k)
+        return self._result(query, index.ravel(), lat, lon)
+
+    def within_radius(self, lat, lon, radius):
+        """
+        Find every place within a distance of each query point
+
+        Parameters
+        ----------
+        lat, lon : float or array-like
+            Query coordinates in decimal degrees
+        radius : float
+            Search radius in kilometres
+
+        Returns
+        -------
+        DataFrame
+            Same layout as ``nearest``; queries without a match have no rows
+        """
+        lat = np.atleast_1d(np.asarray(lat, dtype="float64"))
+        lon = np.atleast_1d(np.asarray(lon, dtype="float64"))
+        # Chord length on the unit sphere matching the arc radius
+        chord = 2 * np.sin(min(radius / EARTH_RADIUS_KM, np.pi) / 2)
+        matches = self._tree.query_ball_point(_to_unit_xyz(lat, lon), r=chord)
+        counts = np.fromiter((len(m) for m in matches), dtype="int64", count=len(lat))
+        index = np.fromiter(
+            (i for m in matches for i in m), dtype="int64", count=counts.sum()
+        )
+        query = np.repeat(np.arange(len(lat)), counts)
+        out = self._result(query, index, lat, lon)
+        return out.sort_values(["query", "distance"], kind="mergesort").reset_index(
+            drop=True
+        )
+
+
+def reverse_geocode(lat, lon, places, k=1):
+    """
+    Find the nearest places to the given coordinates
+
+    Parameters
+    ----------
+    lat, lon : float or array-like
+        Query coordinates in decimal degrees
+    places : DataFrame
+        Places with ``latitude`` and ``longitude`` columns
+    k : int, default 1
+        Number of places returned per query point
+    """
+    return ReverseGeocoder(places).nearest(lat, lon, k=k)
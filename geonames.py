@@ -1,13 +1,18 @@
+import multiprocessing
+import os
 import tempfile
 import time
 import warnings
-from zipfile import ZipFile
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from zipfile import ZipFile, is_zipfile
 
 from pandas import DataFrame, concat, read_csv
 
 from geodataimport.base import _GeoData
-from geodataimport.compat import StringIO, binary_type, bytes_to_str
+from geodataimport.utils import _fillna_text, _join_codes
 from geodataimport.utils.config import _CONFIG
+from geodataimport.utils.metrics import span
 
 GEONAMES_URL = "https://download.geonames.org/export/dump/"
 # GEONAMES_DUMP = GEONAMES_URL + "dump/"
@@ -40,6 +45,10 @@ class GeoNames(_GeoData):
         session=None,
         errors="warn",
         asynchronous=False,
+        max_workers=4,
+        processes=0,
+        min_population=None,
+        alternate_names=False,
     ):
         super(GeoNames, self).__init__(
             symbols=symbols,
@@ -53,6 +62,10 @@ class GeoNames(_GeoData):
         self._base_url = GEONAMES_URL
         self._format = "string"
         self.errors = errors
+        self.max_workers = max_workers
+        self.processes = processes
+        self.min_population = min_population
+        self.alternate_names = alternate_names
 
     @property
     def url(self):
@@ -74,58 +87,161 @@ class GeoNames(_GeoData):
         finally:
             self.close()
 
-    def _read_zipfile(self, url):
-        response = self._get_response(url)
-        # text = self._sanitize_response(response)
-        raw = response.content
-        with tempfile.TemporaryFile() as tmpf:
-            tmpf.write(raw)
-
-            with ZipFile(tmpf, "r") as zf:
-                text = zf.open(zf.namelist()[0]).read().decode()
+    def _download_file(self, url):
+        """
+        Stream a dump file to a named temporary file and return its path
+        """
+        response = self._get_response(url, stream=True)
+        try:
+            with tempfile.NamedTemporaryFile(delete=False) as tmpf:
+                try:
+                    for chunk in response.iter_content(chunk_size=self._chunk_size):
+                        tmpf.write(chunk)
+                except BaseException:
+                    # Don't leave a partial, possibly allCountries-sized file
+                    tmpf.close()
+                    os.unlink(tmpf.name)
+                    raise
+        finally:
+            response.close()
+        return tmpf.name
 
-        out = StringIO()
-        if isinstance(text, binary_type):
-            out.write(bytes_to_str(text))
-        else:
-            out.write(text)
-        out.seek(0)
-        return out
+    def _read_file(self, config, file, parser=None):
+        path = self._download_file(self.url + file)
+        try:
+            # Timed here rather than in the parser, which may run in another
+            # process that has no listeners
+            with span(self.__class__.__name__, "parse"):
+                if parser is None:
+                    return _read_geonames_file(path, config)
+                return parser.submit(_read_geonames_file, path, config).result()
+        finally:
+            os.remove(path)
 
     def _read(self):
-        data = []
-        for location in self.symbols:
-            # Build URL for api call
-            config = _config[location]
-            filenames = config["filenames"]
+        """
+        Download every file of every symbol on a thread pool, standardizing
+        each location as soon as all of its files are in
+
+        Files are parsed on the download threads unless ``processes`` is not
+        0, in which case they are parsed in a process pool of that size (None
+        for one per CPU). The pool uses the spawn start method, since forking
+        from the download threads can deadlock; parsed frames are pickled
+        back, so it only pays off for many large files.
+        """
+        data = {}
+        parser = None
+        if self.processes != 0:
+            parser = ProcessPoolExecutor(
+                self.processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                pending = {}
+                futures = {}
+                for location in self.symbols:
+                    filenames = self._filenames(location)
+                    pending[location] = [None] * len(filenames)
+                    for i, file in enumerate(filenames):
+                        future = pool.submit(
+                            self._read_file, _config[location], file, parser
+                        )
+                        futures[future] = (location, i)
+
+                for future in as_completed(futures):
+                    location, i = futures[future]
+                    if location not in pending:
+                        continue
+                    try:
+                        pending[location][i] = future.result()
+                        if any(df is None for df in pending[location]):
+                            continue
+                        df = concat(pending.pop(location))
+                        with span(self.__class__.__name__, "standardize"):
+                            df = self.standardize_geo_data(location, df)
+                        data[location] = df
+
+                    except ValueError as e:
+                        pending.pop(location, None)
+                        msg = str(e) + " Location: " + location
+                        if self.errors == "raise":
+                            for pending_future in futures:
+                                pending_future.cancel()
+                            raise ValueError(msg)
+                        elif self.errors == "warn":
+                            warnings.warn(msg)
+        finally:
+            if parser is not None:
+                parser.shutdown()
+        return [data[location] for location in self.symbols if location in data]
+
+    def iter_chunks(
+        self, symbol, chunksize=100000, feature_classes=None, countries=None
+    ):
+        """
+        Stream a location in standardized chunks
+
+        The dump is downloaded to a temporary file and parsed ``chunksize``
+        rows at a time, so memory use does not grow with the size of the
+        file. Suited to allCountries-scale files such as "gazetteer".
+
+        Parameters
+        ----------
+        symbol : str
+            Location to read, e.g. "gazetteer" or "coordinates"
+        chunksize : int, default 100000
+            Rows parsed at a time; filtered chunks can be smaller
+        feature_classes : list of str, default None
+            GeoNames feature classes to keep, e.g. ["P"] for populated places
+        countries : list of str, default None
+            ISO country codes to keep
+
+        Yields
+        ------
+        DataFrame
+            Standardized chunk. Duplicates are only dropped within a chunk
+        """
+        config = _config[symbol]
+        filters = {"feature class": feature_classes, "country code": countries}
+        filters = {col: list(val) for col, val in filters.items() if val is not None}
+        missing = [col for col in filters if col not in config["names"]]
+        if missing:
+            raise ValueError("Cannot filter %s by: %s" % (symbol, ", ".join(missing)))
+
+        for file in self._filenames(symbol):
+            path = self._download_file(self.url + file)
             try:
-                temp = []
-                for file in filenames:
-                    if ".zip" in file:
-                        resp = self._read_zipfile(self.url + file)
-                    else:
-                        resp = self._read_url_as_StringIO(self.url + file)
-                    df = read_csv(
-                        resp,
-                        sep=_delimiter,
-                        comment=config["comment"],
-                        names=config["names"],
-                        low_memory=config["low_memory"],
-                        header=config["header"],
-                    )
-                    # df.columns = _config[location]["names"]
-                    temp.append(df)
-                df = concat(temp)
-                df = self.standardize_geo_data(location, df)
-                data.append(df)
-
-            except ValueError as e:
-                msg = str(e) + " Location: " + location
-                if self.errors == "raise":
-                    raise ValueError(msg)
-                elif self.errors == "warn":
-                    warnings.warn(msg)
-        return data
+                with _open_geonames_file(path) as f:
+                    for chunk in _parse_geonames_file(f, config, chunksize):
+                        keep = None
+                        for col, values in filters.items():
+                            match = chunk[col].isin(values)
+                            keep = match if keep is None else keep & match
+                        if keep is not None:
+                            chunk = chunk[keep].copy()
+                        if len(chunk):
+                            with span(self.__class__.__name__, "standardize"):
+                                chunk = self.standardize_geo_data(symbol, chunk)
+                            yield chunk
+            finally:
+                os.remove(path)
+
+    def _population_tier(self, location):
+        """
+        Population threshold of the most inclusive dump file needed to cover
+        min_population, or None when the location has no population tiers
+        """
+        tiers = _config[location].get("population_tiers")
+        if not tiers or self.min_population is None:
+            return None
+        eligible = [tier for tier in tiers if tier <= self.min_population]
+        return max(eligible) if eligible else min(tiers)
+
+    def _filenames(self, location):
+        tier = self._population_tier(location)
+        if tier is None:
+            return _config[location]["filenames"]
+        return [_config[location]["population_tiers"][tier]]
 
     def get_city_location_id(self, country, admin1, admin2):
         location = str(country)
@@ -140,49 +256,57 @@ class GeoNames(_GeoData):
         df.rename(columns=config["rename_cols"], inplace=True)
 
         if location == "admin1":
-            df["code"] = df["id"].str.split(".", expand=True)[1]
-            df["parentId"] = df["id"].str.split(".", expand=True)[0]
+            codes = df["id"].str.split(".", expand=True)
+            df["code"] = codes[1]
+            df["parentId"] = codes[0]
             # Change to DC to be consistent with US Census
             df["name"] = df["name"].replace("Washington, D.C.", "District of Columbia")
 
         elif location == "admin2":
-            df["parentId"] = df["id"].str.rsplit(".", 1, expand=True)[0]
+            df["parentId"] = df["id"].str.rsplit(".", n=1, expand=True)[0]
             # Change to DC and SanFran to be consistent with US Census
             df.loc[df.id == "US.DC.001", ["name"]] = "District of Columbia"
             df.loc[df.id == "US.CA.075", ["name"]] = "San Francisco"
 
         elif location == "countries":
-            index = df.query("iso3 == 'NAM'").index  # Add missing ISO code for Nambia
-            df.at[index, "iso"] = "NA"
             df["id"] = df["iso"]
             df["neighbours"] = df["neighbours"].str.split(",")
             df["languages"] = df["languages"].str.split(",")
 
         elif location == "cities":
+            if self.min_population is not None:
+                # Tier files also hold seats of administrative divisions
+                # below their threshold
+                df = df[df["population"].fillna(0) >= self.min_population].copy()
             df.drop_duplicates("geonameId", inplace=True)
             df["id"] = df["geonameId"]  # Add ID Column
-            df.fillna("", inplace=True)
-            df["parentId"] = df.apply(
-                lambda row: self.get_city_location_id(
-                    row["country code"], row["admin1 code"], row["admin2 code"]
-                ),
-                axis=1,
+            df["parentId"] = _join_codes(
+                df, ["country code", "admin1 code", "admin2 code"]
+            )
+
+        elif location == "gazetteer":
+            df["population"] = df["population"].mask(df["population"] == 0)
+            df["id"] = df["geonameId"]
+            df["parentId"] = _join_codes(
+                df, ["country code", "admin1 code", "admin2 code"]
             )
 
         elif location == "coordinates":
             df.loc[df["feature class"].isin(["A", "P"])]
-            df["population"] = df["population"].str.replace("0", "")
+            # A population of 0 means unknown in the dump
+            df["population"] = df["population"].mask(df["population"] == 0)
 
         elif location == "postalcodes":
             df.dropna(subset=["admin code2"], inplace=True)
-            df.fillna("", inplace=True)
+            _fillna_text(df)
             df["admin2_id"] = (
                 df["country code"] + "." + df["admin code1"] + "." + df["admin code2"]
             )
         keep_cols = config["keep_cols"]
-        df = df[keep_cols]
-        df.fillna("", inplace=True)
-        return df
+        if self.alternate_names and "alternatenames" in df:
+            keep_cols = keep_cols + ["alternatenames"]
+        df = df[keep_cols].copy()
+        return _fillna_text(df)
 
     def get_continents(self):
         """Query information about continents
@@ -197,6 +321,39 @@ class GeoNames(_GeoData):
         return data
 
 
+@contextmanager
+def _open_geonames_file(path):
+    """Open a downloaded dump file, or the first member of a zip archive"""
+    if is_zipfile(path):
+        with ZipFile(path, "r") as zf, zf.open(zf.namelist()[0]) as member:
+            yield member
+    else:
+        with open(path, "rb") as f:
+            yield f
+
+
+def _read_geonames_file(path, config):
+    """Parse a downloaded dump file"""
+    with _open_geonames_file(path) as f:
+        return _parse_geonames_file(f, config)
+
+
+def _parse_geonames_file(resp, config, chunksize=None):
+    # Only empty fields are missing: "NA" is Namibia's country code and North
+    # America's continent code
+    return read_csv(
+        resp,
+        sep=_delimiter,
+        comment=config["comment"],
+        names=config["names"],
+        dtype=config["dtype"],
+        header=config["header"],
+        keep_default_na=False,
+        na_values=[""],
+        chunksize=chunksize,
+    )
+
+
 def download_files():
     """
     Downloads all GeoNames location files and exports them to
@@ -221,11 +378,18 @@ def get_countries():
     return GeoNames(symbols="countries").read()[0]
 
 
-def get_cities():
+def get_cities(min_population=None):
     """
     Download data for all cities from Geonames dump
+
+    Parameters
+    ----------
+    min_population : int, default None
+        Only keep cities with at least this many inhabitants. The smallest
+        GeoNames city file covering the threshold is downloaded and filtered
+        locally; None returns every city in cities500
     """
-    return GeoNames(symbols="cities").read()[0]
+    return GeoNames(symbols="cities", min_population=min_population).read()[0]
 
 
 def get_admin1():
@@ -243,3 +407,24 @@ def get_admin2():
 
 
 # def search(string='USA', field="iso3", case=False, **kwargs):
+
+
+def iter_gazetteer(chunksize=100000, feature_classes=None, countries=None):
+    """
+    Stream every place in the GeoNames dump (allCountries) in chunks
+
+    Parameters
+    ----------
+    chunksize : int, default 100000
+        Rows parsed at a time
+    feature_classes : list of str, default None
+        GeoNames feature classes to keep, e.g. ["A", "P"]
+    countries : list of str, default None
+        ISO country codes to keep
+    """
+    return GeoNames(symbols="gazetteer").iter_chunks(
+        "gazetteer",
+        chunksize=chunksize,
+        feature_classes=feature_classes,
+        countries=countries,
+    )
@@ -0,0 +1,210 @@
+import numpy as np
+from pandas import Index, Series, concat
+
+from geodataimport.utils.storage import load_arrays, save_arrays
+
+LEVELS = ("countries", "admin1", "admin2", "cities")
+
+
+class LocationHierarchy(object):
+    """
+    Array-backed country -> admin1 -> admin2 -> city tree
+
+    Built from the ``id`` and ``parentId`` columns produced by
+    ``GeoNames.standardize_geo_data``. Nodes are stored in breadth-first
+    order, so the children of any node occupy one contiguous slice and the
+    ancestors of every node at every level are precomputed. Cities without
+    an admin2 division hang directly off their admin1 node.
+
+    Parameters
+    ----------
+    ids : array-like
+        Node ids, stored as strings
+    parents : array-like
+        Parent position of each node, -1 for roots
+    levels : array-like
+        Level of each node, an index into ``LEVELS``
+
+    Notes
+    -----
+    Cities whose ``parentId`` names an admin2 or admin1 code missing from
+    the admin files are attached to the closest existing ancestor.
+    """
+
+    def __init__(self, ids, parents, levels):
+        self.ids = np.asarray(ids, dtype=object)
+        self.parents = np.asarray(parents, dtype="int32")
+        self.levels = np.asarray(levels, dtype="int8")
+        self._index = Index(self.ids)
+        self._build()
+
+    def _build(self):
+        n = len(self.ids)
+        positions = np.arange(n, dtype="int32")
+        depth = _depths(self.parents)
+        key = depth.astype("int64") * (n + 1) + self.parents + 1
+        if (np.diff(key) < 0).any():
+            raise ValueError("Nodes must be stored breadth-first, grouped by parent")
+
+        # ancestors[i, l] is the position of node i's ancestor at level l
+        ancestors = np.full((n, len(LEVELS)), -1, dtype="int32")
+        for d in range(depth.max() + 1 if n else 0):
+            rows = positions[depth == d]
+            attached = rows[self.parents[rows] >= 0]
+            ancestors[attached] = ancestors[self.parents[attached]]
+            ancestors[rows, self.levels[rows]] = rows
+        self.ancestors = ancestors
+
+        # Children of node i sit at child_start[i] : child_start[i] + child_count[i]
+        parents, first = np.unique(self.parents, return_index=True)
+        self.child_start = np.zeros(n, dtype="int32")
+        self.child_start[parents[parents >= 0]] = first[parents >= 0]
+        self.child_count = np.bincount(
+            self.parents[self.parents >= 0], minlength=n
+        ).astype("int32")
+
+    @classmethod
+    def from_frames(cls, countries, admin1=None, admin2=None, cities=None):
+        """
+        Build the hierarchy from standardized GeoNames frames
+
+        Parameters
+        ----------
+        countries, admin1, admin2, cities : DataFrame
+            Frames with ``id`` and, below countries, ``parentId`` columns
+        """
+        frames = []
+        for level, df in enumerate((countries, admin1, admin2, cities)):
+            if df is None:
+                continue
+            frame = df.loc[:, ["id"]].astype(str)
+            frame["parentId"] = df["parentId"].astype(str) if level else ""
+            frame["level"] = level
+            frames.append(frame)
+        nodes = concat(frames, ignore_index=True).drop_duplicates("id")
+        index = Index(nodes["id"])
+
+        # Walk unresolved parent codes up one segment at a time: US.CA.999 -> US.CA
+        parent_ids = nodes["parentId"].copy()
+        parents = index.get_indexer(parent_ids)
+        unresolved = (parents < 0) & (parent_ids != "")
+        while unresolved.any():
+            parent_ids[unresolved] = parent_ids[unresolved].str.rpartition(".")[0]
+            parents[unresolved] = index.get_indexer(parent_ids[unresolved])
+            unresolved = (parents < 0) & (parent_ids != "")
+
+        # Breadth-first order: by depth, then by parent so siblings are adjacent
+        depth = _depths(parents)
+        rank = np.full(len(nodes), -1, dtype="int64")
+        order = []
+        for d in range(depth.max() + 1):
+            members = np.flatnonzero(depth == d)
+            parent_rank = np.where(parents[members] >= 0, rank[parents[members]], -1)
+            members = members[np.argsort(parent_rank, kind="stable")]
+            rank[members] = np.arange(len(members)) + sum(map(len, order))
+            order.append(members)
+        order = np.concatenate(order)
+        parents = np.where(parents[order] >= 0, rank[parents[order]], -1)
+        return cls(nodes["id"].values[order], parents, nodes["level"].values[order])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def positions(self, ids):
+        """Positions of the given ids, -1 for unknown ids"""
+        return self._index.get_indexer(np.asarray(ids).astype(str))
+
+    def parent(self, ids):
+        """Parent ids, None for roots"""
+        parents = self.parents[self._known(ids)]
+        return np.where(parents >= 0, self.ids[np.maximum(parents, 0)], None)
+
+    def ancestor(self, ids, level):
+        """
+        Ancestor ids at a level, None where a node sits above it or has
+        no ancestor there
+
+        Parameters
+        ----------
+        ids : array-like
+        level : str
+            One of ``LEVELS``
+        """
+        ancestors = self.ancestors[self._known(ids), LEVELS.index(level)]
+        return np.where(ancestors >= 0, self.ids[np.maximum(ancestors, 0)], None)
+
+    def children(self, id):
+        """Ids of the direct children of a node"""
+        pos = self._known([id])[0]
+        start = self.child_start[pos]
+        return self.ids[start : start + self.child_count[pos]]
+
+    def rollup(self, ids, values, level):
+        """
+        Sum values attached to nodes into their ancestors at a level
+
+        Parameters
+        ----------
+        ids : array-like
+            Node ids, e.g. city geonameIds
+        values : array-like
+            Values aligned with ids
+        level : str
+            One of ``LEVELS``
+
+        Returns
+        -------
+        Series
+            Totals indexed by ancestor id, for ancestors with at least one
+            contributing node
+        """
+        ancestors = self.ancestors[self._known(ids), LEVELS.index(level)]
+        attached = ancestors >= 0
+        totals = np.bincount(
+            ancestors[attached],
+            weights=np.asarray(values, dtype="float64")[attached],
+            minlength=len(self),
+        )
+        present = np.bincount(ancestors[attached], minlength=len(self)) > 0
+        return Series(totals[present], index=Index(self.ids[present], name="id"))
+
+    def _known(self, ids):
+        positions = self.positions(ids)
+        if (positions < 0).any():
+            missing = ", ".join(map(str, np.asarray(ids)[positions < 0]))
+            raise KeyError("Unknown location id(s): %s" % missing)
+        return positions
+
+    def save(self, path):
+        """Write the hierarchy arrays as .npy files into a directory"""
+        arrays = {
+            "ids": self.ids.astype(str),
+            "parents": self.parents,
+            "levels": self.levels,
+        }
+        save_arrays(path, arrays)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load a hierarchy written by ``save``
+
+        Parameters
+        ----------
+        path : str
+            Hierarchy directory
+        mmap : bool, default True
+            Memory-map the parent and level arrays instead of reading them
+            into memory
+        """
+        arrays, _ = load_arrays(path, mmap=mmap)
+        return cls(arrays["ids"].astype(object), arrays["parents"], arrays["levels"])
+
+
+def _depths(parents):
+    """Depth of every node given parent positions (-1 for roots)"""
+    parents = np.asarray(parents)
+    depth = np.zeros(len(parents), dtype="int32")
+    for _ in range(len(LEVELS)):
+        depth = np.where(parents >= 0, depth[np.maximum(parents, 0)] + 1, 0)
+    return depth
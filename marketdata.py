@@ -0,0 +1,692 @@
+import json
+import os
+import shutil
+
+import numpy as np
+from pandas import (
+    DataFrame,
+    DatetimeIndex,
+    Index,
+    concat,
+    factorize,
+    read_csv,
+    to_datetime,
+    to_timedelta,
+)
+
+from geodataimport.utils.storage import (
+    _atomic,
+    dataset_exists,
+    dataset_path,
+    load_arrays,
+    read_dataset,
+    read_partitioned,
+    save_arrays,
+    write_dataset,
+    write_partitioned,
+    write_partitions,
+)
+
+MARKET_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "marketData"
+)
+TICKER_DATA_DIR = os.path.join(MARKET_DATA_DIR, "tickerData")
+MERGERS_DIR = os.path.join(MARKET_DATA_DIR, "mergers")
+FUNDAMENTALS_DIR = os.path.join(MARKET_DATA_DIR, "fundamentals")
+FUNDAMENTALS_OUTFILE = "MarketData-Fundamentals.csv"
+MERGERS_OUTFILE = "MarketData-Mergers.csv"
+MERGERS_SNAPSHOT = "MarketData-Mergers-All.csv"
+
+_GROUPS = ("price", "valuation", "volume")
+
+_FUNDAMENTALS_KEYS = ["Ticker", "frequency", "Date"]
+
+# periodType of Ticker.get_financial_data -> frequency of the panel
+_PERIOD_FREQUENCY = {"12M": "annual", "3M": "quarter", "TTM": "ttm"}
+
+_MERGERS_DTYPE = {
+    "ticker": "category",
+    "action_id": "float64",
+    "deal_type": "category",
+    "deal_status": "category",
+    "currency": "category",
+    "announced_total_value": "float64",
+    "payment_type": "category",
+}
+
+
+def _read_group(source, group):
+    """
+    Long frame (Ticker, Date, field columns) of one tickerData group, read
+    from ``<group>.csv`` or, failing that, from the wide per-field files in
+    ``<group>/``
+    """
+    path = os.path.join(source, group + ".csv")
+    if os.path.isfile(path):
+        return read_csv(path, parse_dates=["Date"])
+
+    fields = []
+    for file in sorted(os.listdir(os.path.join(source, group))):
+        wide = read_csv(os.path.join(source, group, file), parse_dates=["Date"])
+        field = wide.set_index("Date").rename_axis(columns="Ticker").stack()
+        fields.append(field.rename(os.path.splitext(file)[0]))
+    return concat(fields, axis=1).reset_index()
+
+
+class MarketDataStore(object):
+    """
+    Ticker x date arrays of the tickerData price, valuation and volume files
+
+    Each field is one float64 array with a row per ticker and a column per
+    date, saved as a .npy file and memory-mapped on load. A ticker lookup is
+    a dictionary access and a date range a binary search on the sorted date
+    axis, so a single-ticker slice is a view into the mapped file and no
+    CSV is parsed after the first build.
+
+    Parameters
+    ----------
+    tickers : list of str
+    dates : numpy.ndarray
+        Sorted datetime64[D] dates
+    fields : dict
+        Field name to array of shape (len(tickers), len(dates)); missing
+        observations are NaN
+
+    Examples
+    --------
+    >>> store = get_market_data_store()
+    >>> store.history("AAPL", start="2019-01-01", fields=["close", "PE"])
+    >>> store.get("close", ["AAPL", "MSFT"], start="2019-06-01")
+    """
+
+    def __init__(self, tickers, dates, fields):
+        self.tickers = list(tickers)
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.fields = fields
+        self._rows = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    @classmethod
+    def build(cls, source=TICKER_DATA_DIR, groups=_GROUPS):
+        """
+        Build the store from tickerData CSV files
+
+        Parameters
+        ----------
+        source : str, default TICKER_DATA_DIR
+            Directory with ``<group>.csv`` long files (Ticker, Date, fields)
+            or ``<group>/<field>.csv`` wide files (Date, one column per
+            ticker)
+        groups : tuple of str
+            File groups to load
+        """
+        frames = [_read_group(source, group) for group in groups]
+        tickers = Index(
+            sorted(set().union(*(frame["Ticker"].unique() for frame in frames)))
+        )
+        dates = DatetimeIndex(
+            sorted(set().union(*(frame["Date"].unique() for frame in frames)))
+        )
+
+        fields = {}
+        for frame in frames:
+            rows = tickers.get_indexer(frame["Ticker"])
+            cols = dates.get_indexer(frame["Date"])
+            for field in frame.columns.drop(["Ticker", "Date"]):
+                values = np.full((len(tickers), len(dates)), np.nan)
+                values[rows, cols] = frame[field].to_numpy(dtype="float64")
+                fields[field] = values
+        return cls(list(tickers), dates.values.astype("datetime64[D]"), fields)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def save(self, path):
+        """Write the store as .npy files into a directory"""
+        arrays = {"dates": self.dates}
+        for i, values in enumerate(self.fields.values()):
+            arrays["field%d" % i] = values
+        meta = {"tickers": self.tickers, "fields": list(self.fields)}
+        save_arrays(path, arrays, meta)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load a store written by ``save``
+
+        Parameters
+        ----------
+        path : str
+            Store directory
+        mmap : bool, default True
+            Memory-map the field arrays instead of reading them into memory
+        """
+        arrays, meta = load_arrays(path, mmap=mmap)
+        fields = {
+            field: arrays["field%d" % i] for i, field in enumerate(meta["fields"])
+        }
+        return cls(meta["tickers"], np.array(arrays["dates"]), fields)
+
+    def _row(self, ticker):
+        try:
+            return self._rows[ticker]
+        except KeyError:
+            raise KeyError("Unknown ticker: %s" % ticker)
+
+    def date_slice(self, start=None, end=None):
+        """Slice of the date axis between start and end, both inclusive"""
+        lo = 0 if start is None else np.searchsorted(self.dates, _day(start))
+        hi = len(self.dates)
+        if end is not None:
+            hi = np.searchsorted(self.dates, _day(end), side="right")
+        return slice(int(lo), int(hi))
+
+    def values(self, field, ticker, start=None, end=None):
+        """
+        Observations of one field for one ticker as a view into the store
+
+        Returns
+        -------
+        numpy.ndarray
+            Values aligned with ``store.dates[store.date_slice(start, end)]``
+        """
+        return self.fields[field][self._row(ticker), self.date_slice(start, end)]
+
+    def get(self, field, tickers=None, start=None, end=None):
+        """
+        One field for several tickers
+
+        Parameters
+        ----------
+        field : str
+        tickers : str or list of str, default None
+            Defaults to every ticker
+        start, end : str or datetime-like, default None
+            Inclusive date range
+
+        Returns
+        -------
+        DataFrame
+            Indexed by date with a column per ticker
+        """
+        if tickers is None:
+            tickers = self.tickers
+        elif isinstance(tickers, str):
+            tickers = [tickers]
+        dates = self.date_slice(start, end)
+        rows = [self._row(ticker) for ticker in tickers]
+        return DataFrame(
+            self.fields[field][rows, dates].T,
+            index=DatetimeIndex(self.dates[dates], name="Date"),
+            columns=Index(tickers, name="Ticker"),
+        )
+
+    def history(self, ticker, start=None, end=None, fields=None):
+        """
+        Several fields for one ticker
+
+        Returns
+        -------
+        DataFrame
+            Indexed by date with a column per field
+        """
+        if fields is None:
+            fields = list(self.fields)
+        dates = self.date_slice(start, end)
+        row = self._row(ticker)
+        return DataFrame(
+            {field: self.fields[field][row, dates] for field in fields},
+            index=DatetimeIndex(self.dates[dates], name="Date"),
+        )
+
+
+def _day(date):
+    try:
+        return np.datetime64(date, "D")
+    except (TypeError, ValueError):
+        return np.datetime64(to_datetime(date).date(), "D")
+
+
+def get_market_data_store(path=None, source=TICKER_DATA_DIR, rebuild=False):
+    """
+    Open the market data store, building it from the CSV files first if it
+    has not been saved yet
+
+    Parameters
+    ----------
+    path : str, default None
+        Store directory; defaults to "MarketData" in the export directory
+    source : str, default TICKER_DATA_DIR
+        tickerData directory used when building
+    rebuild : bool, default False
+        Rebuild the store even if it exists
+    """
+    if path is None:
+        path = dataset_path("MarketData", ext="")
+    if rebuild or not os.path.isfile(os.path.join(path, "meta.json")):
+        MarketDataStore.build(source).save(path)
+    return MarketDataStore.load(path)
+
+
+def _read_mergers_file(path):
+    df = read_csv(path, dtype=_MERGERS_DTYPE, parse_dates=["announcement_date"])
+    # action ids are written as floats ("198725380.0")
+    df["action_id"] = df["action_id"].astype("Int64")
+    return df.sort_values("announcement_date", kind="mergesort", ignore_index=True)
+
+
+def _source_signatures(source):
+    signatures = {}
+    for file in sorted(os.listdir(source)):
+        if file.endswith(".csv"):
+            stat = os.stat(os.path.join(source, file))
+            signatures[file] = [stat.st_size, stat.st_mtime_ns]
+    return signatures
+
+
+def build_mergers_dataset(source=None, rebuild=False):
+    """
+    Consolidate the per-ticker M&A files into one Parquet dataset
+
+    The dataset is partitioned by ticker and each partition is sorted by
+    ``announcement_date``, so date filters can skip row groups from their
+    statistics; ``deal_status`` and the other labels are stored dictionary
+    encoded. A manifest of the source files is kept with the dataset: on
+    later calls only new or changed files are read and written, and
+    partitions of deleted files are dropped. Whenever partitions change, a
+    snapshot of every deal sorted by ``announcement_date`` is written as
+    one Feather file for loads across all tickers.
+
+    Parameters
+    ----------
+    source : str, default None
+        Directory of ``<ticker>.csv`` files; defaults to MERGERS_DIR
+    rebuild : bool, default False
+        Rewrite every partition
+
+    Returns
+    -------
+    list of str
+        Source files read
+    """
+    if source is None:
+        source = MERGERS_DIR
+    path = dataset_path(MERGERS_OUTFILE, ext="")
+    manifest = os.path.join(path, "_sources.json")
+    signatures = _source_signatures(source)
+    tickers, removed = {}, []
+
+    def read(file):
+        df = _read_mergers_file(os.path.join(source, file))
+        tickers[file] = sorted(df["ticker"].unique())
+        return df
+
+    if rebuild or not os.path.isfile(manifest):
+        files = list(signatures)
+        write_partitioned(
+            (read(file) for file in files), MERGERS_OUTFILE, partition_cols=["ticker"]
+        )
+    else:
+        with open(manifest) as f:
+            previous = json.load(f)
+        files = [
+            file
+            for file, signature in signatures.items()
+            if previous.get(file, {}).get("signature") != signature
+        ]
+        for file, entry in previous.items():
+            if file in signatures and file not in files:
+                tickers[file] = entry["tickers"]
+            else:
+                # Deleted or changed: drop its old partitions
+                if file not in signatures:
+                    removed.append(file)
+                for ticker in entry["tickers"]:
+                    shutil.rmtree(os.path.join(path, "ticker=%s" % ticker), True)
+        for file in files:
+            write_partitions(read(file), MERGERS_OUTFILE, partition_cols=["ticker"])
+
+    state = {
+        file: {"signature": signature, "tickers": tickers[file]}
+        for file, signature in signatures.items()
+    }
+    if files or removed or not dataset_exists(MERGERS_SNAPSHOT):
+        deals = read_partitioned(MERGERS_OUTFILE)
+        deals = deals.sort_values(["announcement_date", "ticker"], kind="mergesort")
+        write_dataset(deals, MERGERS_SNAPSHOT)
+    with _atomic(manifest) as partial, open(partial, "w") as f:
+        json.dump(state, f)
+    return files
+
+
+def load_mergers(tickers=None, start=None, end=None, deal_status=None, columns=None):
+    """
+    Load M&A deals from the consolidated dataset, building or updating it
+    from the source files first
+
+    Loads across all tickers read the memory-mapped snapshot and cut the
+    date range by binary search; ticker selections read only their
+    partitions.
+
+    Parameters
+    ----------
+    tickers : list of str, default None
+        Acquirer tickers; only their partitions are read
+    start, end : str or datetime-like, default None
+        Inclusive ``announcement_date`` range
+    deal_status : list of str, default None
+        e.g. ["Completed", "Pending"]
+    columns : list of str, default None
+        Subset of columns to load
+
+    Returns
+    -------
+    DataFrame
+    """
+    build_mergers_dataset()
+    if tickers is None:
+        load = columns
+        if columns is not None:
+            load = list(dict.fromkeys(columns + ["announcement_date", "deal_status"]))
+        deals = read_dataset(MERGERS_SNAPSHOT, columns=load)
+        dates = deals["announcement_date"].to_numpy()
+        lo, hi = 0, len(dates)
+        if start is not None:
+            lo = dates.searchsorted(np.datetime64(to_datetime(start)))
+        if end is not None:
+            hi = dates.searchsorted(np.datetime64(to_datetime(end)), side="right")
+        deals = deals.iloc[lo:hi]
+        if deal_status is not None:
+            deals = deals[deals["deal_status"].isin(deal_status)]
+        if columns is not None:
+            deals = deals[columns]
+        return deals.reset_index(drop=True)
+
+    filters = [("ticker", "in", list(tickers))]
+    if start is not None:
+        filters.append(("announcement_date", ">=", to_datetime(start)))
+    if end is not None:
+        filters.append(("announcement_date", "<=", to_datetime(end)))
+    if deal_status is not None:
+        filters.append(("deal_status", "in", list(deal_status)))
+    return read_partitioned(MERGERS_OUTFILE, columns=columns, filters=filters)
+
+
+def _values(df, name):
+    """Column or index level of a frame as an array"""
+    if name in df.columns:
+        return df[name].to_numpy()
+    return df.index.get_level_values(name).to_numpy()
+
+
+def asof_join(
+    left,
+    right,
+    on="Date",
+    by="Ticker",
+    fields=None,
+    right_on=None,
+    right_by=None,
+    direction="backward",
+    allow_exact_matches=True,
+    tolerance=None,
+):
+    """
+    As-of join of two panels across every ticker in one pass
+
+    Each left row picks up the right row of the same ticker with the
+    nearest date at or before its own (``direction="backward"``) or at or
+    after it (``"forward"``). Tickers and dates of both sides are turned
+    into one sorted integer key, ticker rank times date count plus date
+    rank, so the whole join is a single ``searchsorted`` instead of a
+    ``merge_asof`` per ticker.
+
+    Parameters
+    ----------
+    left, right : DataFrame
+        Panels with ticker and date columns or index levels, e.g.
+        ``Ticker.history`` output indexed by (symbol, date)
+    on, by : str, default "Date", "Ticker"
+        Date and ticker names in left
+    fields : list of str, default None
+        Right columns to add; defaults to every column of right other than
+        its keys. Names already in left get a "_right" suffix
+    right_on, right_by : str, default None
+        Date and ticker names in right, when they differ from left
+    direction : {"backward", "forward"}, default "backward"
+    allow_exact_matches : bool, default True
+        Whether a right row dated on the left date itself can match
+    tolerance : str or timedelta, default None
+        Maximum distance between matched dates
+
+    Returns
+    -------
+    DataFrame
+        left with the matched right fields, missing where nothing matched
+    """
+    right_on = on if right_on is None else right_on
+    right_by = by if right_by is None else right_by
+    if fields is None:
+        fields = [col for col in right.columns if col not in (right_on, right_by)]
+
+    left_dates = _values(left, on).astype("datetime64[ns]")
+    right_dates = _values(right, right_on).astype("datetime64[ns]")
+    codes, tickers = factorize(
+        np.concatenate([_values(left, by), _values(right, right_by)])
+    )
+    dates, ranks = np.unique(
+        np.concatenate([left_dates, right_dates]), return_inverse=True
+    )
+    n_dates = max(len(dates), 1)
+    keys = codes.astype("int64") * n_dates + ranks
+    left_keys, right_keys = keys[: len(left)], keys[len(left) :]
+
+    order = np.argsort(right_keys, kind="stable")
+    right_keys = right_keys[order]
+    if direction == "backward":
+        side = "right" if allow_exact_matches else "left"
+        pos = np.searchsorted(right_keys, left_keys, side=side) - 1
+    elif direction == "forward":
+        side = "left" if allow_exact_matches else "right"
+        pos = np.searchsorted(right_keys, left_keys, side=side)
+    else:
+        raise ValueError("direction must be 'backward' or 'forward'")
+
+    inside = (pos >= 0) & (pos < len(right_keys))
+    pos = np.where(inside, pos, 0)
+    matched = inside & (right_keys[pos] // n_dates == left_keys // n_dates)
+    take = order[pos]
+    if tolerance is not None:
+        gap = np.abs(right_dates[take] - left_dates)
+        matched &= gap <= to_timedelta(tolerance).to_timedelta64()
+    take = np.where(matched, take, -1)
+
+    out = left.copy()
+    for field in fields:
+        name = field + "_right" if field in out.columns else field
+        out[name] = right[field].array.take(take, allow_fill=True)
+    return out
+
+
+class FundamentalsPanel(object):
+    """
+    Fundamental ratios of every ticker, date and reporting frequency
+
+    The annual and quarterly ``fundamentals`` files are joined on
+    ``Ticker`` and ``Date`` into one frame keyed by (Ticker, frequency,
+    Date), with a float32 column per ratio. Ratios not reported at a
+    frequency are NaN. The panel is cached as a Feather file and can take
+    in ``Ticker.get_financial_data`` results.
+
+    Parameters
+    ----------
+    data : DataFrame
+        Frame with ``Ticker``, ``frequency`` and ``Date`` columns
+
+    Examples
+    --------
+    >>> panel = get_fundamentals_panel()
+    >>> panel.asof(["AAPL", "MSFT"], ["2019-01-15", "2019-01-15"], "quarter")
+    """
+
+    def __init__(self, data):
+        data = data.astype({"Ticker": "category", "frequency": "category"})
+        data["Date"] = to_datetime(data["Date"])
+        values = data.columns.drop(_FUNDAMENTALS_KEYS)
+        data = data.astype({col: "float32" for col in values})
+        data = data.sort_values(_FUNDAMENTALS_KEYS, kind="mergesort")
+        self.data = data[_FUNDAMENTALS_KEYS + list(values)].reset_index(drop=True)
+
+    @classmethod
+    def build(cls, source=None):
+        """
+        Build the panel from the fundamentals CSV files
+
+        Parameters
+        ----------
+        source : str, default None
+            Directory with one subdirectory per frequency ("annual",
+            "quarter") of ``Ticker,Date`` keyed CSV files; defaults to
+            FUNDAMENTALS_DIR
+        """
+        if source is None:
+            source = FUNDAMENTALS_DIR
+        frames = []
+        for frequency in sorted(os.listdir(source)):
+            directory = os.path.join(source, frequency)
+            files = [
+                read_csv(os.path.join(directory, file), index_col=0)
+                .astype({"Date": "datetime64[ns]"})
+                .set_index(["Ticker", "Date"])
+                for file in sorted(os.listdir(directory))
+                if file.endswith(".csv")
+            ]
+            frame = concat(files, axis=1).reset_index()
+            frame.insert(1, "frequency", frequency)
+            frames.append(frame)
+        return cls(concat(frames, ignore_index=True))
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def fields(self):
+        return list(self.data.columns.drop(_FUNDAMENTALS_KEYS))
+
+    def save(self):
+        """Cache the panel in the export directory"""
+        return write_dataset(self.data, FUNDAMENTALS_OUTFILE)
+
+    @classmethod
+    def load(cls):
+        """Load the panel cached by ``save``"""
+        return cls(read_dataset(FUNDAMENTALS_OUTFILE))
+
+    def get(self, tickers=None, frequency=None, start=None, end=None, fields=None):
+        """
+        Rows of the panel
+
+        Parameters
+        ----------
+        tickers : str or list of str, default None
+        frequency : str, default None
+            "annual", "quarter" or "ttm"
+        start, end : str or datetime-like, default None
+            Inclusive ``Date`` range
+        fields : list of str, default None
+
+        Returns
+        -------
+        DataFrame
+        """
+        data = self.data
+        keep = np.ones(len(data), dtype=bool)
+        if tickers is not None:
+            keep &= data["Ticker"].isin(np.atleast_1d(tickers)).to_numpy()
+        if frequency is not None:
+            keep &= (data["frequency"] == frequency).to_numpy()
+        if start is not None:
+            keep &= (data["Date"] >= to_datetime(start)).to_numpy()
+        if end is not None:
+            keep &= (data["Date"] <= to_datetime(end)).to_numpy()
+        columns = _FUNDAMENTALS_KEYS + (self.fields if fields is None else fields)
+        return data.loc[keep, columns].reset_index(drop=True)
+
+    def asof(self, tickers, dates, frequency="quarter", fields=None, lag=None):
+        """
+        Point-in-time lookup: the latest observation of each ticker at or
+        before each date
+
+        Parameters
+        ----------
+        tickers : array-like
+        dates : array-like
+            Aligned with tickers
+        frequency : str, default "quarter"
+        fields : list of str, default None
+        lag : str or timedelta, default None
+            Publication delay added to period dates, e.g. "45D", so a period
+            only becomes visible once it would have been reported
+
+        Returns
+        -------
+        DataFrame
+            One row per query with ``Ticker``, ``asof`` (the query date),
+            ``Date`` (the period used, NaT if none) and the fields
+        """
+        fields = self.fields if fields is None else fields
+        right = self.get(frequency=frequency, fields=fields)
+        if lag is not None:
+            right["Date"] = right["Date"] + to_timedelta(lag)
+        left = DataFrame(
+            {
+                "Ticker": np.asarray(tickers, dtype=object),
+                "asof": to_datetime(np.asarray(dates)),
+            }
+        )
+        fields = ["Date"] + fields
+        out = asof_join(left, right, on="asof", fields=fields, right_on="Date")
+        if lag is not None:
+            out["Date"] = out["Date"] - to_timedelta(lag)
+        return out
+
+    def merge(self, financials):
+        """
+        Add ``Ticker.get_financial_data`` results to the panel
+
+        Rows for a (Ticker, frequency, Date) already in the panel are
+        updated: non-missing new values replace the stored ones and other
+        fields are kept. New fields become new columns.
+
+        Parameters
+        ----------
+        financials : DataFrame
+            Indexed by symbol with ``asOfDate``, ``periodType`` and one
+            column per data type
+
+        Returns
+        -------
+        FundamentalsPanel
+        """
+        new = financials.reset_index().rename(
+            columns={"symbol": "Ticker", "asOfDate": "Date"}
+        )
+        new["frequency"] = new.pop("periodType").map(_PERIOD_FREQUENCY)
+        new = new.astype({"Ticker": str}).set_index(_FUNDAMENTALS_KEYS)
+        old = self.data.astype({"Ticker": str, "frequency": str})
+        combined = new.combine_first(old.set_index(_FUNDAMENTALS_KEYS))
+        return FundamentalsPanel(combined.reset_index())
+
+
+def get_fundamentals_panel(rebuild=False):
+    """
+    Load the fundamentals panel, building it from the CSV files and caching
+    it in the export directory first if needed
+
+    Parameters
+    ----------
+    rebuild : bool, default False
+        Rebuild the cache even if it exists
+    """
+    if rebuild or not dataset_exists(FUNDAMENTALS_OUTFILE):
+        FundamentalsPanel.build().save()
+    return FundamentalsPanel.load()
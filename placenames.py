@@ -0,0 +1,305 @@
+import zlib
+
+import numpy as np
+from pandas import DataFrame, Series, concat
+
+from geodataimport.utils.matching import fuzzy_matches, prefix_range
+from geodataimport.utils.storage import load_arrays, save_arrays
+
+_DEFAULT_NAME_COLS = ("name", "alternatenames")
+
+
+def normalize_names(names):
+    """
+    Normalize place names for lookup
+
+    Strips accents, case-folds and collapses punctuation and whitespace, so
+    "São Paulo", "SAO-PAULO" and "sao paulo" share one key.
+
+    Parameters
+    ----------
+    names : str or array-like
+
+    Returns
+    -------
+    Series
+    """
+    names = Series(np.atleast_1d(names), dtype=object).fillna("").astype(str)
+    return (
+        names.str.normalize("NFKD")
+        .str.replace("[\u0300-\u036f]", "", regex=True)
+        .str.casefold()
+        .str.replace(r"[\W_]+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def _hash(key):
+    return zlib.crc32(key.encode("utf-8"))
+
+
+class _StringArray(object):
+    """Read-only sequence of strings stored as one UTF-8 blob plus offsets"""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype="int64")
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype="uint8")
+        return cls(blob, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i] : self.offsets[i + 1]]).decode("utf-8")
+
+
+class PlaceNameIndex(object):
+    """
+    Place-name lookup over GeoNames names and alternate names
+
+    Normalized names are kept sorted in a compact string array (prefix
+    search by bisection) with an open-addressing hash table over them (exact
+    lookup in constant time). Each name points at the ids of every place
+    carrying it. All arrays can be saved and memory-mapped back.
+
+    Parameters
+    ----------
+    keys : _StringArray
+        Sorted, unique normalized names
+    postings, posting_offsets : numpy.ndarray
+        Place ids of key i are postings[posting_offsets[i]:posting_offsets[i + 1]]
+    table : numpy.ndarray
+        Hash table of key positions, -1 for empty slots
+    id_col : str, default "geonameId"
+        Name of the id column in results
+
+    Examples
+    --------
+    >>> cities = GeoNames(symbols="cities", alternate_names=True).read()[0]
+    >>> index = PlaceNameIndex.from_frame(cities)
+    >>> index.exact(["New York", "Zürich"])
+    """
+
+    def __init__(self, keys, postings, posting_offsets, table, id_col="geonameId"):
+        self.keys = keys
+        self.postings = postings
+        self.posting_offsets = posting_offsets
+        self.table = table
+        self.id_col = id_col
+
+    @classmethod
+    def from_frame(cls, df, id_col="geonameId", name_cols=_DEFAULT_NAME_COLS):
+        """
+        Build the index from a GeoNames frame
+
+        Parameters
+        ----------
+        df : DataFrame
+            Frame with an id column and one or more name columns.
+            ``alternatenames`` holds comma-separated names
+        id_col : str, default "geonameId"
+        name_cols : tuple of str
+            Name columns to index; columns missing from df are skipped
+        """
+        ids = df[id_col].to_numpy()
+        names = []
+        for col in name_cols:
+            if col not in df:
+                continue
+            values = Series(df[col].to_numpy(), index=ids)
+            if col == "alternatenames":
+                values = values.str.split(",").explode()
+            names.append(values.dropna())
+        names = concat(names)
+        pairs = DataFrame(
+            {"key": normalize_names(names.values).values, "id": names.index}
+        )
+        pairs = pairs[pairs["key"] != ""].drop_duplicates()
+        pairs = pairs.sort_values(["key", "id"], kind="mergesort")
+
+        # Pairs are sorted by key, so each key starts where it differs from
+        # the one before. Comparing object arrays avoids a fixed-width copy
+        # sized by the longest name
+        key = pairs["key"].to_numpy(dtype=object)
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        keys = key[starts]
+        posting_offsets = np.append(starts, len(pairs)).astype("int64")
+        postings = pairs["id"].to_numpy(dtype="int64")
+        return cls(
+            _StringArray.from_strings(keys),
+            postings,
+            posting_offsets,
+            _build_table(keys),
+            id_col=id_col,
+        )
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _find(self, key):
+        """Position of a normalized key, or -1"""
+        mask = len(self.table) - 1
+        slot = _hash(key) & mask
+        while True:
+            pos = self.table[slot]
+            if pos < 0:
+                return -1
+            if self.keys[pos] == key:
+                return pos
+            slot = (slot + 1) & mask
+
+    def _result(self, query, positions, score=None):
+        query = np.asarray(query, dtype="int64")
+        positions = np.asarray(positions, dtype="int64")
+        counts = self.posting_offsets[positions + 1] - self.posting_offsets[positions]
+        starts = np.repeat(self.posting_offsets[positions], counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        take = starts + within
+        out = DataFrame(
+            {
+                "query": np.repeat(query, counts),
+                "name": [self.keys[p] for p in np.repeat(positions, counts)],
+                self.id_col: self.postings[take],
+            }
+        )
+        if score is not None:
+            out["score"] = np.repeat(score, counts)
+        return out
+
+    def exact(self, names):
+        """
+        Look up places by name
+
+        Parameters
+        ----------
+        names : str or array-like
+
+        Returns
+        -------
+        DataFrame
+            One row per (query, place) match with the query position, the
+            normalized ``name`` and the place id
+        """
+        query, positions = [], []
+        for i, key in enumerate(normalize_names(names)):
+            pos = self._find(key)
+            if pos >= 0:
+                query.append(i)
+                positions.append(pos)
+        return self._result(query, positions)
+
+    def prefix(self, prefixes, limit=10):
+        """
+        Look up places whose name starts with a prefix
+
+        Parameters
+        ----------
+        prefixes : str or array-like
+        limit : int, default 10
+            Maximum number of names matched per prefix, in sorted order
+
+        Returns
+        -------
+        DataFrame
+            Same layout as ``exact``
+        """
+        query, positions = [], []
+        for i, key in enumerate(normalize_names(prefixes)):
+            start, stop = prefix_range(self.keys, key)
+            stop = min(stop, start + limit)
+            query.extend([i] * (stop - start))
+            positions.extend(range(start, stop))
+        return self._result(query, positions)
+
+    def fuzzy(self, names, limit=5, cutoff=0.8):
+        """
+        Look up places by approximate name
+
+        Candidates share the first letter of the query and have a similar
+        length; see ``utils.matching.fuzzy_matches``.
+
+        Parameters
+        ----------
+        names : str or array-like
+        limit : int, default 5
+            Maximum number of names matched per query
+        cutoff : float, default 0.8
+            Minimum similarity ratio in [0, 1]
+
+        Returns
+        -------
+        DataFrame
+            Same layout as ``exact`` plus a ``score`` column
+        """
+        query, positions, scores = [], [], []
+        for i, key in enumerate(normalize_names(names)):
+            if not key:
+                continue
+            start, stop = prefix_range(self.keys, key[0])
+            lengths = np.diff(self.keys.offsets[start : stop + 1])
+            close = np.flatnonzero(np.abs(lengths - len(key)) <= max(2, len(key) // 3))
+            matches = fuzzy_matches(self.keys, key, limit, cutoff, close + start)
+            for ratio, pos in matches:
+                query.append(i)
+                positions.append(pos)
+                scores.append(ratio)
+        return self._result(query, positions, score=np.asarray(scores))
+
+    def save(self, path):
+        """Write the index arrays as .npy files into a directory"""
+        arrays = {
+            "keys": self.keys.blob,
+            "key_offsets": self.keys.offsets,
+            "postings": self.postings,
+            "posting_offsets": self.posting_offsets,
+            "table": self.table,
+        }
+        save_arrays(path, arrays, {"id_col": self.id_col})
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load an index written by ``save``
+
+        Parameters
+        ----------
+        path : str
+            Index directory
+        mmap : bool, default True
+            Memory-map the arrays instead of reading them into memory
+        """
+        arrays, meta = load_arrays(path, mmap=mmap)
+        return cls(
+            _StringArray(arrays["keys"], arrays["key_offsets"]),
+            arrays["postings"],
+            arrays["posting_offsets"],
+            arrays["table"],
+            id_col=meta["id_col"],
+        )
+
+
+def _build_table(keys):
+    """Open-addressing (linear probing) hash table over key positions"""
+    size = 1 << max(3, int(2 * len(keys) - 1).bit_length())
+    mask = size - 1
+    table = np.full(size, -1, dtype="int64")
+    slots = np.fromiter((_hash(k) for k in keys), dtype="int64", count=len(keys))
+    slots &= mask
+    pending = np.arange(len(keys))
+    while len(pending):
+        candidates = slots[pending]
+        free = table[candidates] == -1
+        # Fill each free slot with the first pending key probing it
+        taken, first = np.unique(candidates[free], return_index=True)
+        placed = pending[free][first]
+        table[taken] = placed
+        pending = np.setdiff1d(pending, placed, assume_unique=True)
+        slots[pending] = (slots[pending] + 1) & mask
+    return table
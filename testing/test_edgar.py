@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from geodataimport.edgar import CIKResolver, get_cik, get_company_title
+
+
+def test_lookups():
+    assert get_cik("abt") == 1800
+    assert get_cik(["AIR", "NOT-A-TICKER"]) == [1750, None]
+    assert get_company_title(1800) == "ABBOTT LABORATORIES"
+    assert get_company_title([1750, 1]) == ["AAR CORP", None]
+
+
+def test_share_class_tickers():
+    resolver = CIKResolver()
+    assert resolver.cik("AIG.WT") == resolver.cik("AIG-WT") == resolver.cik("AIG")
+    assert "AIG-WT" in resolver.tickers(resolver.cik("AIG"))
+
+
+def test_search():
+    resolver = CIKResolver()
+    assert resolver.search("abbott lab") == [("ABBOTT LABORATORIES", 1800)]
+    assert len(resolver.search("a", limit=3)) == 3
+
+    matches = resolver.fuzzy("Abbot Laboratories")
+    assert matches[0][:2] == ("ABBOTT LABORATORIES", 1800)
+    assert resolver.fuzzy("zzzz qqqq") == []
+
+
+def test_concurrent_load():
+    resolver = CIKResolver()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(resolver.cik, ["ABT"] * 32))
+    assert results == [1800] * 32
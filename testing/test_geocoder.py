@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from geodataimport.geocoder import ReverseGeocoder, haversine
+
+CITIES = pd.DataFrame(
+    {
+        "geonameId": [5128581, 2643743, 2988507, 1850147, 2147714],
+        "name": ["New York City", "London", "Paris", "Tokyo", "Sydney"],
+        "latitude": [40.71427, 51.50853, 48.85341, 35.6895, -33.86785],
+        "longitude": [-74.00597, -0.12574, 2.3488, 139.69171, 151.20732],
+    }
+)
+
+
+@pytest.fixture
+def geocoder():
+    return ReverseGeocoder(CITIES)
+
+
+def test_haversine():
+    # London to Paris is roughly 344 km
+    assert haversine(51.50853, -0.12574, 48.85341, 2.3488) == pytest.approx(
+        343.5, abs=1
+    )
+    assert haversine(10.0, 20.0, 10.0, 20.0) == 0
+
+
+def test_nearest(geocoder):
+    df = geocoder.nearest([40.0, 51.0, -30.0], [-75.0, -0.5, 150.0])
+    assert list(df["name"]) == ["New York City", "London", "Sydney"]
+    assert list(df["query"]) == [0, 1, 2]
+
+
+def test_nearest_k(geocoder):
+    df = geocoder.nearest(51.0, 0.0, k=2)
+    assert list(df["name"]) == ["London", "Paris"]
+    assert df["distance"].is_monotonic_increasing
+
+
+def test_nearest_matches_brute_force(geocoder):
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(-90, 90, 100)
+    lon = rng.uniform(-180, 180, 100)
+    df = geocoder.nearest(lat, lon)
+    distances = haversine(
+        lat[:, None], lon[:, None], CITIES["latitude"].values, CITIES["longitude"].values
+    )
+    expected = CITIES["geonameId"].values[distances.argmin(axis=1)]
+    np.testing.assert_array_equal(df["geonameId"].values, expected)
+
+
+def test_within_radius(geocoder):
+    df = geocoder.within_radius([51.0, 0.0], [0.0, 0.0], 500)
+    assert list(df["name"]) == ["London", "Paris"]
+    assert (df["query"] == 0).all()
+    assert (df["distance"] <= 500).all()
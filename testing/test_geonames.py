@@ -1,7 +1,21 @@
+import io
+import os
+import tempfile
+import time
+import zipfile
+
+import pandas as pd
 import pytest
 
 from geodataimport.compat import is_list_like
-from geodataimport.geonames import get_cities, get_countries
+from geodataimport.geonames import (
+    GeoNames,
+    _parse_geonames_file,
+    get_cities,
+    get_countries,
+)
+from geodataimport.utils import metrics
+from geodataimport.utils.config import _CONFIG
 
 
 def test_countries():
@@ -26,3 +40,193 @@ def test_countries():
 def test_cities():
     df = get_cities()
     assert df.empty is False
+
+
+def test_cities_min_population():
+    df = get_cities(min_population=15000)
+    assert df.empty is False
+    assert len(df) < len(get_cities())
+
+
+def _gazetteer_row(geonameid, feature_class, country):
+    fields = {
+        "geonameid": str(geonameid),
+        "latitude": "47.4",
+        "longitude": "8.5",
+        "feature class": feature_class,
+        "country code": country,
+        "admin1 code": "ZH",
+        "population": "0",
+    }
+    return [fields.get(name, "") for name in _CONFIG["geonames"]["gazetteer"]["names"]]
+
+
+def test_parse_gazetteer_dtypes():
+    rows = [_gazetteer_row(1, "P", "NA"), _gazetteer_row(2, "P", "CH")]
+    rows[0][_CONFIG["geonames"]["gazetteer"]["names"].index("admin1 code")] = "05"
+    text = "".join("\t".join(r) + "\n" for r in rows)
+    df = _parse_geonames_file(io.StringIO(text), _CONFIG["geonames"]["gazetteer"])
+    # Namibia's "NA" is a code, not a missing value
+    assert list(df["country code"]) == ["NA", "CH"]
+    assert df["geonameid"].dtype == "int32"
+    assert df["latitude"].dtype == "float32"
+    assert df["country code"].dtype == "category"
+    assert df["population"].dtype == "Int64"
+    assert df["elevation"].dtype == "Int32"
+    assert df["elevation"].isna().all()
+
+    df = GeoNames(symbols="gazetteer").standardize_geo_data("gazetteer", df)
+    assert list(df["parentId"]) == ["NA.05", "CH.ZH"]
+
+
+def test_parse_admin_dtypes():
+    text = "NA.05\tKhomas\tKhomas\t3352137\nXX.01\tNowhere\tNowhere\t\n"
+    df = _parse_geonames_file(io.StringIO(text), _CONFIG["geonames"]["admin1"])
+    assert df["geonameid"].dtype == "Int32"
+    assert df["geonameid"].isna().tolist() == [False, True]
+
+    df = GeoNames(symbols="admin1").standardize_geo_data("admin1", df)
+    assert list(df["parentId"]) == ["NA", "XX"]
+    assert list(df["code"]) == ["05", "01"]
+
+
+@pytest.mark.parametrize(
+    "min_population, tier, filename",
+    [
+        (None, None, "cities500.zip"),
+        (100, 500, "cities500.zip"),
+        (1000, 1000, "cities1000.zip"),
+        (1001, 1000, "cities1000.zip"),
+        (50000, 15000, "cities15000.zip"),
+    ],
+)
+def test_population_tier(min_population, tier, filename):
+    geonames = GeoNames(symbols="cities", min_population=min_population)
+    assert geonames._population_tier("cities") == tier
+    assert geonames._filenames("cities") == [filename]
+    assert geonames._population_tier("admin1") is None
+
+
+@pytest.mark.parametrize("min_population, kept", [(None, 3), (1000, 2), (1001, 1)])
+def test_cities_min_population_filter(min_population, kept):
+    config = _CONFIG["geonames"]["cities"]
+    rows = [_gazetteer_row(i, "P", "CH") for i in range(3)]
+    population = config["names"].index("population")
+    # An admin seat below the 1000 threshold of cities1000
+    for row, value in zip(rows, ["900", "1000", "5000"]):
+        row[population] = value
+    text = "".join("\t".join(r) + "\n" for r in rows)
+    df = _parse_geonames_file(io.StringIO(text), config)
+    geonames = GeoNames(symbols="cities", min_population=min_population)
+    assert len(geonames.standardize_geo_data("cities", df)) == kept
+
+
+def test_iter_chunks(tmp_path, monkeypatch):
+    places = [("P", "CH"), ("A", "CH"), ("P", "US")] * 4
+    rows = [_gazetteer_row(i, *place) for i, place in enumerate(places)]
+    dump = str(tmp_path / "allCountries.zip")
+    with zipfile.ZipFile(dump, "w") as zf:
+        zf.writestr("allCountries.txt", "".join("\t".join(r) + "\n" for r in rows))
+    monkeypatch.setattr(GeoNames, "_download_file", lambda self, url: dump)
+
+    chunks = list(
+        GeoNames(symbols="gazetteer").iter_chunks(
+            "gazetteer", chunksize=5, feature_classes=["P"], countries=["CH"]
+        )
+    )
+    df = pd.concat(chunks)
+    # The last chunk of 2 rows has no match and is skipped
+    assert len(chunks) == 2
+    assert list(df["geonameId"]) == [0, 3, 6, 9]
+    assert set(df["parentId"]) == {"CH.ZH"}
+    assert df["population"].isna().all()
+    assert not os.path.exists(dump)
+
+    with pytest.raises(ValueError):
+        next(GeoNames(symbols="countries").iter_chunks("countries", countries=["CH"]))
+
+
+def _fake_download(tmp_path, calls, delays=None, broken=()):
+    admin1 = "CH.ZH\tZürich\tZurich\t2657895\n"
+    gazetteer = "\t".join(_gazetteer_row(1, "P", "CH")) + "\n"
+    admin2 = "CH.ZH.112\tBezirk Zürich\tBezirk Zurich\t6458798\n"
+    contents = {
+        "admin1CodesASCII.txt": admin1,
+        "admin2Codes.txt": admin2,
+        "allCountries.zip": gazetteer,
+    }
+
+    def download(self, url):
+        file = url.rsplit("/", 1)[-1]
+        calls.append(file)
+        time.sleep((delays or {}).get(file, 0))
+        if file in broken:
+            raise ValueError("Malformed file.")
+        path = tmp_path / file
+        path.write_text(contents[file], encoding="utf-8")
+        return str(path)
+
+    return download
+
+
+def test_read_order(tmp_path, monkeypatch):
+    # admin1 finishes first but results follow the order of the symbols
+    download = _fake_download(tmp_path, [], delays={"allCountries.zip": 0.1})
+    monkeypatch.setattr(GeoNames, "_download_file", download)
+
+    gazetteer, admin1 = GeoNames(symbols=["gazetteer", "admin1"]).read()
+    assert list(gazetteer["geonameId"]) == [1]
+    assert list(admin1["id"]) == ["CH.ZH"]
+    assert not os.listdir(str(tmp_path))
+
+
+def test_read_spans(tmp_path, monkeypatch):
+    monkeypatch.setattr(GeoNames, "_download_file", _fake_download(tmp_path, []))
+    with metrics.collect() as collected:
+        GeoNames(symbols=["gazetteer", "admin1"]).read()
+    counts = collected.summary()["count"]
+    assert counts[("GeoNames", "parse")] == 2
+    assert counts[("GeoNames", "standardize")] == 2
+
+
+def test_read_errors(tmp_path, monkeypatch):
+    calls = []
+    download = _fake_download(
+        tmp_path,
+        calls,
+        delays={"allCountries.zip": 0.2},
+        broken=["admin1CodesASCII.txt"],
+    )
+    monkeypatch.setattr(GeoNames, "_download_file", download)
+    symbols = ["admin1", "gazetteer", "admin2"]
+
+    # admin2 is still queued behind gazetteer when admin1 fails and is cancelled
+    with pytest.raises(ValueError, match="Location: admin1"):
+        GeoNames(symbols=symbols, errors="raise", max_workers=1).read()
+    assert calls == ["admin1CodesASCII.txt", "allCountries.zip"]
+
+    with pytest.warns(UserWarning, match="Location: admin1"):
+        gazetteer, admin2 = GeoNames(symbols=symbols).read()
+    assert list(gazetteer["geonameId"]) == [1]
+    assert list(admin2["id"]) == ["CH.ZH.112"]
+
+
+class _BrokenResponse(object):
+    closed = False
+
+    def iter_content(self, chunk_size=None):
+        yield b"geonameid\t"
+        raise IOError("Connection reset")
+
+    def close(self):
+        self.closed = True
+
+
+def test_download_file_removes_partial_file(tmp_path, monkeypatch):
+    response = _BrokenResponse()
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    monkeypatch.setattr(GeoNames, "_get_response", lambda self, url, **kw: response)
+    with pytest.raises(IOError):
+        GeoNames(symbols="gazetteer")._download_file("allCountries.zip")
+    assert response.closed
+    assert not os.listdir(str(tmp_path))
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from geodataimport.hierarchy import LocationHierarchy
+from geodataimport.utils import downloadGeoData
+from geodataimport.utils.storage import write_dataset
+
+COUNTRIES = pd.DataFrame({"id": ["US", "CH"]})
+ADMIN1 = pd.DataFrame({"id": ["US.CA", "US.NY", "CH.ZH"], "parentId": ["US", "US", "CH"]})
+ADMIN2 = pd.DataFrame({"id": ["US.CA.075", "US.NY.061"], "parentId": ["US.CA", "US.NY"]})
+CITIES = pd.DataFrame(
+    {
+        "id": [5391959, 5128581, 2657896, 5368361],
+        "parentId": ["US.CA.075", "US.NY.061", "CH.ZH", "US.CA.037"],
+    }
+)
+
+
+@pytest.fixture
+def hierarchy():
+    return LocationHierarchy.from_frames(COUNTRIES, ADMIN1, ADMIN2, CITIES)
+
+
+def test_parent(hierarchy):
+    assert list(hierarchy.parent([5391959, "US.CA", "US"])) == [
+        "US.CA.075",
+        "US",
+        None,
+    ]
+
+
+def test_missing_admin2_attaches_to_admin1(hierarchy):
+    assert hierarchy.parent([5368361])[0] == "US.CA"
+    assert hierarchy.ancestor([5368361], "admin2")[0] is None
+
+
+def test_ancestor(hierarchy):
+    ids = [5391959, 5128581, 2657896]
+    assert list(hierarchy.ancestor(ids, "countries")) == ["US", "US", "CH"]
+    assert list(hierarchy.ancestor(ids, "admin1")) == ["US.CA", "US.NY", "CH.ZH"]
+
+
+def test_children(hierarchy):
+    assert list(hierarchy.children("US")) == ["US.CA", "US.NY"]
+    assert sorted(hierarchy.children("US.CA")) == ["5368361", "US.CA.075"]
+    assert len(hierarchy.children(2657896)) == 0
+
+
+def test_rollup(hierarchy):
+    ids = [5391959, 5128581, 2657896, 5368361]
+    totals = hierarchy.rollup(ids, [1, 2, 3, 4], "countries")
+    assert totals.to_dict() == {"US": 7.0, "CH": 3.0}
+
+
+def test_unknown_id(hierarchy):
+    with pytest.raises(KeyError):
+        hierarchy.parent(["XX"])
+
+
+def test_save_load(hierarchy, tmp_path):
+    path = str(tmp_path / "hierarchy")
+    hierarchy.save(path)
+    loaded = LocationHierarchy.load(path)
+    # Backed by the mapped file rather than a copy
+    assert isinstance(loaded.parents.base, np.memmap)
+    np.testing.assert_array_equal(loaded.ancestors, hierarchy.ancestors)
+    assert list(loaded.ids) == list(hierarchy.ids)
+
+
+def test_download_hierarchy(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXPORT_DIR", str(tmp_path))
+    config = downloadGeoData._CONFIG["geonames"]
+    frames = [COUNTRIES, ADMIN1, ADMIN2, CITIES]
+    for location, df in zip(["country", "admin1", "admin2", "cities"], frames):
+        write_dataset(df, config[location]["outfile"])
+    downloadGeoData.download_hierarchy()
+    loaded = downloadGeoData.load_location_hierarchy()
+    expected = LocationHierarchy.from_frames(*frames)
+    assert list(loaded.ids) == list(expected.ids)
+    np.testing.assert_array_equal(loaded.ancestors, expected.ancestors)
+
+    graph = downloadGeoData.build_download_graph()
+    assert set(graph.tasks["hierarchy"].deps) == {
+        "country",
+        "admin1",
+        "admin2",
+        "cities",
+    }
@@ -0,0 +1,162 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from geodataimport import marketdata
+from geodataimport.marketdata import (
+    MERGERS_DIR,
+    TICKER_DATA_DIR,
+    FundamentalsPanel,
+    MarketDataStore,
+    asof_join,
+    build_mergers_dataset,
+    get_fundamentals_panel,
+    get_market_data_store,
+    load_mergers,
+)
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    return get_market_data_store(str(tmp_path_factory.mktemp("store")))
+
+
+def test_matches_csv(store):
+    long = pd.read_csv(os.path.join(TICKER_DATA_DIR, "price.csv"), parse_dates=["Date"])
+    aapl = long[long["Ticker"] == "AAPL"].set_index("Date").sort_index()
+    history = store.history("AAPL", fields=["close", "high"])
+    history = history.dropna(how="all")
+    np.testing.assert_allclose(history["close"], aapl["close"])
+    np.testing.assert_allclose(history["high"], aapl["high"])
+
+
+def test_date_range(store):
+    df = store.get("close", ["AAPL", "MSFT"], start="2019-07-30", end="2019-07-31")
+    assert list(df.columns) == ["AAPL", "MSFT"]
+    assert list(df.index.strftime("%Y-%m-%d")) == ["2019-07-30", "2019-07-31"]
+    assert df.loc["2019-07-31", "AAPL"] == 213.04
+
+    values = store.values("close", "AAPL", start="2019-07-30", end="2019-07-31")
+    assert isinstance(values, np.memmap)
+    np.testing.assert_array_equal(values, df["AAPL"])
+
+    with pytest.raises(KeyError):
+        store.values("close", "NOPE")
+
+
+def test_wide_files(store, tmp_path):
+    shutil.copytree(os.path.join(TICKER_DATA_DIR, "price"), str(tmp_path / "price"))
+    wide = MarketDataStore.build(str(tmp_path), groups=("price",))
+    np.testing.assert_allclose(
+        wide.get("Close").values, store.get("close").values, equal_nan=True
+    )
+    np.testing.assert_allclose(
+        wide.get("Adj Close").values, store.get("lastprice").values, equal_nan=True
+    )
+
+
+def test_mergers(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXPORT_DIR", str(tmp_path / "export"))
+    source = str(tmp_path / "mergers")
+    shutil.copytree(MERGERS_DIR, source)
+    monkeypatch.setattr(marketdata, "MERGERS_DIR", source)
+
+    assert len(build_mergers_dataset(source)) == 84
+    assert build_mergers_dataset(source) == []
+    csco = pd.read_csv(os.path.join(source, "CSCO.csv"))
+    deals = load_mergers()
+    assert len(deals) == 6041
+    assert deals["announcement_date"].is_monotonic_increasing
+    assert deals["deal_status"].dtype == "category"
+
+    pending = load_mergers(tickers=["CSCO"], deal_status=["Pending"])
+    assert len(pending) == (csco["deal_status"] == "Pending").sum()
+    recent = load_mergers(start="2019-07-01", end="2019-07-31")
+    assert recent["announcement_date"].between("2019-07-01", "2019-07-31").all()
+
+    # New, changed and deleted source files
+    csco.iloc[:3].to_csv(os.path.join(source, "CSCO.csv"), index=False)
+    csco.iloc[:2].assign(ticker="NEWT").to_csv(
+        os.path.join(source, "NEWT.csv"), index=False
+    )
+    pypl = len(pd.read_csv(os.path.join(source, "PYPL.csv")))
+    os.remove(os.path.join(source, "PYPL.csv"))
+    assert sorted(build_mergers_dataset(source)) == ["CSCO.csv", "NEWT.csv"]
+
+    deals = load_mergers()
+    assert len(deals) == 6041 - len(csco) + 3 - pypl + 2
+    counts = deals["ticker"].value_counts()
+    assert counts["CSCO"] == 3 and counts["NEWT"] == 2 and counts.get("PYPL", 0) == 0
+
+
+def test_fundamentals_panel(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXPORT_DIR", str(tmp_path))
+    panel = get_fundamentals_panel()
+    assert set(panel.data["frequency"]) == {"annual", "quarter"}
+    assert (panel.data[panel.fields].dtypes == "float32").all()
+    assert get_fundamentals_panel().data.equals(panel.data)
+
+    quarter = panel.get("AAPL", "quarter", start="2019-01-01", fields=["ROA", "CR"])
+    assert list(quarter["Date"].dt.strftime("%Y-%m-%d")) == ["2019-03-30", "2019-06-29"]
+
+    asof = panel.asof(["AAPL"] * 3, ["2019-04-15", "2019-07-01", "2010-01-01"])
+    assert list(asof["Date"].dt.strftime("%Y-%m-%d").fillna("")) == [
+        "2019-03-30",
+        "2019-06-29",
+        "",
+    ]
+    lagged = panel.asof(["AAPL"], ["2019-07-01"], fields=["ROA"], lag="45D")
+    assert lagged.loc[0, "Date"] == pd.Timestamp("2019-03-30")
+
+
+def test_fundamentals_merge():
+    panel = FundamentalsPanel.build()
+    financials = pd.DataFrame(
+        {
+            "asOfDate": pd.to_datetime(["2019-06-29", "2019-09-28"]),
+            "periodType": ["3M", "3M"],
+            "ROA": [20.0, 21.0],
+            "TotalRevenue": [5.4e10, 6.4e10],
+        },
+        index=pd.Index(["AAPL", "AAPL"], name="symbol"),
+    )
+    merged = panel.merge(financials)
+    assert len(merged) == len(panel) + 1
+    rows = merged.get("AAPL", "quarter", start="2019-06-01")
+    assert list(rows["ROA"]) == [20.0, 21.0]
+    assert rows["CR"].iloc[0] == panel.get("AAPL", "quarter")["CR"].iloc[-1]
+    assert rows["TotalRevenue"].dtype == "float32"
+
+
+@pytest.mark.parametrize("direction", ["backward", "forward"])
+def test_asof_join(direction):
+    dates = pd.date_range("2019-01-01", periods=60)
+    left = pd.DataFrame(
+        {"Ticker": np.repeat(["A", "B", "C"], 60), "Date": np.tile(dates, 3)}
+    )
+    right = pd.DataFrame(
+        {
+            "Ticker": ["B", "A", "A", "B", "D"],
+            "Date": pd.to_datetime(
+                ["2019-01-20", "2019-02-10", "2019-01-05", "2019-02-25", "2019-01-01"]
+            ),
+            "ROA": [1.0, 2.0, 3.0, 4.0, 5.0],
+        }
+    )
+    for exact in [True, False]:
+        kwargs = dict(direction=direction, allow_exact_matches=exact, tolerance="10D")
+        result = asof_join(left, right, fields=["ROA"], **kwargs)
+        expected = pd.merge_asof(
+            left.sort_values("Date"),
+            right.sort_values("Date"),
+            on="Date",
+            by="Ticker",
+            direction=direction,
+            allow_exact_matches=exact,
+            tolerance=pd.Timedelta("10D"),
+        )
+        expected = expected.sort_values(["Ticker", "Date"]).reset_index(drop=True)
+        pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+import requests
+
+from geodataimport._testing import Cassette, ReplayServer
+from geodataimport.utils import metrics
+from geodataimport.wb import WB
+
+
+def test_summary_percentiles():
+    aggregator = metrics.MetricsAggregator()
+    for i in range(1, 101):
+        aggregator(
+            {
+                "type": "request",
+                "endpoint": "yahoo.chart",
+                "status": 200 if i % 10 else 503,
+                "seconds": i / 1000.0,
+                "bytes": 10,
+                "retries": int(i == 1),
+                "cached": i > 95,
+            }
+        )
+    span = {"type": "span", "endpoint": "yahoo.chart", "name": "parse", "seconds": 1}
+    aggregator(span)
+    summary = aggregator.summary()
+    request = summary.loc[("yahoo.chart", "request")]
+    assert request["count"] == 100
+    assert request["p50"] == pytest.approx(0.0505)
+    assert request["p95"] == pytest.approx(0.09505)
+    assert request["bytes"] == 1000
+    assert (request["retries"], request["errors"], request["cache_hits"]) == (1, 10, 5)
+    assert summary.loc[("yahoo.chart", "parse"), "total"] == 1
+
+
+def test_no_listener_no_events():
+    with metrics.span("WB", "read_lines"):
+        pass
+    with metrics.collect() as aggregator:
+        pass
+    with metrics.span("WB", "read_lines"):
+        pass
+    assert aggregator.events == []
+    assert aggregator.summary().empty
+
+
+def test_reader_requests_and_spans(tmp_path, capsys):
+    wb = WB("NY.GDP.MKTP.CD", countries=["US"], start="2018", end="2019")
+    records = [
+        {"country": {"id": "US", "value": "United States"}, "date": y, "value": 1.0}
+        for y in ["2019", "2018"]
+    ]
+    url = requests.Request("GET", wb.url + "NY.GDP.MKTP.CD", params=wb.params)
+    body = json.dumps([{"page": 1, "total": 2}, records]).encode()
+    cassette = Cassette(str(tmp_path / "wb.json"))
+    cassette.add("GET", url.prepare().url, 200, {}, body)
+
+    with ReplayServer(cassette) as server, metrics.collect() as aggregator:
+        server.mount(wb.session)
+        wb.read()
+    request, span = aggregator.events
+    assert request["type"] == "request" and request["endpoint"] == "WB"
+    assert (request["status"], request["bytes"], request["retries"]) == (
+        200,
+        len(body),
+        0,
+    )
+    assert request["seconds"] > 0
+    assert (span["type"], span["name"]) == ("span", "read_lines")
+
+    aggregator.report()
+    assert "read_lines" in capsys.readouterr().out
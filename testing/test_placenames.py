@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from geodataimport.placenames import PlaceNameIndex, normalize_names
+
+CITIES = pd.DataFrame(
+    {
+        "geonameId": [2657896, 3448439, 5128581, 5101798],
+        "name": ["Zürich", "São Paulo", "New York City", "Newark"],
+        "alternatenames": ["Zurigo,Züri,Цюрих", None, "NYC,New York", "New York"],
+    }
+)
+
+
+@pytest.fixture
+def index():
+    return PlaceNameIndex.from_frame(CITIES)
+
+
+def test_normalize_names():
+    assert list(normalize_names(["São Paulo", "SAO-PAULO", " sao  paulo "])) == [
+        "sao paulo"
+    ] * 3
+
+
+def test_exact(index):
+    df = index.exact(["new york", "ZURICH", "Цюрих", "Atlantis"])
+    assert list(df["query"]) == [0, 0, 1, 2]
+    assert list(df["geonameId"]) == [5101798, 5128581, 2657896, 2657896]
+
+
+def test_prefix(index):
+    df = index.prefix("new", limit=1)
+    assert list(df["name"].unique()) == ["new york"]
+    assert set(index.prefix("zur")["name"]) == {"zuri", "zurich", "zurigo"}
+
+
+def test_fuzzy(index):
+    df = index.fuzzy("zurihc")
+    assert df.iloc[0]["name"] == "zurich"
+    assert (df["score"] >= 0.8).all()
+
+
+def test_save_load(index, tmp_path):
+    index.save(str(tmp_path))
+    loaded = PlaceNameIndex.load(str(tmp_path))
+    pd.testing.assert_frame_equal(loaded.exact("nyc"), index.exact("nyc"))
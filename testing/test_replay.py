@@ -0,0 +1,109 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from geodataimport._testing import Cassette, ReplayServer, record
+from geodataimport.yahoo import Ticker
+
+URL = "https://api.worldbank.org/v2/country/br/indicator/NY.GDP.MKTP.CD"
+
+
+@pytest.fixture
+def cassette(tmp_path):
+    cassette = Cassette(str(tmp_path / "cassette.json"))
+    cassette.add("GET", URL + "?format=json&date=2019", 200, {}, b'[{"page": 1}]')
+    cassette.add("GET", URL + "?format=json&date=2019", 200, {}, b'[{"page": 2}]')
+    cassette.add("GET", "https://download.geonames.org/x.zip", 200, {}, b"PK\x03\xff")
+    cassette.save()
+    return cassette
+
+
+def test_cassette_roundtrip(cassette):
+    loaded = Cassette(cassette.path)
+    assert len(loaded) == 3
+    assert loaded.find("GET", URL + "?date=2019&format=json&crumb=x")[2] == (
+        b'[{"page": 1}]'
+    )
+    assert loaded.find("get", URL + "?format=json&date=2019")[2] == b'[{"page": 2}]'
+    assert loaded.find("GET", URL + "?format=json&date=2019")[2] == b'[{"page": 2}]'
+    assert loaded.find("GET", "https://download.geonames.org/x.zip")[2] == (
+        b"PK\x03\xff"
+    )
+    assert loaded.find("GET", URL) is None
+
+
+def test_server_replays_to_session(cassette):
+    session = requests.Session()
+    with ReplayServer(cassette) as server:
+        server.mount(session)
+        response = session.get(URL, params={"format": "json", "date": 2019})
+        assert response.json() == [{"page": 1}]
+        assert response.url.startswith(URL)
+        assert session.get(URL).status_code == 404
+        raw = requests.get(server.url_for("https://download.geonames.org/x.zip"))
+        assert raw.content == b"PK\x03\xff"
+    assert server.stats == {"served": 2, "errors": 0, "missed": 1, "peak": 1}
+
+
+def test_latency_and_errors(cassette):
+    with ReplayServer(cassette, latency=0.1, error_rate=0.5, seed=1) as server:
+        session = server.mount(requests.Session())
+        with ThreadPoolExecutor(8) as pool:
+            codes = list(pool.map(lambda _: session.get(URL).status_code, range(8)))
+    assert set(codes) == {404, 503}
+    # Delayed requests overlap instead of queueing behind each other
+    assert server.stats["peak"] > 1
+    assert server.stats["errors"] == codes.count(503)
+
+
+def test_record(cassette, tmp_path):
+    recorded = Cassette(str(tmp_path / "recorded.json"))
+    session = requests.Session()
+    with ReplayServer(cassette) as server:
+        url = server.url_for(URL + "?format=json&date=2019")
+        with record(session, recorded):
+            session.get(url)
+    with open(recorded.path) as f:
+        assert json.load(f)["interactions"][0]["url"] == url
+    assert Cassette(recorded.path).find("GET", url)[2] == b'[{"page": 1}]'
+
+
+def test_replay_ticker_history(tmp_path):
+    chart = {
+        "chart": {
+            "result": [
+                {
+                    "meta": {"gmtoffset": -18000},
+                    "timestamp": [1704205800, 1704292200],
+                    "indicators": {
+                        "quote": [
+                            {
+                                "open": [187.15, 184.22],
+                                "high": [188.44, 185.88],
+                                "low": [183.89, 183.43],
+                                "close": [185.64, 184.25],
+                                "volume": [82488700, 58414500],
+                            }
+                        ],
+                        "adjclose": [{"adjclose": [184.94, 183.56]}],
+                    },
+                }
+            ],
+            "error": None,
+        }
+    }
+    ticker = Ticker("AAPL", retry=0)
+    params = ticker._construct_params(
+        ticker._CONFIG["chart"], {"range": "5d", "interval": "1d"}
+    )
+    url = requests.Request(
+        "GET", ticker._CONFIG["chart"]["path"].format(symbol="AAPL"), params=params
+    ).prepare().url
+    cassette = Cassette(str(tmp_path / "yahoo.json"))
+    cassette.add("GET", url, 200, {}, json.dumps(chart).encode())
+    with ReplayServer(cassette) as server:
+        server.mount(ticker.session)
+        df = ticker.history(period="5d")
+    assert list(df.loc["AAPL", "close"]) == [185.64, 184.25]
@@ -0,0 +1,228 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from geodataimport.geonames import GeoNames, _parse_geonames_file
+from geodataimport.utils import downloadGeoData
+from geodataimport.utils.config import _CONFIG
+from geodataimport.utils.downloadGeoData import (
+    CoordinateIndex,
+    _coordinate_index_path,
+    load_coordinate_index,
+)
+from geodataimport.utils.storage import (
+    dataset_path,
+    load_arrays,
+    read_dataset,
+    read_partitioned,
+    save_arrays,
+    write_dataset,
+    write_partitioned,
+    write_partitions,
+)
+
+# One raw row per GeoNames layout, keyed by the column names in the configs
+_RAW = {
+    "geonameid": "2657896",
+    "name": "Zürich",
+    "asciiname": "Zurich",
+    "latitude": "47.36667",
+    "longitude": "8.55",
+    "feature class": "P",
+    "feature code": "PPLA",
+    "country code": "CH",
+    "admin1 code": "ZH",
+    "admin2 code": "112",
+    "population": "341730",
+    "dem": "408",
+    "timezone": "Europe/Zurich",
+    "modification date": "2020-01-01",
+    "code": "CH.ZH",
+    "name_ascii": "Zurich",
+    "ISO": "CH",
+    "ISO3": "CHE",
+    "ISO-Numeric": "756",
+    "Country": "Switzerland",
+    "Area(in sq km)": "41290.0",
+    "Population": "8516543",
+    "Continent": "EU",
+    "Languages": "de-CH,fr-CH,it-CH",
+    "neighbours": "DE,IT,LI,FR,AT",
+    "postal code": "8001",
+    "place name": "Zürich",
+    "admin code1": "ZH",
+    "admin code2": "112",
+    "accuracy": "4",
+}
+
+
+def _raw_text(config):
+    names = config["names"]
+    lines = [[_RAW.get(name, "") for name in names]]
+    if config["header"] == 0:
+        lines.insert(0, names)
+    return "".join("\t".join(line) + "\n" for line in lines)
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXPORT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _assert_round_trip(df, outfile):
+    path = write_dataset(df, outfile)
+    assert path == dataset_path(outfile)
+    assert df.columns.is_unique
+    result = read_dataset(outfile)
+    # List columns such as the countries' neighbours come back as arrays
+    for column in result:
+        if isinstance(result[column].iloc[0], np.ndarray):
+            result[column] = result[column].map(list)
+    pd.testing.assert_frame_equal(result, df.reset_index(drop=True))
+
+
+@pytest.mark.parametrize(
+    "location", ["countries", "admin1", "admin2", "cities", "gazetteer", "coordinates"]
+)
+def test_geonames_round_trip(export_dir, location):
+    config = _CONFIG["geonames"][location]
+    df = _parse_geonames_file(io.StringIO(_raw_text(config)), config)
+    df = GeoNames(symbols=location).standardize_geo_data(location, df)
+    _assert_round_trip(df, config["outfile"])
+
+
+@pytest.mark.parametrize("location", list(downloadGeoData._CONFIG["geonames"]))
+def test_download_round_trip(export_dir, location):
+    config = downloadGeoData._CONFIG["geonames"][location]
+    df = downloadGeoData.download_file(
+        "file.txt", config, io.StringIO(_raw_text(config))
+    )
+    df = downloadGeoData.standardize_geo_data(location, df, config)
+    _assert_round_trip(df, config["outfile"])
+
+
+def _wpp_csv(path):
+    rows = [
+        (loc_id, location, var_id, variant, year)
+        for loc_id, location in [(516, "Namibia"), (756, "Switzerland"), (4, "Af")]
+        for var_id, variant in [(2, "Medium"), (3, "High")]
+        for year in [1999, 2000, 2001]
+    ]
+    df = pd.DataFrame(rows, columns=["LocID", "Location", "VarID", "Variant", "Time"])
+    df["MidPeriod"] = df["Time"] + 0.5
+    df["PopMale"] = np.arange(len(df), dtype=float)
+    df["PopFemale"] = df["PopMale"] + 1
+    df["PopTotal"] = df["PopMale"] + df["PopFemale"]
+    df["PopDensity"] = df["PopTotal"] / 10
+    df.to_csv(path, index=False)
+    return df
+
+
+def test_partitioned_round_trip(export_dir, tmp_path):
+    source = _wpp_csv(str(tmp_path / "wpp.csv"))
+    config = dict(
+        downloadGeoData._CONFIG["un"]["population"]["total"],
+        url=str(tmp_path / "wpp.csv"),
+    )
+    chunks = downloadGeoData.read_UNPopulation_chunks(
+        config, locations=["Namibia", 756], years=[2000, 2001], chunksize=4
+    )
+    outfile = config["outfile"]
+    path, rows = write_partitioned(chunks, outfile, partition_cols=["Variant"])
+    assert rows == 8
+    assert sorted(os.listdir(path)) == ["Variant=High", "Variant=Medium"]
+
+    columns = ["LocID", "Time", "PopTotal"]
+    medium = read_partitioned(
+        outfile, columns=columns, filters=[("Variant", "=", "Medium")]
+    )
+    expected = source[
+        source["LocID"].isin([516, 756])
+        & source["Time"].isin([2000, 2001])
+        & (source["Variant"] == "Medium")
+    ]
+    assert list(medium.columns) == columns
+    assert medium["LocID"].dtype == "int16"
+    assert sorted(medium["PopTotal"]) == sorted(expected["PopTotal"])
+
+    later = read_partitioned(outfile, filters=[("Time", ">", 2000)])
+    assert set(later["Time"]) == {2001}
+    assert set(later["Variant"]) == {"Medium", "High"}
+
+    # Replacing the High partition leaves Medium alone
+    high = read_partitioned(outfile, filters=[("Variant", "=", "High")])
+    write_partitions(high.iloc[:1], outfile, partition_cols=["Variant"])
+    counts = read_partitioned(outfile, columns=["Variant"])["Variant"].value_counts()
+    assert counts.to_dict() == {"Medium": 4, "High": 1}
+
+
+def _coordinates():
+    return pd.DataFrame(
+        {
+            "geonameId": [30, 10, 20],
+            "latitude": np.array([3.0, 1.0, 2.0], dtype="float32"),
+            "longitude": np.array([30.0, 10.0, 20.0], dtype="float32"),
+            "population": pd.array([300, None, 200], dtype="Int64"),
+        }
+    )
+
+
+def _assert_attached(index):
+    # 40 is unknown and the last id is missing altogether
+    locations = pd.DataFrame(
+        {"geonameId": pd.array([20, 40, 10, None], dtype="Int32"), "name": list("abcd")}
+    )
+    df = index.attach(locations)
+    assert list(df["name"]) == list("abcd")
+    assert df["latitude"].dtype == "float32"
+    np.testing.assert_array_equal(df["latitude"], [2.0, np.nan, 1.0, np.nan])
+    assert df["population"].dtype == "Int64"
+    assert df["population"].isna().tolist() == [False, True, True, True]
+    assert df["population"][0] == 200
+
+
+def test_coordinate_index_save_load(tmp_path):
+    index = CoordinateIndex.from_frame(_coordinates())
+    assert len(index) == 3
+    _assert_attached(index)
+
+    path = str(tmp_path / "index")
+    index.save(path)
+    loaded = CoordinateIndex.load(path)
+    assert isinstance(loaded.ids, np.memmap)
+    assert loaded.columns["latitude"][1] is None
+    _assert_attached(loaded)
+    assert not [name for name in os.listdir(path) if name.endswith(".partial")]
+
+
+def test_load_coordinate_index(export_dir):
+    outfile = downloadGeoData._CONFIG["geonames"]["coordinates"]["outfile"]
+    write_dataset(_coordinates(), outfile)
+    index = load_coordinate_index()
+    _assert_attached(index)
+    assert load_coordinate_index() is index
+
+    # A newer dataset rebuilds the index
+    meta = os.path.join(_coordinate_index_path(), "meta.json")
+    os.utime(meta, (0, 0))
+    write_dataset(_coordinates().iloc[:1], outfile)
+    rebuilt = load_coordinate_index()
+    assert rebuilt is not index
+    assert list(rebuilt.ids) == [30]
+
+
+def test_save_arrays_keeps_mapped_files(tmp_path):
+    path = str(tmp_path)
+    save_arrays(path, {"x": np.arange(3)}, {"n": 3})
+    arrays, meta = load_arrays(path)
+    save_arrays(path, {"x": np.arange(5)}, {"n": 5})
+    # The old mapping still sees the complete previous save
+    assert list(arrays["x"]) == [0, 1, 2]
+    assert meta == {"n": 3}
+    arrays, meta = load_arrays(path, mmap=False)
+    assert list(arrays["x"]) == list(range(5))
+    assert meta == {"n": 5}
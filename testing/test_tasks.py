@@ -0,0 +1,71 @@
+import os
+
+import pandas as pd
+import pytest
+
+from geodataimport.utils.storage import dataset_path, write_dataset
+from geodataimport.utils.tasks import TaskGraph
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXPORT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _graph(export_dir, calls, fail=()):
+    def step(name):
+        def run():
+            calls.append(name)
+            if name in fail:
+                raise RuntimeError("%s broke" % name)
+            write_dataset(pd.DataFrame({"x": [1]}), name + ".csv")
+
+        return run
+
+    graph = TaskGraph(str(export_dir / "manifest.json"))
+    graph.add("coordinates", step("coordinates"), outputs=["coordinates.csv"])
+    graph.add("cities", step("cities"), ["cities.csv"], deps=["coordinates"])
+    graph.add("regions", step("regions"), outputs=["regions.csv"])
+    return graph
+
+
+def test_run_in_dependency_order(export_dir):
+    calls = []
+    result = _graph(export_dir, calls).run()
+    assert calls.index("coordinates") < calls.index("cities")
+    assert {entry["status"] for entry in result.values()} == {"done"}
+
+
+def test_rerun_skips_current_tasks(export_dir):
+    calls = []
+    _graph(export_dir, calls).run()
+    del calls[:]
+    _graph(export_dir, calls).run()
+    assert calls == []
+
+    os.remove(dataset_path("coordinates.csv"))
+    _graph(export_dir, calls).run()
+    assert sorted(calls) == ["cities", "coordinates"]
+
+
+def test_failure_blocks_dependents_and_resumes(export_dir):
+    calls = []
+    result = _graph(export_dir, calls, fail=["coordinates"]).run()
+    assert result["coordinates"]["status"] == "failed"
+    assert "coordinates broke" in result["coordinates"]["error"]
+    assert result["cities"]["status"] == "blocked"
+    assert result["regions"]["status"] == "done"
+
+    del calls[:]
+    result = _graph(export_dir, calls).run()
+    assert sorted(calls) == ["cities", "coordinates"]
+    assert {entry["status"] for entry in result.values()} == {"done"}
+
+
+def test_cycle_raises(export_dir):
+    graph = TaskGraph(str(export_dir / "manifest.json"))
+    graph.add("a", lambda: None, deps=["b"])
+    graph.add("b", lambda: None, deps=["a"])
+    with pytest.raises(ValueError, match="cycle"):
+        graph.run()
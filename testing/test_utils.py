@@ -0,0 +1,345 @@
+import datetime as dt
+import os
+import re
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from geodataimport.utils import (
+    _fillna_text,
+    _join_codes,
+    adjust_prices,
+    aggregate_bars,
+    search,
+    search_index,
+)
+from geodataimport.utils.matching import fuzzy_matches, prefix_range
+from geodataimport.yahoo import Ticker
+
+TABLE = pd.DataFrame(
+    {
+        "ticker": ["AAPL", "MSFT", "BAC", "C"],
+        "title": ["Apple Inc.", "MICROSOFT CORP", "BANK OF AMERICA CORP", None],
+        "cik": [320193, 789019, 70858, 831001],
+    }
+)
+
+
+def test_search():
+    assert list(search(TABLE, "corp$")["ticker"]) == ["MSFT", "BAC"]
+    assert list(search(TABLE, "^c")["ticker"]) == ["C"]
+    assert list(search(TABLE, r"\bof\b")["ticker"]) == ["BAC"]
+    assert search(TABLE, "msft.*corp").empty
+    assert list(search(TABLE, "apple", columns=["ticker"])["ticker"]) == []
+
+
+def test_search_compiled_pattern():
+    verbose = re.compile(r"^ bank \s of  # the bank", re.VERBOSE | re.I)
+    assert list(search(TABLE, verbose)["ticker"]) == ["BAC"]
+    # Compiled patterns keep their case
+    assert list(search(TABLE, re.compile("Apple"))["ticker"]) == ["AAPL"]
+    assert list(search(TABLE, re.compile("CORP$"))["ticker"]) == ["MSFT", "BAC"]
+    assert search(TABLE, re.compile("corp$")).empty
+    assert list(search(TABLE, re.compile("corp$", re.I))["ticker"]) == ["MSFT", "BAC"]
+
+
+def test_search_within_columns():
+    # ticker "AAPL" is followed by title "Apple Inc." in the same row
+    assert search(TABLE, r"aapl\sapple").empty
+    assert search(TABLE, "aapl[^x]apple").empty
+    assert search(TABLE, re.compile(r"AAPL\s")).empty
+
+
+def test_search_with_index():
+    index = search_index(TABLE)
+    for pattern in ["corp", "^a", "[a-z]{4}"]:
+        expected = search(TABLE, pattern)
+        pd.testing.assert_frame_equal(search(TABLE, pattern, index=index), expected)
+
+
+def _prices():
+    index = pd.MultiIndex.from_product(
+        [["A", "B"], pd.date_range("2020-01-01", periods=4).date],
+        names=["symbol", "date"],
+    )
+    return pd.DataFrame(
+        {
+            "open": [10.0, 20, 20, 20, 5, 5, 5, 5],
+            "close": [10.0, 20, 20, 20, 5, 5, 5, 5],
+            "volume": [100, 100, 100, 100, 10, 10, 10, 10],
+            "dividends": [0, 0, 0, 1.0, 0, 0.5, 0, 0],
+            "splits": [0, 0.5, 0, 0, 0, 0, 0, 0],
+        },
+        index=index,
+    )
+
+
+def test_join_codes():
+    df = pd.DataFrame(
+        {
+            "country": pd.Categorical(["NA", "US", "US", "CH", None, ""]),
+            "admin1": pd.Categorical(["05", "CA", None, "ZH", None, "00"]),
+            "admin2": ["", "075", "001", None, None, ""],
+        }
+    )
+    parents = _join_codes(df, ["country", "admin1", "admin2"])
+    # The last two rows, e.g. the North Atlantic Ocean, have no country
+    assert list(parents) == ["NA.05", "US.CA.075", "US.001", "CH.ZH", "", ""]
+
+
+def test_fillna_text():
+    df = pd.DataFrame(
+        {
+            "name": ["Windhoek", None],
+            "code": pd.Categorical(["NA", None]),
+            "population": pd.array([None, 10], dtype="Int64"),
+        }
+    )
+    result = _fillna_text(df)
+    assert result is df
+    assert list(df["name"]) == ["Windhoek", ""]
+    assert df["code"].isna().tolist() == [False, True]
+    assert df["population"].dtype == "Int64"
+    assert df["population"].isna().tolist() == [True, False]
+
+
+def test_adjust_prices():
+    df = _prices()
+    result = adjust_prices(df)
+    assert "close" in df and df["close"].iloc[0] == 10
+    # 1:2 reverse split on day 2, then a 1.0 dividend on a 20.0 close
+    expected = [19.0, 19.0, 19.0, 20.0, 4.5, 5.0, 5.0, 5.0]
+    np.testing.assert_allclose(result["close"], expected)
+    np.testing.assert_allclose(result["open"], expected)
+    np.testing.assert_allclose(result["volume"], [50, 100, 100, 100] + [10] * 4)
+
+    forward = adjust_prices(df, method="forward")
+    np.testing.assert_allclose(
+        forward["close"], [10, 10, 10, 20 / 1.9, 5, 5 / 0.9, 5 / 0.9, 5 / 0.9]
+    )
+    np.testing.assert_allclose(forward["volume"], [100, 200, 200, 200] + [10] * 4)
+
+    shuffled = df.iloc[[5, 2, 0, 7, 1, 4, 3, 6]]
+    pd.testing.assert_frame_equal(adjust_prices(shuffled).loc[df.index], result)
+
+    dividends_only = adjust_prices(df, splits=False)
+    np.testing.assert_allclose(dividends_only["close"][:4], [9.5, 19, 19, 20])
+    np.testing.assert_allclose(dividends_only["volume"], df["volume"])
+
+
+def test_adjust_prices_adjclose_fallback():
+    df = _prices().drop(columns=["dividends", "splits"])
+    df["adjclose"] = df["close"] / 2
+    result = adjust_prices(df)
+    assert "adjclose" not in result
+    np.testing.assert_allclose(result["open"], df["open"] / 2)
+    with pytest.raises(ValueError):
+        adjust_prices(df, method="sideways")
+
+
+def test_prefix_range():
+    keys = ["bank", "bar", "barn", "berk", "corp"]
+    assert prefix_range(keys, "bar") == (1, 3)
+    assert prefix_range(keys, "b") == (0, 4)
+    assert prefix_range(keys, "x") == (5, 5)
+
+
+def test_fuzzy_matches():
+    keys = ["bank", "bar", "barn", "berk", "corp"]
+    assert [pos for _, pos in fuzzy_matches(keys, "barn", cutoff=0.7)] == [2, 1, 0]
+    assert fuzzy_matches(keys, "barn", limit=1) == [(1.0, 2)]
+    # Only the given candidates are ranked
+    matches = fuzzy_matches(keys, "barn", cutoff=0.7, positions=[0, 3])
+    assert matches == [(0.75, 0)]
+    assert fuzzy_matches(keys, "") == []
+
+
+def test_aggregate_bars():
+    times = pd.date_range("2024-01-02 09:30", periods=390, freq="min")
+    frames = {
+        symbol: pd.DataFrame(
+            {
+                "open": np.arange(390.0) + shift,
+                "high": np.arange(390.0) + shift + 1,
+                "low": np.arange(390.0) + shift - 1,
+                "close": np.arange(390.0) + shift,
+                "volume": np.ones(390, dtype=int),
+            },
+            index=times,
+        )
+        for symbol, shift in [("A", 0), ("B", 1000)]
+    }
+    df = pd.concat(frames, names=["symbol", "date"])
+    bars = aggregate_bars(df.iloc[::-1], "4h")
+    assert list(bars.index.get_level_values("date").strftime("%H:%M")) == [
+        "09:30",
+        "13:30",
+    ] * 2
+    assert list(bars.loc["A", "open"]) == [0, 240]
+    assert list(bars.loc["B", "high"]) == [1240, 1390]
+    assert list(bars.loc["A", "low"]) == [-1, 239]
+    assert list(bars.loc["A", "close"]) == [239, 389]
+    assert list(bars["volume"]) == [240, 150] * 2
+
+    by_day = aggregate_bars(df, "4h", anchor="day")
+    assert list(by_day.loc["A", "volume"]) == [150, 240]
+    weekly = aggregate_bars(df, "W-FRI")
+    friday = pd.Timestamp("2024-01-05")
+    assert list(weekly.index.get_level_values("date")) == [friday] * 2
+
+    # "10m" is ten minutes, as in Yahoo intervals, not ten month ends
+    pd.testing.assert_frame_equal(
+        aggregate_bars(df, "10m"), aggregate_bars(df, "10min")
+    )
+
+
+def test_aggregate_bars_calendar():
+    dates = pd.date_range("2024-01-15", "2024-02-20", freq="D")
+    df = pd.DataFrame(
+        {"close": np.arange(len(dates), dtype=float), "volume": 1},
+        index=pd.MultiIndex.from_product([["A"], dates], names=["symbol", "date"]),
+    )
+    month_ends = aggregate_bars(df, "M")
+    assert list(month_ends.index.get_level_values("date")) == list(
+        pd.to_datetime(["2024-01-31", "2024-02-29"])
+    )
+    month_starts = aggregate_bars(df, "MS")
+    assert list(month_starts.index.get_level_values("date")) == list(
+        pd.to_datetime(["2024-01-01", "2024-02-01"])
+    )
+    assert list(month_starts["volume"]) == [17, 20]
+    quarters = aggregate_bars(df, "QS")
+    assert list(quarters.index.get_level_values("date")) == [
+        pd.Timestamp("2024-01-01")
+    ]
+
+
+def test_aggregate_bars_session_opens():
+    # An illiquid symbol whose first quote of the day comes after the open
+    times = pd.to_datetime(["2024-01-02 09:41", "2024-01-02 10:05"])
+    df = pd.DataFrame(
+        {"open": [1.0, 2.0], "close": [1.0, 2.0], "volume": [1, 1]},
+        index=pd.MultiIndex.from_product([["A"], times], names=["symbol", "date"]),
+    )
+    first_quote = aggregate_bars(df, "30min")
+    assert list(first_quote.index.get_level_values("date").strftime("%H:%M")) == [
+        "09:41"
+    ]
+    opens = {"A": dt.time(9, 30), "B": dt.time(9, 30)}
+    session = aggregate_bars(df, "30min", session_opens=opens)
+    assert list(session.index.get_level_values("date").strftime("%H:%M")) == [
+        "09:30",
+        "10:00",
+    ]
+    assert list(session["open"]) == [1.0, 2.0]
+
+
+def _chart(symbol, timestamps, meta):
+    prices = [1.0, 2.0, 3.0, 4.0][: len(timestamps)]
+    quote = {name: prices for name in ("open", "high", "low", "close")}
+    quote["volume"] = [10, 20, 30, 40][: len(timestamps)]
+    return {
+        symbol: {
+            "meta": meta,
+            "timestamp": timestamps,
+            "indicators": {"quote": [quote]},
+        }
+    }
+
+
+def _mock_chart(monkeypatch, chart):
+    intervals = []
+
+    def get_data(self, key, params=None, **kwargs):
+        intervals.append(params["interval"])
+        return chart
+
+    monkeypatch.setattr(Ticker, "_get_data", get_data)
+    return intervals
+
+
+def _bar_times(bars):
+    return list(bars.index.get_level_values("date").strftime("%m-%d %H:%M"))
+
+
+def test_bars_session_open(monkeypatch):
+    # 5m quotes of an illiquid symbol whose first trade is at 09:40 New York
+    meta = {
+        "gmtoffset": -18000,
+        "currentTradingPeriod": {"regular": {"start": 1704205800}},
+    }
+    chart = _chart("ilq", [1704206400, 1704207000, 1704208500], meta)
+    intervals = _mock_chart(monkeypatch, chart)
+    Ticker("ilq").bars("10m", period="1d")
+    assert intervals == ["5m"]
+
+    # Bars start at the 09:30 open rather than at the first quote
+    bars = Ticker("ilq").bars("40m", period="1d")
+    assert _bar_times(bars) == ["01-02 09:30", "01-02 10:10"]
+    assert list(bars["volume"]) == [30, 30]
+
+    bars = Ticker("ilq").bars("40m", period="1d", adj_timezone=False)
+    assert _bar_times(bars) == ["01-02 14:30", "01-02 15:10"]
+
+
+def test_bars_daylight_saving(monkeypatch):
+    # 09:40 and 10:15 New York on the Friday before and the Monday after the
+    # switch to daylight time, fetched when the gmtoffset is already EDT
+    meta = {
+        "gmtoffset": -14400,
+        "exchangeTimezoneName": "America/New_York",
+        "currentTradingPeriod": {"regular": {"start": 1710163800}},
+    }
+    timestamps = [1709908800, 1709910900, 1710164400, 1710166500]
+    _mock_chart(monkeypatch, _chart("ilq", timestamps, meta))
+    bars = Ticker("ilq").bars("40m", period="5d")
+    assert _bar_times(bars) == [
+        "03-08 09:30",
+        "03-08 10:10",
+        "03-11 09:30",
+        "03-11 10:10",
+    ]
+    bars = Ticker("ilq").bars("40m", period="5d", adj_timezone=False)
+    assert _bar_times(bars) == [
+        "03-08 14:30",
+        "03-08 15:10",
+        "03-11 13:30",
+        "03-11 14:10",
+    ]
+
+
+def test_package_import_is_lazy(tmp_path):
+    import geodataimport
+
+    # import the package by name in a fresh interpreter
+    os.symlink(geodataimport.__path__[0], str(tmp_path / "geodataimport"))
+    code = (
+        "import sys, geodataimport;"
+        "assert 'pandas' not in sys.modules, 'pandas imported eagerly';"
+        "assert geodataimport.Ticker.__name__ == 'Ticker';"
+        "assert 'geodataimport.utils.screeners' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=str(tmp_path), check=True)
+
+
+def test_package_submodules_and_environment(tmp_path):
+    import geodataimport
+
+    os.symlink(geodataimport.__path__[0], str(tmp_path / "geodataimport"))
+    code = (
+        "import os, geodataimport;"
+        "assert geodataimport.geonames.GeoNames.__name__ == 'GeoNames';"
+        "assert geodataimport.yahoo.misc.get_trending.__name__ == 'get_trending';"
+        "assert not hasattr(geodataimport, 'missing');"
+        "assert not hasattr(geodataimport.yahoo, 'missing');"
+        "assert os.environ['EXPORT_DIR'] == 'exports/';"
+        "assert os.environ['WB_URL'] == 'https://api.worldbank.org/v2'"
+    )
+    env = dict(os.environ, EXPORT_DIR="exports/")
+    env.pop("WB_URL", None)
+    subprocess.run(
+        [sys.executable, "-c", code], cwd=str(tmp_path), env=env, check=True
+    )
@@ -133,3 +133,11 @@ def test_history_bad_args(ticker, period, interval):
 
 def test_adj_ohlc(ticker):
     assert ticker.history(period="max", adj_ohlc=True) is not None
+
+
+@pytest.mark.parametrize(
+    "period, interval",
+    [("5d", "10min"), ("5d", "10m"), ("1mo", "4h"), ("1y", "W-FRI")],
+)
+def test_bars(ticker, period, interval):
+    assert ticker.bars(interval, period) is not None
@@ -7,8 +7,10 @@ from io import BytesIO
 from urllib.request import urlopen
 from zipfile import ZipFile
 
+import numpy as np
 import pandas as pd
 from pandas import to_datetime
+from pandas.tseries.frequencies import to_offset
 from requests import Session
 from requests.adapters import HTTPAdapter
 from requests_futures.sessions import FuturesSession
@@ -172,6 +174,33 @@ def _flatten_list(ls):
     return [item for sublist in ls for item in sublist]
 
 
+def _join_codes(df, columns, sep="."):
+    """
+    Join code columns row-wise with ``sep``, skipping empty or missing codes
+
+    Rows without a leading code, such as undersea features that belong to no
+    country, get an empty string
+    """
+
+    def missing(codes):
+        return codes.isna() | (codes.astype(str) == "")
+
+    first = df[columns[0]]
+    out = first.astype(str)
+    for col in columns[1:]:
+        codes = df[col]
+        out = out.where(missing(codes), out + sep + codes.astype(str))
+    return out.mask(missing(first), "")
+
+
+def _fillna_text(df, value=""):
+    """Fill missing values in object columns only, keeping typed columns intact"""
+    for i, dtype in enumerate(df.dtypes):
+        if dtype == object:
+            df.iloc[:, i] = df.iloc[:, i].fillna(value)
+    return df
+
+
 def _convert_to_list(levels, comma_split=False):
     """Convert levels into list format"""
     if isinstance(levels, list):
@@ -202,8 +231,7 @@ def _convert_to_timestamp(date=None, start=True):
     return date
 
 
-def search(table, pattern, columns=None):
-    """Return the rows of the table for which a column matches the pattern"""
+def _search_columns(table, columns=None):
     assert isinstance(table, pd.DataFrame), "'table' must be a Pandas DataFrame"
 
     if columns is None:
@@ -214,17 +242,74 @@ def search(table, pattern, columns=None):
             "Please specific a non-empty columns arguments, and run the search "
             "on a table that has string columns"
         )
+    return list(columns)
 
-    if isinstance(pattern, str):
-        if not pattern.startswith(".*"):
-            pattern = ".*(" + pattern + ")"
-        pattern = re.compile(pattern, re.IGNORECASE)
 
-    found = pd.Series(0, index=table.index)
-    for col in columns:
-        found += table[col].apply(lambda x: 1 if pattern.match(x) else 0)
+def search_index(table, columns=None):
+    """
+    Precompute the text searched by ``search``
 
-    return table.loc[found > 0]
+    Each searched column is converted to text once, both as is for compiled
+    patterns and lowercased for plain string patterns. Build it once per
+    table and pass it to every ``search`` call.
+
+    Parameters
+    ----------
+    table : DataFrame
+    columns : list of str, default None
+        Columns to search; defaults to every object column
+
+    Returns
+    -------
+    DataFrame
+        Aligned with the table index, with a ("text", column) and a
+        ("lower", column) column per searched column
+    """
+    columns = _search_columns(table, columns)
+    text = pd.DataFrame({col: table[col].fillna("").astype(str) for col in columns})
+    lower = pd.DataFrame({col: text[col].str.lower() for col in columns})
+    return pd.concat({"text": text, "lower": lower}, axis=1)
+
+
+def _search_pattern(pattern):
+    """
+    Compile a pattern for ``search`` and pick the ``search_index`` text it
+    runs against
+    """
+    if not isinstance(pattern, str):
+        # Compiled patterns run as given, flags and case included
+        return pattern, "text"
+    if "\\" not in pattern:
+        # Matching lowercase text with a lowercase pattern avoids IGNORECASE,
+        # which is a lot slower. Escapes such as \D change meaning when
+        # lowercased, so patterns with backslashes keep the flag
+        return re.compile(pattern.lower()), "lower"
+    return re.compile(pattern, re.IGNORECASE), "text"
+
+
+def search(table, pattern, columns=None, index=None):
+    """
+    Return the rows of the table for which a column matches the pattern
+
+    Parameters
+    ----------
+    table : DataFrame
+    pattern : str or compiled regex
+        Searched anywhere in each column value, one column at a time so a
+        match never spans two columns. Strings ignore case; compiled
+        patterns run with their own flags
+    columns : list of str, default None
+        Columns to search; defaults to every object column
+    index : DataFrame, default None
+        Precomputed ``search_index(table, columns)``
+    """
+    if index is None:
+        index = search_index(table, columns)
+    regex, text = _search_pattern(pattern)
+    found = np.zeros(len(index), dtype=bool)
+    for _, values in index[text].items():
+        found |= values.str.contains(regex, regex=True).to_numpy(dtype=bool)
+    return table.loc[found]
 
 
 def _raise_country_error(bad_countries, errors):
@@ -327,3 +412,319 @@ def _events_to_dataframe(data, symbol, params, adj_timezone):
         if len(dataframes) > 1
         else dataframes[0]
     )
+
+
+def _event_factors(close, splits, dividends, starts):
+    """
+    Price factor applied to each row by the events on the following row
+
+    A split of ratio r divides earlier prices by r; a dividend D paid on
+    day t scales earlier prices by 1 - D / close[t - 1]. Rows at the end
+    of a symbol have no following row and get a factor of 1.
+    """
+    price = np.ones(len(close))
+    split = np.ones(len(close))
+    if splits is not None:
+        split[:-1] = 1.0 / np.where(splits[1:] > 0, splits[1:], 1.0)
+        price[:-1] = split[:-1]
+    if dividends is not None:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            kept = 1.0 - dividends[1:] / close[:-1]
+        price[:-1] *= np.where((dividends[1:] > 0) & (kept > 0), kept, 1.0)
+    # the row before the start of the next symbol
+    ends = starts[1:] - 1
+    price[ends] = 1.0
+    split[ends] = 1.0
+    price[-1:] = 1.0
+    split[-1:] = 1.0
+    return price, split
+
+
+def _symbol_date_codes(index):
+    """Integer symbol codes and date ranks of a (symbol, date) index"""
+    if not isinstance(index, pd.MultiIndex):
+        return np.zeros(len(index), dtype=np.intp), pd.factorize(index, sort=True)[0]
+    # rank the (few) distinct dates rather than comparing every date object
+    dates = index.levels[1]
+    ranks = np.empty(len(dates), dtype=np.intp)
+    ranks[dates.argsort()] = np.arange(len(dates))
+    return np.asarray(index.codes[0]), ranks[index.codes[1]]
+
+
+def adjust_prices(
+    df, method="backward", splits=True, dividends=True, volume=True, inplace=False
+):
+    """
+    Adjust historical prices for splits and dividends
+
+    Cumulative factors are built from the ``splits`` and ``dividends``
+    event columns of ``Ticker.history`` output with one grouped cumulative
+    product over every symbol, then applied to the price columns in a
+    single pass. Frames without event columns fall back to the ratio of
+    ``adjclose`` to ``close``.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Prices indexed by (symbol, date), with ``open``, ``high``, ``low``,
+        ``close`` and optionally ``volume``, ``adjclose``, ``splits`` (ratio,
+        0 when none) and ``dividends`` (amount per share, 0 when none)
+    method : {"backward", "forward"}, default "backward"
+        "backward" keeps the latest prices and scales earlier ones,
+        "forward" keeps the first price of each symbol and scales later ones
+    splits : bool, default True
+        Apply split factors. Yahoo quotes are already split-adjusted, so
+        ``Ticker.history`` passes False
+    dividends : bool, default True
+        Apply dividend factors
+    volume : bool, default True
+        Scale volume by the inverse of the split factor
+    inplace : bool, default False
+        Adjust ``df`` itself instead of a copy
+
+    Returns
+    -------
+    DataFrame
+        Adjusted prices, with ``adjclose`` dropped
+    """
+    if method not in ("backward", "forward"):
+        raise ValueError("method must be one of backward, forward")
+    if not inplace:
+        df = df.copy()
+    price_cols = [c for c in ["open", "high", "low", "close"] if c in df.columns]
+    has_splits = splits and "splits" in df.columns
+    has_dividends = dividends and "dividends" in df.columns
+
+    if df.empty or not (has_splits or has_dividends):
+        if "adjclose" in df.columns:
+            adjust = (df["adjclose"] / df["close"]).to_numpy()
+            for col in price_cols:
+                df[col] = df[col].to_numpy() * adjust
+        df.drop(columns="adjclose", errors="ignore", inplace=True)
+        return df
+
+    codes, dates = _symbol_date_codes(df.index)
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    order = None
+    if len(starts) != np.count_nonzero(np.bincount(codes)) or np.any(
+        np.diff(dates)[np.diff(codes) == 0] <= 0
+    ):
+        order = np.lexsort((dates, codes))
+        codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+
+    def column(name):
+        values = df[name].to_numpy(dtype=float, na_value=0)
+        return values if order is None else values[order]
+
+    price, split = _event_factors(
+        column("close"),
+        column("splits") if has_splits else None,
+        column("dividends") if has_dividends else None,
+        starts,
+    )
+    # product of the factors of every later row of the same symbol
+    groups = pd.Series(codes[::-1])
+    price = pd.Series(price[::-1]).groupby(groups).cumprod().to_numpy()[::-1]
+    split = pd.Series(split[::-1]).groupby(groups).cumprod().to_numpy()[::-1]
+    if method == "forward":
+        lengths = np.diff(np.r_[starts, len(codes)])
+        price = price / np.repeat(price[starts], lengths)
+        split = split / np.repeat(split[starts], lengths)
+    if order is not None:
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order))
+        price, split = price[inverse], split[inverse]
+
+    for col in price_cols:
+        df[col] = df[col].to_numpy() * price
+    if volume and has_splits and "volume" in df.columns:
+        df["volume"] = df["volume"].to_numpy() / split
+    df.drop(columns="adjclose", errors="ignore", inplace=True)
+    return df
+
+
+_DAY = 86400 * 10 ** 9
+
+
+# Calendar offsets whose periods are labeled by their first day
+_BEGIN_OFFSETS = (
+    pd.offsets.MonthBegin,
+    pd.offsets.BusinessMonthBegin,
+    pd.offsets.SemiMonthBegin,
+    pd.offsets.QuarterBegin,
+    pd.offsets.BQuarterBegin,
+    pd.offsets.YearBegin,
+    pd.offsets.BYearBegin,
+)
+
+
+def _bar_offset(interval):
+    """DateOffset of a bar interval, reading Yahoo's "<n>m" as minutes"""
+    if isinstance(interval, str):
+        # to_offset("10m") would be 10 month ends
+        match = re.match(r"(\d+)m$", interval)
+        if match:
+            interval = match.group(1) + "min"
+    return to_offset(interval)
+
+
+def _exchange_time(index, timezones, to_utc=False):
+    """
+    Convert the GMT dates of a (symbol, date) index to each symbol's exchange
+    time, or back to GMT with ``to_utc``
+
+    ``timezones`` maps symbols to a timezone name, following daylight saving
+    time date by date, or to a fixed GMT offset in seconds. Local times that
+    are repeated or skipped by a clock change are read as daylight time.
+    """
+    dates = pd.DatetimeIndex(index.get_level_values(1))
+    values = dates.values.copy()
+    zone_codes, zones = pd.factorize(
+        pd.Series([timezones.get(symbol, 0) for symbol in index.levels[0]])
+    )
+    rows = zone_codes[index.codes[0]]
+    for i, zone in enumerate(zones):
+        part = dates[rows == i]
+        if not isinstance(zone, str):
+            part = part + pd.Timedelta(-zone if to_utc else zone, "s")
+        elif to_utc:
+            dst = np.ones(len(part), dtype=bool)
+            part = part.tz_localize(zone, ambiguous=dst, nonexistent="shift_forward")
+            part = part.tz_convert("UTC").tz_localize(None)
+        else:
+            part = part.tz_localize("UTC").tz_convert(zone).tz_localize(None)
+        values[rows == i] = part.values
+    return pd.MultiIndex.from_arrays(
+        [index.get_level_values(0), values], names=index.names
+    )
+
+
+def _bar_buckets(index, offset, anchor, session_opens=None):
+    """
+    Symbol codes and bar labels (int64 nanoseconds) of each row of a
+    (symbol, date) index, with rows ordered by symbol then date
+
+    ``session_opens`` holds the session open of each symbol level as
+    nanoseconds after midnight, or -1 where it is unknown.
+    """
+    levels = pd.to_datetime(index.levels[1])
+    codes = np.asarray(index.codes[0])
+    if isinstance(offset, pd.offsets.Tick):
+        times = levels.values.view("i8")[index.codes[1]]
+    else:
+        if offset.n != 1:
+            raise ValueError("Calendar intervals must have a multiple of 1")
+        # label every distinct day with the end of its period, e.g. Friday,
+        # or the start for offsets such as MS and QS
+        if isinstance(offset, _BEGIN_OFFSETS):
+            roll = offset.rollback
+        else:
+            roll = offset.rollforward
+        days = levels.normalize()
+        unique = days.unique()
+        labels = pd.DatetimeIndex([roll(day) for day in unique])
+        labels = labels[unique.get_indexer(days)].values.view("i8")
+        times = labels[index.codes[1]]
+    order = None
+    if np.any(np.diff(codes) < 0) or np.any(np.diff(times)[np.diff(codes) == 0] < 0):
+        order = np.lexsort((times, codes))
+        codes, times = codes[order], times[order]
+    if not isinstance(offset, pd.offsets.Tick):
+        return codes, times, order
+
+    step = offset.nanos
+    if anchor == "session" and step < _DAY:
+        # bars start at the session open, or at the first quote of each
+        # symbol and day when the open is unknown
+        days = times // _DAY * _DAY
+        new = np.r_[True, (codes[1:] != codes[:-1]) | (days[1:] != days[:-1])]
+        opens = times[new][np.cumsum(new) - 1]
+        if session_opens is not None:
+            known = session_opens[codes]
+            opens = np.where(known >= 0, days + known, opens)
+    elif step < _DAY:
+        opens = times // _DAY * _DAY
+    else:
+        opens = np.zeros_like(times)
+    return codes, opens + (times - opens) // step * step, order
+
+
+def aggregate_bars(df, interval, anchor="session", session_opens=None):
+    """
+    Aggregate (symbol, date) price history into OHLCV bars of any interval
+
+    Every symbol is aggregated in one pass: rows are assigned a bar label,
+    bar boundaries are found where the symbol or label changes and each
+    column is reduced with ``numpy.ufunc.reduceat``.
+
+    Parameters
+    ----------
+    df : DataFrame
+        ``Ticker.history`` output indexed by (symbol, date) and sorted or not
+    interval : str or DateOffset
+        Intraday or daily multiples such as "10min", "10m", "4h" or "2D"
+        label bars by their start; calendar intervals such as "W-FRI", "M" or
+        "Q" label bars by the end of the period, and "MS", "QS" or "AS" by
+        its first day
+    anchor : {"session", "day"}, default "session"
+        Start intraday bars at each symbol's session open or at midnight
+    session_opens : dict, default None
+        Session open of each symbol as a time of day in the time of the
+        index, e.g. ``{"AAPL": datetime.time(9, 30)}``. Symbols without one
+        are anchored on their first quote of each day
+
+    Returns
+    -------
+    DataFrame
+        Bars indexed by (symbol, date), with ``open`` and ``high``, ``low``,
+        ``close``, ``volume``, ``adjclose``, ``dividends`` and ``splits``
+        when present
+    """
+    offset = _bar_offset(interval)
+    if anchor not in ("session", "day"):
+        raise ValueError("anchor must be one of session, day")
+    if df.empty:
+        return df.copy()
+    index = df.index
+    opens = None
+    if session_opens:
+        opens = np.full(len(index.levels[0]), -1, dtype="int64")
+        for i, symbol in enumerate(index.levels[0]):
+            if session_opens.get(symbol) is not None:
+                value = pd.Timestamp(str(session_opens[symbol]))
+                opens[i] = (value - value.normalize()).value
+    codes, buckets, order = _bar_buckets(index, offset, anchor, opens)
+    starts = np.flatnonzero(
+        np.r_[True, (codes[1:] != codes[:-1]) | (buckets[1:] != buckets[:-1])]
+    )
+    ends = np.r_[starts[1:], len(codes)] - 1
+
+    def column(name):
+        values = df[name].to_numpy()
+        return values if order is None else values[order]
+
+    bars = {}
+    for name in df.columns:
+        if name == "open":
+            bars[name] = column(name)[starts]
+        elif name in ("close", "adjclose"):
+            bars[name] = column(name)[ends]
+        elif name == "high":
+            bars[name] = np.maximum.reduceat(column(name), starts)
+        elif name == "low":
+            bars[name] = np.minimum.reduceat(column(name), starts)
+        elif name in ("volume", "dividends"):
+            bars[name] = np.add.reduceat(column(name), starts)
+        elif name == "splits":
+            ratios = column(name).astype(float)
+            ratios = np.multiply.reduceat(np.where(ratios > 0, ratios, 1.0), starts)
+            bars[name] = np.where(ratios != 1, ratios, 0.0)
+
+    dates = pd.DatetimeIndex(buckets[starts].view("datetime64[ns]"))
+    if index.levels[1].dtype == object:
+        dates = dates.date
+    result_index = pd.MultiIndex.from_arrays(
+        [index.levels[0].take(codes[starts]), dates], names=index.names
+    )
+    return pd.DataFrame(bars, index=result_index)
@@ -18,6 +18,42 @@ _freq = list(TIME_ARGS.keys())
 _per_page = 25000
 _format = "json"
 
+# read_csv dtypes for the 19-column GeoNames gazetteer layout (cities*, allCountries)
+_GAZETTEER_DTYPE = {
+    "geonameid": "int32",
+    "latitude": "float32",
+    "longitude": "float32",
+    "feature class": "category",
+    "feature code": "category",
+    "country code": "category",
+    "cc2": "category",
+    "admin1 code": "category",
+    "admin2 code": "category",
+    "admin3 code": "category",
+    "admin4 code": "category",
+    "population": "Int64",
+    "elevation": "Int32",
+    "dem": "Int32",
+    "timezone": "category",
+}
+
+_ADMIN_DTYPE = {"geonameid": "Int32"}
+
+# Columns shared by the UN World Population Prospects CSV files. Population
+# figures are in thousands
+_WPP_DTYPE = {
+    "LocID": "int16",
+    "Location": "category",
+    "VarID": "int8",
+    "Variant": "category",
+    "Time": "int16",
+    "MidPeriod": "float32",
+    "PopMale": "float64",
+    "PopFemale": "float64",
+    "PopTotal": "float64",
+    "PopDensity": "float64",
+}
+
 _CONFIG = {
     "wb": {
         "path": "https://api.worldbank.org/v2/{module}",
@@ -66,7 +102,13 @@ _CONFIG = {
                 "neighbours",
                 "EquivalentFipsCode",
             ],
-            "low_memory": True,
+            "dtype": {
+                "ISO-Numeric": "Int16",
+                "Area(in sq km)": "float64",
+                "Population": "Int64",
+                "Continent": "category",
+                "geonameid": "Int32",
+            },
             "keep_cols": [
                 "id",
                 "name",
@@ -96,12 +138,14 @@ _CONFIG = {
             "outfile": "GeoNames-Countries.csv",
         },
         "cities": {
-            "filenames": [
-                "cities15000.zip",
-                "cities5000.zip",
-                "cities1000.zip",
-                "cities500.zip",
-            ],
+            # Smaller tiers are subsets of cities500, see population_tiers
+            "filenames": ["cities500.zip"],
+            "population_tiers": {
+                15000: "cities15000.zip",
+                5000: "cities5000.zip",
+                1000: "cities1000.zip",
+                500: "cities500.zip",
+            },
             "names": [
                 "geonameid",
                 "name",
@@ -124,9 +168,13 @@ _CONFIG = {
                 "modification date",
             ],
             "comment": None,
-            "low_memory": False,
+            "dtype": _GAZETTEER_DTYPE,
             "keep_cols": ["id", "name", "parentId", "geonameId"],
-            "rename_cols": {"geonameid": "geonameId", "asciiname": "name"},
+            "rename_cols": {
+                "geonameid": "geonameId",
+                "name": "utf8Name",
+                "asciiname": "name",
+            },
             "header": None,
             "outfile": "GeoNames-Cities.csv",
         },
@@ -134,10 +182,11 @@ _CONFIG = {
             "filenames": ["admin1CodesASCII.txt"],
             "names": ["code", "name", "name_ascii", "geonameid"],
             "comment": None,
-            "low_memory": True,
+            "dtype": _ADMIN_DTYPE,
             "keep_cols": ["id", "name", "code", "parentId", "geonameId"],
             "rename_cols": {
                 "code": "id",
+                "name": "utf8Name",
                 "name_ascii": "name",
                 "geonameid": "geonameId",
             },
@@ -148,10 +197,11 @@ _CONFIG = {
             "filenames": ["admin2Codes.txt"],
             "names": ["code", "name", "name_ascii", "geonameid"],
             "comment": None,
-            "low_memory": True,
+            "dtype": _ADMIN_DTYPE,
             "keep_cols": ["id", "name", "parentId", "geonameId"],
             "rename_cols": {
                 "code": "id",
+                "name": "utf8Name",
                 "name_ascii": "name",
                 "geonameid": "geonameId",
             },
@@ -182,12 +232,62 @@ _CONFIG = {
                 "modification date",
             ],
             "comment": None,
-            "low_memory": False,
+            "dtype": _GAZETTEER_DTYPE,
             "keep_cols": ["geonameId", "latitude", "longitude", "population"],
-            "rename_cols": {"geonameid": "geonameId", "asciiname": "name"},
+            "rename_cols": {
+                "geonameid": "geonameId",
+                "name": "utf8Name",
+                "asciiname": "name",
+            },
             "header": None,
             "outfile": "GeoNames-Coordinates.csv",
         },
+        "gazetteer": {
+            "filenames": ["allCountries.zip"],
+            "names": [
+                "geonameid",
+                "name",
+                "asciiname",
+                "alternatenames",
+                "latitude",
+                "longitude",
+                "feature class",
+                "feature code",
+                "country code",
+                "cc2",
+                "admin1 code",
+                "admin2 code",
+                "admin3 code",
+                "admin4 code",
+                "population",
+                "elevation",
+                "dem",
+                "timezone",
+                "modification date",
+            ],
+            "comment": None,
+            "dtype": _GAZETTEER_DTYPE,
+            "keep_cols": [
+                "id",
+                "name",
+                "parentId",
+                "geonameId",
+                "latitude",
+                "longitude",
+                "feature class",
+                "feature code",
+                "country code",
+                "population",
+                "timezone",
+            ],
+            "rename_cols": {
+                "geonameid": "geonameId",
+                "name": "utf8Name",
+                "asciiname": "name",
+            },
+            "header": None,
+            "outfile": "GeoNames-Gazetteer.csv",
+        },
         # "postalcodes": {
         #     "filenames": ["allCountries.zip"],
         #     "names": [
@@ -267,10 +367,19 @@ temp = {
         "population": {
             "total": {
                 "url": "https://population.un.org/wpp/Download/Files/1_Indicators%20(Standard)/CSV_FILES/WPP2019_TotalPopulationBySex.csv",
+                "dtype": _WPP_DTYPE,
+                "partition_cols": ["Variant"],
                 "outfile": "UN-TotalPopulation.csv",
             },
             "age": {
                 "url": "https://population.un.org/wpp/Download/Files/1_Indicators%20(Standard)/CSV_FILES/WPP2019_PopulationBySingleAgeSex_1950-2019.csv",
+                "dtype": dict(
+                    _WPP_DTYPE,
+                    AgeGrp="category",
+                    AgeGrpStart="int16",
+                    AgeGrpSpan="int16",
+                ),
+                "partition_cols": ["Variant"],
                 "outfile": "UN-PopulationByAge.csv",
             },
         },
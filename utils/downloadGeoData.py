@@ -1,19 +1,45 @@
 import os
+import threading
 import time
+from functools import partial
 from io import BytesIO
+from urllib.request import urlopen
 
+import numpy as np
 import pandas as pd
 
 from geodataimport.compat import StringIO
+from geodataimport.hierarchy import LocationHierarchy
 from geodataimport.utils import (
-    check_file_exists,
-    dataframe_to_csv,
-    load_dataframe,
+    _fillna_text,
+    _join_codes,
     unzip_url_file,
 )
+from geodataimport.utils.config import _ADMIN_DTYPE, _GAZETTEER_DTYPE, _WPP_DTYPE
+from geodataimport.utils.storage import (
+    dataset_exists,
+    dataset_path,
+    load_arrays,
+    read_dataset,
+    save_arrays,
+    write_dataset,
+    write_partitioned,
+)
+from geodataimport.utils.tasks import TaskGraph
+
+GEONAMES_DUMP = "https://download.geonames.org/export/dump/"
+GEONAMES_ZIP = "https://download.geonames.org/export/zip/"
+
+
+def _dump_url():
+    """GeoNames dump URL, read when a download starts rather than on import"""
+    return os.environ.get("GEONAMES_DUMP", GEONAMES_DUMP)
+
+
+def _zip_url():
+    return os.environ.get("GEONAMES_ZIP", GEONAMES_ZIP)
+
 
-DUMP_URL = os.environ["GEONAMES_DUMP"]
-ZIP_URL = os.environ["GEONAMES_ZIP"]
 # EXPORT_DIR = "geodataimport/data/"
 
 _CONFIG = {
@@ -42,7 +68,13 @@ _CONFIG = {
                 "neighbours",
                 "EquivalentFipsCode",
             ],
-            "low_memory": True,
+            "dtype": {
+                "ISO-Numeric": "Int16",
+                "Area(in sq km)": "float64",
+                "Population": "Int64",
+                "Continent": "category",
+                "geonameid": "Int32",
+            },
             "keep_cols": [
                 "id",
                 "name",
@@ -65,12 +97,8 @@ _CONFIG = {
             "outfile": "GeoNames-Countries.csv",
         },
         "cities": {
-            "filenames": [
-                "cities15000.zip",
-                "cities5000.zip",
-                "cities1000.zip",
-                "cities500.zip",
-            ],
+            # Smaller tiers (cities15000, cities5000, cities1000) are subsets
+            "filenames": ["cities500.zip"],
             "names": [
                 "geonameid",
                 "name",
@@ -93,9 +121,13 @@ _CONFIG = {
                 "modification date",
             ],
             "comment": None,
-            "low_memory": False,
+            "dtype": _GAZETTEER_DTYPE,
             "keep_cols": ["id", "name", "parentId", "geonameId"],
-            "rename_cols": {"geonameid": "geonameId", "asciiname": "name"},
+            "rename_cols": {
+                "geonameid": "geonameId",
+                "name": "utf8Name",
+                "asciiname": "name",
+            },
             "header": None,
             "outfile": "GeoNames-Cities.csv",
         },
@@ -103,10 +135,11 @@ _CONFIG = {
             "filenames": ["admin1CodesASCII.txt"],
             "names": ["code", "name", "name_ascii", "geonameid"],
             "comment": None,
-            "low_memory": True,
+            "dtype": _ADMIN_DTYPE,
             "keep_cols": ["id", "name", "code", "parentId", "geonameId"],
             "rename_cols": {
                 "code": "id",
+                "name": "utf8Name",
                 "name_ascii": "name",
                 "geonameid": "geonameId",
             },
@@ -117,10 +150,11 @@ _CONFIG = {
             "filenames": ["admin2Codes.txt"],
             "names": ["code", "name", "name_ascii", "geonameid"],
             "comment": None,
-            "low_memory": True,
+            "dtype": _ADMIN_DTYPE,
             "keep_cols": ["id", "name", "parentId", "geonameId"],
             "rename_cols": {
                 "code": "id",
+                "name": "utf8Name",
                 "name_ascii": "name",
                 "geonameid": "geonameId",
             },
@@ -151,9 +185,13 @@ _CONFIG = {
                 "modification date",
             ],
             "comment": None,
-            "low_memory": False,
+            "dtype": _GAZETTEER_DTYPE,
             "keep_cols": ["geonameId", "latitude", "longitude", "population"],
-            "rename_cols": {"geonameid": "geonameId", "asciiname": "name"},
+            "rename_cols": {
+                "geonameid": "geonameId",
+                "name": "utf8Name",
+                "asciiname": "name",
+            },
             "header": None,
             "outfile": "GeoNames-Coordinates.csv",
         },
@@ -182,7 +220,16 @@ _CONFIG = {
                 "longitude",
             ],
             "comment": None,
-            "low_memory": False,
+            "dtype": {
+                "country code": "object",
+                "postal code": "object",
+                "admin code1": "object",
+                "admin code2": "object",
+                "admin code3": "object",
+                "latitude": "float32",
+                "longitude": "float32",
+                "accuracy": "Int8",
+            },
             "outfile": "GeoNames-PostalCodes.csv",
             "header": 0,
         },
@@ -232,10 +279,19 @@ _CONFIG = {
         "population": {
             "total": {
                 "url": "https://population.un.org/wpp/Download/Files/1_Indicators%20(Standard)/CSV_FILES/WPP2019_TotalPopulationBySex.csv",
+                "dtype": _WPP_DTYPE,
+                "partition_cols": ["Variant"],
                 "outfile": "UN-TotalPopulation.csv",
             },
             "age": {
                 "url": "https://population.un.org/wpp/Download/Files/1_Indicators%20(Standard)/CSV_FILES/WPP2019_PopulationBySingleAgeSex_1950-2019.csv",
+                "dtype": dict(
+                    _WPP_DTYPE,
+                    AgeGrp="category",
+                    AgeGrpStart="int16",
+                    AgeGrpSpan="int16",
+                ),
+                "partition_cols": ["Variant"],
                 "outfile": "UN-PopulationByAge.csv",
             },
         },
@@ -243,60 +299,45 @@ _CONFIG = {
 }
 
 
-def get_city_location_id(country, admin1, admin2):
-    location = str(country)
-    if admin1 != "":
-        location = location + "." + str(admin1)
-    if admin2 != "":
-        location = location + "." + str(admin2)
-    return location
-
-
 def standardize_geo_data(location, df, config):
 
     df.rename(columns=config["rename_cols"], inplace=True)
 
     if location == "admin1":
-        df["code"] = df["id"].str.split(".", expand=True)[1]
-        df["parentId"] = df["id"].str.split(".", expand=True)[0]
+        codes = df["id"].str.split(".", expand=True)
+        df["code"] = codes[1]
+        df["parentId"] = codes[0]
         # Change to DC to be consistent with US Census
         print(df.head())
         df["name"] = df["name"].replace("Washington, D.C.", "District of Columbia")
 
     elif location == "admin2":
-        df["parentId"] = df["id"].str.rsplit(".", 1, expand=True)[0]
+        df["parentId"] = df["id"].str.rsplit(".", n=1, expand=True)[0]
         # Change to DC and SanFran to be consistent with US Census
         df.loc[df["id"] == "US.DC.001", ["name"]] = "District of Columbia"
         df.loc[df["id"] == "US.CA.075", ["name"]] = "San Francisco"
 
     elif location == "country":
-        index = df.query("iso3 == 'NAM'").index  # Add missing ISO code for Nambia
-        df.at[index, "iso"] = "NA"
         df["id"] = df["iso"]
 
     elif location == "cities":
         df.drop_duplicates("geonameId", inplace=True)
         df["id"] = df["geonameId"]  # Add ID Column
-        df["parentId"] = df.apply(
-            lambda row: get_city_location_id(
-                row["country code"], row["admin1 code"], row["admin2 code"]
-            ),
-            axis=1,
-        )
+        df["parentId"] = _join_codes(df, ["country code", "admin1 code", "admin2 code"])
 
     elif location == "coordinates":
         df.loc[df["feature class"].isin(["A", "P"])]
-        df["population"] = df["population"].str.replace("0", "")
+        # A population of 0 means unknown in the dump
+        df["population"] = df["population"].mask(df["population"] == 0)
 
     elif location == "postalcodes":
         df.dropna(subset=["admin code2"], inplace=True)
-        df.fillna("", inplace=True)
+        _fillna_text(df)
         df["admin2_id"] = (
             df["country code"] + "." + df["admin code1"] + "." + df["admin code2"]
         )
     df = df.loc[:, config["keep_cols"]]
-    df.fillna("", inplace=True)
-    return df
+    return _fillna_text(df)
 
 
 def download_file(filename, config, url):
@@ -310,10 +351,13 @@ def download_file(filename, config, url):
 
     df = pd.read_csv(
         file,
+        sep="\t",
         comment=config["comment"],
         names=config["names"],
-        low_memory=config["low_memory"],
+        dtype=config["dtype"],
         header=config["header"],
+        keep_default_na=False,
+        na_values=[""],
     )
     return df
 
@@ -324,11 +368,12 @@ def get_location_data(location):
     config = _CONFIG["geonames"][location]
 
     if location == "postalcodes":
-        df = download_file(config["filenames"], config, ZIP_URL + config["filenames"])
+        url = _zip_url() + config["filenames"]
+        df = download_file(config["filenames"], config, url)
     else:
         df = pd.concat(
             [
-                download_file(file, config, DUMP_URL + file)
+                download_file(file, config, _dump_url() + file)
                 for file in config["filenames"]
             ]
         )
@@ -338,41 +383,178 @@ def get_location_data(location):
     return df
 
 
-def merge_coordinate_data(location_df, coordinate_df):
-    """ Merges Coordinate & Population Data (Latitude, Longtitude, Population) to Location Dataframes """
-    df = pd.merge(location_df, coordinate_df, on="geonameId", how="left")
-    df.fillna("", inplace=True)
-    return df
+class CoordinateIndex(object):
+    """
+    geonameId-keyed coordinate and population lookup
+
+    Ids are kept sorted so a location frame picks up its coordinates with
+    one ``searchsorted`` and a gather per column, without copying the
+    coordinate table into a merge. The arrays are saved as .npy files and
+    memory-mapped back, so each location reuses the index built when the
+    coordinates were exported.
+
+    Parameters
+    ----------
+    ids : numpy.ndarray
+        Sorted geonameIds
+    columns : dict
+        Column name to ``(values, mask)``; mask marks missing values and is
+        None for columns without gaps
+    dtypes : dict
+        Column name to pandas dtype name
+    """
+
+    def __init__(self, ids, columns, dtypes):
+        self.ids = ids
+        self.columns = columns
+        self.dtypes = dtypes
+
+    @classmethod
+    def from_frame(cls, df, on="geonameId"):
+        """Build the index from a frame of numeric columns keyed by ``on``"""
+        ids = df[on].to_numpy(dtype="int64")
+        order = np.argsort(ids, kind="stable")
+        columns, dtypes = {}, {}
+        for col in df.columns.drop(on):
+            values, mask = df[col].array, None
+            if pd.api.types.is_extension_array_dtype(df[col].dtype):
+                # Nullable integers: store the data and the missing mask apart
+                mask = np.asarray(values.isna())[order]
+                values = values.to_numpy(dtype=values.dtype.numpy_dtype, na_value=0)
+            columns[col] = (np.asarray(values)[order], mask)
+            dtypes[col] = str(df[col].dtype)
+        return cls(ids[order], columns, dtypes)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def attach(self, df, on="geonameId"):
+        """
+        Add the indexed columns to a location frame
+
+        Parameters
+        ----------
+        df : DataFrame
+            Frame with an ``on`` column; ids without coordinates get
+            missing values
+
+        Returns
+        -------
+        DataFrame
+        """
+        keys = df[on].to_numpy(dtype="int64", na_value=-1)
+        # Sorted needles walk the ids in order instead of jumping around them
+        order = np.argsort(keys, kind="stable")
+        pos = np.empty(len(keys), dtype="int64")
+        pos[order] = np.searchsorted(self.ids, keys[order])
+        np.minimum(pos, max(len(self.ids) - 1, 0), out=pos)
+        found = self.ids[pos] == keys if len(self.ids) else np.zeros(len(keys), bool)
+        out = df.copy()
+        for col, (values, mask) in self.columns.items():
+            gathered = values[pos]
+            missing = ~found if mask is None else ~found | mask[pos]
+            dtype = pd.api.types.pandas_dtype(self.dtypes[col])
+            if isinstance(dtype, pd.api.extensions.ExtensionDtype):
+                gathered = pd.array(gathered, dtype=dtype)
+                gathered[missing] = pd.NA
+            elif missing.any():
+                gathered = np.where(missing, np.nan, gathered)
+            out[col] = gathered
+        return out
+
+    def save(self, path):
+        """Write the index arrays as .npy files into a directory"""
+        arrays = {"ids": self.ids}
+        for i, (values, mask) in enumerate(self.columns.values()):
+            arrays["values%d" % i] = values
+            if mask is not None:
+                arrays["mask%d" % i] = mask
+        meta = {"columns": list(self.columns), "dtypes": self.dtypes}
+        save_arrays(path, arrays, meta)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load an index written by ``save``"""
+        arrays, meta = load_arrays(path, mmap=mmap)
+        columns = {
+            col: (arrays["values%d" % i], arrays.get("mask%d" % i))
+            for i, col in enumerate(meta["columns"])
+        }
+        return cls(arrays["ids"], columns, meta["dtypes"])
+
+
+_coordinate_lock = threading.Lock()
+_coordinate_cache = {}
+
+
+def _coordinate_index_path():
+    return dataset_path(_CONFIG["geonames"]["coordinates"]["outfile"], ext=".index")
+
+
+def load_coordinate_index():
+    """
+    Coordinate index of the exported coordinates dataset
+
+    The index saved next to the dataset is memory-mapped and shared between
+    calls. It is rebuilt from the dataset when missing or older than it.
+    """
+    outfile = _CONFIG["geonames"]["coordinates"]["outfile"]
+    path = _coordinate_index_path()
+    meta = os.path.join(path, "meta.json")
+    with _coordinate_lock:
+        data_mtime = os.path.getmtime(dataset_path(outfile))
+        if not os.path.exists(meta) or os.path.getmtime(meta) < data_mtime:
+            CoordinateIndex.from_frame(read_dataset(outfile)).save(path)
+            _coordinate_cache.clear()
+        key = (path, os.path.getmtime(meta))
+        if key not in _coordinate_cache:
+            _coordinate_cache.clear()
+            _coordinate_cache[key] = CoordinateIndex.load(path)
+        return _coordinate_cache[key]
+
+
+def merge_coordinate_data(location_df, coordinate_index):
+    """ Attaches Coordinate & Population Data (Latitude, Longtitude, Population) to Location Dataframes """
+    if isinstance(coordinate_index, pd.DataFrame):
+        coordinate_index = CoordinateIndex.from_frame(coordinate_index)
+    return coordinate_index.attach(location_df)
+
+
+def download_continents():
+    CONFIG = _CONFIG["continents"]
+    continents = pd.DataFrame.from_dict(CONFIG["data"])
+    write_dataset(continents, CONFIG["outfile"])
+
+
+def download_location(location):
+    """
+    Download a GeoNames location file, merge in coordinate data from the
+    exported coordinates dataset and export it
+    """
+    GEO_CONFIG = _CONFIG["geonames"]
+    location_df = get_location_data(location)
+    if location not in ("coordinates", "postalcodes"):
+        location_df = merge_coordinate_data(location_df, load_coordinate_index())
+    write_dataset(location_df, GEO_CONFIG[location]["outfile"])
+    if location == "coordinates":
+        CoordinateIndex.from_frame(location_df).save(_coordinate_index_path())
 
 
 def download_geoname_files():
     GEO_CONFIG = _CONFIG["geonames"]
 
     # Save Continent Data
-    if not check_file_exists(_CONFIG["continents"]["outfile"]):
-        continents = pd.DataFrame.from_dict(_CONFIG["continents"]["data"])
-        dataframe_to_csv(continents, _CONFIG["continents"]["outfile"])
-
-    locations = []
+    if not dataset_exists(_CONFIG["continents"]["outfile"]):
+        download_continents()
 
-    for location in list(GEO_CONFIG.keys()):
-        if not check_file_exists(GEO_CONFIG[location]["outfile"]):
-            locations.append(location)
+    # Coordinates are merged into the other locations, so export them first
+    locations = ["coordinates"] + [loc for loc in GEO_CONFIG if loc != "coordinates"]
+    for location in locations:
+        if not dataset_exists(GEO_CONFIG[location]["outfile"]):
+            download_location(location)
         else:
             print("{} File Already Downloaded, Skipping...".format(location.upper()))
 
-    # Skip coordinates if all files are downloaded
-    if locations:
-        coordinate_df = get_location_data("coordinates")
-        dataframe_to_csv(coordinate_df, GEO_CONFIG["coordinates"]["outfile"])
-
-    # Download and Merge Location Files and Coordinate Data then export to CSV
-    for location in locations:
-        location_df = get_location_data(location)
-        if location != "postalcodes":
-            location_df = merge_coordinate_data(location_df, coordinate_df)
-        dataframe_to_csv(location_df, GEO_CONFIG[location]["outfile"])
-
 
 def download_htmlTable(config):
     df = pd.read_html(config["url"], attrs=config["attrs"])[0]
@@ -387,45 +569,228 @@ def download_htmlTable(config):
     return df
 
 
-def export_regions_files(df, config):
-    if not check_file_exists(config["intermediate_outfile"]):
+def export_regions_files(df, config, overwrite=False):
+    exported = False
+    if overwrite or not dataset_exists(config["intermediate_outfile"]):
         intermediateRegion = df[df["UNIntermediateRegion"] != ""]
-        dataframe_to_csv(intermediateRegion, config["intermediate_outfile"])
+        write_dataset(intermediateRegion, config["intermediate_outfile"])
+        exported = True
 
-    elif not check_file_exists(config["subregion_outfile"]):
+    if overwrite or not dataset_exists(config["subregion_outfile"]):
         subRegion = df[(df["UNSubRegion"] != "") & (df["UNIntermediateRegion"] == "")]
-        dataframe_to_csv(subRegion, config["subregion_outfile"])
+        write_dataset(subRegion, config["subregion_outfile"])
+        exported = True
 
-    elif not check_file_exists(config["region_outfile"]):
+    if overwrite or not dataset_exists(config["region_outfile"]):
         region = df[(df["UNSubRegion"] == "") & (df["UNIntermediateRegion"] == "")]
-        dataframe_to_csv(region, config["region_outfile"])
+        write_dataset(region, config["region_outfile"])
+        exported = True
 
-    else:
+    if not exported:
         print("UN Region Files Already Downloaded, Skipping... ")
 
 
-def download_UNRegions_files():
+def download_UNRegions_files(overwrite=False):
     CONFIG = _CONFIG["un"]["regions"]
-    if not check_file_exists(CONFIG["outfile"]):
+    if overwrite or not dataset_exists(CONFIG["outfile"]):
         df = download_htmlTable(CONFIG)
-        dataframe_to_csv(df, CONFIG["outfile"])
-        export_regions_files(df, CONFIG)
+        write_dataset(df, CONFIG["outfile"])
     else:
-        print("UN Regions file already downloaded, skipping... ")
+        df = read_dataset(CONFIG["outfile"])
+    export_regions_files(df, CONFIG, overwrite=overwrite)
+
+
+def _open_source(url):
+    """Open a local path or stream a URL without reading it into memory"""
+    if os.path.exists(url):
+        return open(url, "rb")
+    return urlopen(url)
+
+
+def read_UNPopulation_chunks(
+    config, locations=None, years=None, variants=None, chunksize=250000
+):
+    """
+    Stream a UN World Population Prospects CSV in filtered chunks
+
+    Parameters
+    ----------
+    config : dict
+        Entry of _CONFIG["un"]["population"]
+    locations : list, default None
+        Location names or LocIDs to keep
+    years : list of int, default None
+        Years (``Time``) to keep, e.g. ``range(2000, 2020)``
+    variants : list of str, default None
+        Projection variants to keep, e.g. ``["Medium"]``
+    chunksize : int, default 250000
+        Rows parsed at a time
+    """
+    if locations is not None:
+        locations = list(locations)
+        loc_ids = [loc for loc in locations if isinstance(loc, int)]
+        loc_names = [loc for loc in locations if not isinstance(loc, int)]
+    years = None if years is None else list(years)
+    variants = None if variants is None else list(variants)
+
+    with _open_source(config["url"]) as source:
+        reader = pd.read_csv(
+            source, dtype=config["dtype"], header=0, chunksize=chunksize
+        )
+        for chunk in reader:
+            keep = pd.Series(True, index=chunk.index)
+            if locations is not None:
+                keep &= chunk["LocID"].isin(loc_ids) | chunk["Location"].isin(
+                    loc_names
+                )
+            if years is not None:
+                keep &= chunk["Time"].isin(years)
+            if variants is not None:
+                keep &= chunk["Variant"].isin(variants)
+            if not keep.all():
+                chunk = chunk[keep]
+            yield chunk
+
+
+def download_UNPopulation_file(
+    key, locations=None, years=None, variants=None, chunksize=250000
+):
+    """
+    Stream one UN population file into a Parquet dataset partitioned by
+    variant. Filters are passed to ``read_UNPopulation_chunks``
+    """
+    config = _CONFIG["un"]["population"][key]
+    chunks = read_UNPopulation_chunks(
+        config,
+        locations=locations,
+        years=years,
+        variants=variants,
+        chunksize=chunksize,
+    )
+    _, rows = write_partitioned(
+        chunks, config["outfile"], partition_cols=config["partition_cols"]
+    )
+    print(f"Wrote {rows} rows to {config['outfile']}")
 
 
-def download_UNPopulation_files():
+def download_UNPopulation_files(
+    locations=None, years=None, variants=None, chunksize=250000
+):
     CONFIG = _CONFIG["un"]["population"]
     for key in CONFIG:
         outfile = CONFIG[key]["outfile"]
-        if not check_file_exists(outfile):
-            df = load_dataframe(CONFIG[key]["url"], low_memory=False, header=0)
-            dataframe_to_csv(df, CONFIG[key]["outfile"])
+        if not dataset_exists(outfile):
+            download_UNPopulation_file(
+                key,
+                locations=locations,
+                years=years,
+                variants=variants,
+                chunksize=chunksize,
+            )
         else:
             print(f"File {outfile} Already Downloaded, Skipping... ")
 
 
-def download_files():
-    download_geoname_files()
-    download_UNRegions_files()
-    download_UNPopulation_files()
+def load_location_data(location):
+    """
+    Load an exported GeoNames location dataset
+
+    Parameters
+    ----------
+    location : str
+        Key of _CONFIG["geonames"], e.g. "cities"
+    """
+    return read_dataset(_CONFIG["geonames"][location]["outfile"])
+
+
+HIERARCHY_OUTFILE = "GeoNames-Hierarchy.csv"
+# Exported locations making up the levels of the hierarchy, top down
+_HIERARCHY_LOCATIONS = ("country", "admin1", "admin2", "cities")
+
+
+def download_hierarchy():
+    """
+    Build the country -> admin1 -> admin2 -> city hierarchy from the exported
+    GeoNames locations and save it next to them
+    """
+    frames = [load_location_data(location) for location in _HIERARCHY_LOCATIONS]
+    hierarchy = LocationHierarchy.from_frames(*frames)
+    hierarchy.save(dataset_path(HIERARCHY_OUTFILE, ext=""))
+
+
+def load_location_hierarchy(mmap=True):
+    """Load the hierarchy saved by ``download_hierarchy``, memory-mapped"""
+    return LocationHierarchy.load(dataset_path(HIERARCHY_OUTFILE, ext=""), mmap=mmap)
+
+
+def build_download_graph(max_workers=4):
+    """
+    Task graph of every download step. Coordinates feed the other GeoNames
+    locations; everything else is independent and runs concurrently
+    """
+    GEO_CONFIG = _CONFIG["geonames"]
+    UN_CONFIG = _CONFIG["un"]
+    graph = TaskGraph(dataset_path("manifest.json", ext=".json"), max_workers)
+
+    graph.add(
+        "continents", download_continents, outputs=[_CONFIG["continents"]["outfile"]]
+    )
+    for location in GEO_CONFIG:
+        graph.add(
+            location,
+            partial(download_location, location),
+            outputs=[GEO_CONFIG[location]["outfile"]],
+            deps=[] if location in ("coordinates", "postalcodes") else ["coordinates"],
+        )
+    graph.add(
+        "hierarchy",
+        download_hierarchy,
+        outputs=[HIERARCHY_OUTFILE],
+        deps=list(_HIERARCHY_LOCATIONS),
+    )
+
+    regions = UN_CONFIG["regions"]
+    graph.add(
+        "un_regions",
+        partial(download_UNRegions_files, overwrite=True),
+        outputs=[
+            regions["outfile"],
+            regions["intermediate_outfile"],
+            regions["subregion_outfile"],
+            regions["region_outfile"],
+        ],
+    )
+    for key, config in UN_CONFIG["population"].items():
+        graph.add(
+            "un_population_" + key,
+            partial(download_UNPopulation_file, key),
+            outputs=[config["outfile"]],
+        )
+    return graph
+
+
+def download_files(max_workers=4, force=False):
+    """
+    Download and export every GeoNames and UN dataset
+
+    Steps run concurrently where they do not depend on each other. Progress
+    is recorded in manifest.json in the export directory, so a re-run only
+    repeats steps that failed, lost their output or depend on a step that
+    ran again.
+
+    Parameters
+    ----------
+    max_workers : int, default 4
+        Number of steps run at the same time
+    force : bool, default False
+        Rebuild every dataset
+
+    Returns
+    -------
+    dict
+        Manifest entry of each step
+    """
+    start = time.time()
+    result = build_download_graph(max_workers=max_workers).run(force=force)
+    print("Took {} minutes".format((time.time() - start) / 60))
+    return result
@@ -0,0 +1,60 @@
+import difflib
+from bisect import bisect_left
+
+
+def prefix_range(keys, prefix):
+    """
+    Positions ``start, stop`` of the sorted keys starting with a prefix
+
+    Parameters
+    ----------
+    keys : sequence of str
+        Sorted keys supporting ``len`` and indexing
+    prefix : str
+    """
+    start = bisect_left(keys, prefix)
+    stop = bisect_left(keys, prefix + "\U0010ffff", lo=start)
+    return start, stop
+
+
+def fuzzy_matches(keys, key, limit=5, cutoff=0.8, positions=None):
+    """
+    Sorted keys close to a key, best first
+
+    Candidates share the first letter of the key and are ranked with
+    ``difflib.SequenceMatcher``, checking its cheap upper bounds first.
+
+    Parameters
+    ----------
+    keys : sequence of str
+        Sorted keys supporting ``len`` and indexing
+    key : str
+        Normalized like the keys
+    limit : int, default 5
+        Maximum number of matches
+    cutoff : float, default 0.8
+        Minimum similarity ratio in [0, 1]
+    positions : iterable of int, default None
+        Candidate positions, e.g. the first-letter range narrowed further by
+        length. Defaults to every key sharing the first letter
+
+    Returns
+    -------
+    list of (score, position)
+    """
+    if not key:
+        return []
+    if positions is None:
+        positions = range(*prefix_range(keys, key[0]))
+    matcher = difflib.SequenceMatcher(b=key)
+    matches = []
+    for pos in positions:
+        matcher.set_seq1(keys[pos])
+        if (
+            matcher.real_quick_ratio() >= cutoff
+            and matcher.quick_ratio() >= cutoff
+            and matcher.ratio() >= cutoff
+        ):
+            matches.append((matcher.ratio(), pos))
+    matches.sort(key=lambda m: -m[0])
+    return matches[:limit]
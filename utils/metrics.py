@@ -0,0 +1,187 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+_listeners = []
+_lock = threading.Lock()
+
+
+def add_listener(listener):
+    """
+    Register a callable receiving every instrumentation event
+
+    Events are dicts with a ``type`` of "request" or "span":
+
+    * request: ``endpoint``, ``url``, ``status``, ``seconds`` (time to the
+      response headers, from ``response.elapsed``), ``bytes``, ``retries``
+      and ``cached``
+    * span: ``endpoint``, ``name`` and ``seconds`` of a parsing phase
+
+    Listeners are called on the thread that made the request, so they must
+    be thread safe when readers run asynchronously.
+    """
+    with _lock:
+        _listeners.append(listener)
+    return listener
+
+
+def remove_listener(listener):
+    with _lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def _emit(event):
+    for listener in list(_listeners):
+        listener(event)
+
+
+def _retries(response):
+    """Retries urllib3 made before returning a response"""
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+    return len(retries.history) if retries is not None else 0
+
+
+def record_request(response, endpoint, attempt=0, stream=False):
+    """
+    Emit a request event for a requests.Response
+
+    Parameters
+    ----------
+    response : requests.Response
+    endpoint : str
+        Name requests are grouped under, e.g. "yahoo.chart" or "WB"
+    attempt : int, default 0
+        Retries made by the reader itself before this response
+    stream : bool, default False
+        The body has not been read; its size is taken from Content-Length
+    """
+    if not _listeners:
+        return
+    if stream:
+        size = int(response.headers.get("Content-Length") or 0)
+    else:
+        size = len(response.content or b"")
+    _emit(
+        {
+            "type": "request",
+            "endpoint": endpoint,
+            "url": response.url,
+            "status": response.status_code,
+            "seconds": response.elapsed.total_seconds(),
+            "bytes": size,
+            "retries": attempt + _retries(response),
+            "cached": bool(getattr(response, "from_cache", False)),
+        }
+    )
+
+
+@contextmanager
+def span(endpoint, name):
+    """
+    Time a block of code, emitting a span event when it finishes
+
+    Examples
+    --------
+    >>> with span("yahoo.chart", "dataframe"):
+    ...     df = self._historical_data_to_dataframe(data, params, adj_timezone)
+    """
+    if not _listeners:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _emit(
+            {
+                "type": "span",
+                "endpoint": endpoint,
+                "name": name,
+                "seconds": time.perf_counter() - start,
+            }
+        )
+
+
+class MetricsAggregator(object):
+    """
+    In-process listener keeping every event for latency summaries
+
+    Examples
+    --------
+    >>> with collect() as metrics:
+    ...     Ticker(["aapl", "msft"]).history(period="1y")
+    >>> metrics.report()
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.events = []
+
+    def __call__(self, event):
+        with self._lock:
+            self.events.append(event)
+
+    def clear(self):
+        with self._lock:
+            self.events = []
+
+    def summary(self, percentiles=(50, 95)):
+        """
+        Latency percentiles and totals per endpoint and phase
+
+        Returns
+        -------
+        DataFrame
+            Indexed by (endpoint, phase), phase being "request" or the span
+            name, with ``count``, ``p50``/``p95``/``max`` seconds, ``total``
+            seconds and, for requests, ``bytes``, ``retries``, ``errors``
+            (status >= 400) and ``cache_hits``
+        """
+        with self._lock:
+            events = list(self.events)
+        columns = ["count"] + ["p%d" % p for p in percentiles] + ["max", "total"]
+        columns += ["bytes", "retries", "errors", "cache_hits"]
+        if not events:
+            return pd.DataFrame(columns=columns)
+        df = pd.DataFrame(events)
+        df["phase"] = df["name"] if "name" in df else np.nan
+        df["phase"] = df["phase"].fillna("request")
+        for column in ["bytes", "retries", "status", "cached"]:
+            if column not in df:
+                df[column] = np.nan
+        df["errors"] = df["status"] >= 400
+        df["cached"] = df["cached"].fillna(False).astype(bool)
+        grouped = df.groupby(["endpoint", "phase"], sort=True)
+        seconds = grouped["seconds"]
+        result = pd.DataFrame({"count": seconds.size()})
+        for p in percentiles:
+            result["p%d" % p] = seconds.quantile(p / 100.0)
+        result["max"] = seconds.max()
+        result["total"] = seconds.sum()
+        result["bytes"] = grouped["bytes"].sum(min_count=1)
+        result["retries"] = grouped["retries"].sum(min_count=1)
+        result["errors"] = grouped["errors"].sum()
+        result["cache_hits"] = grouped["cached"].sum()
+        return result[columns]
+
+    def report(self, percentiles=(50, 95)):
+        """Print the summary, with latencies in milliseconds"""
+        summary = self.summary(percentiles)
+        latency = ["p%d" % p for p in percentiles] + ["max", "total"]
+        summary[latency] = summary[latency].astype(float) * 1000
+        summary = summary.rename(columns={c: c + " (ms)" for c in latency})
+        print(summary.to_string(float_format="{:.1f}".format))
+
+
+@contextmanager
+def collect():
+    """Aggregate every event emitted inside the block"""
+    aggregator = add_listener(MetricsAggregator())
+    try:
+        yield aggregator
+    finally:
+        remove_listener(aggregator)
@@ -0,0 +1,283 @@
+import json
+import os
+import shutil
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import feather
+
+_FORMAT_EXT = ".feather"
+
+
+def _export_dir():
+    return os.environ.get("EXPORT_DIR", "geodataimport/data/")
+
+
+def _export_csv():
+    return os.environ.get("EXPORT_CSV", "").lower() in ("1", "true", "yes")
+
+
+def dataset_path(outfile, ext=_FORMAT_EXT):
+    """
+    Path of a dataset in the export directory
+
+    Parameters
+    ----------
+    outfile : str
+        Configured output name, e.g. "GeoNames-Cities.csv"
+    ext : str, default ".feather"
+        Extension replacing the one in outfile
+    """
+    return os.path.join(_export_dir(), os.path.splitext(outfile)[0] + ext)
+
+
+def dataset_exists(outfile):
+    """Check whether a dataset has already been written to the export directory"""
+    return os.path.isfile(dataset_path(outfile)) or os.path.isdir(
+        dataset_path(outfile, ext="")
+    )
+
+
+@contextmanager
+def _atomic(path):
+    """
+    Yield a staging path that replaces ``path`` once the block exits
+    without error, so readers never see a half-written file
+    """
+    partial = path + ".partial"
+    try:
+        yield partial
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    os.replace(partial, path)
+
+
+def save_arrays(path, arrays, meta=None):
+    """
+    Write named arrays as .npy files plus a meta.json into a directory
+
+    Every file is staged and swapped in with ``_atomic``, so a reader that
+    memory-mapped a previous save keeps its old, complete files. meta.json
+    is written last and lists the arrays, which marks the save as complete.
+
+    Parameters
+    ----------
+    path : str
+        Directory, created when missing
+    arrays : dict
+        File name (without ".npy") to array
+    meta : dict, default None
+        JSON-serializable metadata returned by ``load_arrays``
+    """
+    os.makedirs(path, exist_ok=True)
+    for name, values in arrays.items():
+        with _atomic(os.path.join(path, name + ".npy")) as partial:
+            with open(partial, "wb") as f:
+                np.save(f, values)
+    with _atomic(os.path.join(path, "meta.json")) as partial:
+        with open(partial, "w") as f:
+            json.dump(dict(meta or {}, arrays=list(arrays)), f)
+
+
+def load_arrays(path, mmap=True):
+    """
+    Load a directory written by ``save_arrays``
+
+    Parameters
+    ----------
+    path : str
+        Directory
+    mmap : bool, default True
+        Memory-map the arrays instead of reading them into memory
+
+    Returns
+    -------
+    arrays : dict
+        File name to array, in the order they were saved
+    meta : dict
+    """
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    mode = "r" if mmap else None
+    arrays = {
+        name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mode)
+        for name in meta.pop("arrays")
+    }
+    return arrays, meta
+
+
+def _arrow_safe(df):
+    """
+    Cast object columns holding mixed scalar types to strings for Arrow,
+    leaving list columns such as the countries' neighbours as Arrow lists
+    """
+    for i, dtype in enumerate(df.dtypes):
+        if dtype != object:
+            continue
+        col = df.iloc[:, i]
+        if not pd.api.types.infer_dtype(col, skipna=True).startswith("mixed"):
+            continue
+        values = col.dropna()
+        if len(values) and values.map(lambda value: isinstance(value, list)).all():
+            continue
+        df.iloc[:, i] = col.where(col.isna(), col.astype(str))
+    return df
+
+
+def write_dataset(df, outfile, csv=None):
+    """
+    Write a DataFrame to the export directory as an uncompressed Feather
+    (Arrow IPC) file, which keeps dtypes and can be memory-mapped on load
+
+    Parameters
+    ----------
+    df : DataFrame
+    outfile : str
+        Configured output name; the extension is replaced with ".feather"
+    csv : bool, default None
+        Also write ``outfile`` as CSV. Defaults to the EXPORT_CSV environment
+        variable
+
+    Returns
+    -------
+    path : str
+        Path of the Feather file
+    """
+    path = dataset_path(outfile)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    table = pa.Table.from_pandas(_arrow_safe(df.copy()), preserve_index=False)
+    with _atomic(path) as partial:
+        feather.write_feather(table, partial, compression="uncompressed")
+    if csv is None:
+        csv = _export_csv()
+    if csv:
+        with _atomic(dataset_path(outfile, ext=".csv")) as partial:
+            df.to_csv(partial, index=False)
+    return path
+
+
+def read_dataset(outfile, columns=None, memory_map=True):
+    """
+    Load a dataset written by ``write_dataset``
+
+    Parameters
+    ----------
+    outfile : str
+        Configured output name, e.g. "GeoNames-Cities.csv"
+    columns : list of str, default None
+        Subset of columns to load
+    memory_map : bool, default True
+        Memory-map the file so numeric columns are not copied on read
+
+    Returns
+    -------
+    DataFrame
+    """
+    table = feather.read_table(
+        dataset_path(outfile), columns=columns, memory_map=memory_map
+    )
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def write_partitioned(chunks, outfile, partition_cols=None):
+    """
+    Stream DataFrame chunks into a Parquet dataset in the export directory
+
+    Each chunk is written as soon as it arrives, so memory use is bounded by
+    the chunk size rather than the size of the dataset. Files are written to
+    a staging directory that replaces the dataset once every chunk is in.
+
+    Parameters
+    ----------
+    chunks : iterable of DataFrame
+    outfile : str
+        Configured output name; the extension is dropped to name the dataset
+        directory
+    partition_cols : list of str, default None
+        Columns used to split the dataset into hive-style subdirectories,
+        e.g. ``Variant=Medium/``
+
+    Returns
+    -------
+    path : str
+        Path of the dataset directory
+    rows : int
+        Number of rows written
+    """
+    path = dataset_path(outfile, ext="")
+    staging = path + ".partial"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    rows = 0
+    try:
+        for i, chunk in enumerate(chunks):
+            if chunk.empty:
+                continue
+            table = pa.Table.from_pandas(_arrow_safe(chunk), preserve_index=False)
+            pq.write_to_dataset(
+                table,
+                staging,
+                partition_cols=partition_cols,
+                basename_template="part-%05d-{i}.parquet" % i,
+            )
+            rows += len(chunk)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(staging, path)
+    return path, rows
+
+
+def read_partitioned(outfile, columns=None, filters=None):
+    """
+    Load a dataset written by ``write_partitioned``
+
+    Parameters
+    ----------
+    outfile : str
+        Configured output name, e.g. "UN-PopulationByAge.csv"
+    columns : list of str, default None
+        Subset of columns to load
+    filters : list of tuple, default None
+        Row filters in pyarrow form, e.g. ``[("Variant", "=", "Medium")]``.
+        Filters on partition columns skip whole files
+
+    Returns
+    -------
+    DataFrame
+    """
+    table = pq.read_table(
+        dataset_path(outfile, ext=""), columns=columns, filters=filters
+    )
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def write_partitions(df, outfile, partition_cols):
+    """
+    Replace the partitions of a Parquet dataset that appear in a DataFrame
+
+    Partitions not present in ``df`` are left alone, which lets a dataset be
+    updated one partition at a time.
+
+    Parameters
+    ----------
+    df : DataFrame
+    outfile : str
+        Configured output name of a dataset written by ``write_partitioned``
+    partition_cols : list of str
+    """
+    path = dataset_path(outfile, ext="")
+    table = pa.Table.from_pandas(_arrow_safe(df.copy()), preserve_index=False)
+    pq.write_to_dataset(
+        table,
+        path,
+        partition_cols=partition_cols,
+        existing_data_behavior="delete_matching",
+    )
+    return path
@@ -0,0 +1,188 @@
+import json
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from geodataimport.utils.storage import _atomic, dataset_exists
+
+
+class Task(object):
+    """
+    A step of a task graph
+
+    Parameters
+    ----------
+    name : str
+        Unique task name, used as the manifest key
+    func : callable
+        Called without arguments to run the task
+    outputs : list of str, default None
+        Configured output names the task writes. A finished task whose
+        outputs are missing is run again
+    deps : list of str, default None
+        Names of tasks that must finish first
+    """
+
+    def __init__(self, name, func, outputs=None, deps=None):
+        self.name = name
+        self.func = func
+        self.outputs = list(outputs or [])
+        self.deps = list(deps or [])
+
+    def __repr__(self):
+        return "Task(%r)" % self.name
+
+
+class TaskGraph(object):
+    """
+    Run tasks concurrently in dependency order and record the outcome of
+    each one in a JSON manifest
+
+    On a re-run only tasks that failed, never ran, lost an output or depend
+    on a task that ran again are executed; everything else is skipped.
+    Tasks downstream of a failure are not started.
+
+    Parameters
+    ----------
+    manifest : str
+        Path of the JSON manifest
+    max_workers : int, default 4
+        Number of tasks run at the same time
+
+    Examples
+    --------
+    >>> graph = TaskGraph("data/manifest.json")
+    >>> graph.add("coordinates", download_coordinates, outputs=["Coords.csv"])
+    >>> graph.add("cities", download_cities, deps=["coordinates"])
+    >>> graph.run()
+    """
+
+    def __init__(self, manifest, max_workers=4):
+        self.manifest = manifest
+        self.max_workers = max_workers
+        self.tasks = {}
+
+    def add(self, name, func, outputs=None, deps=None):
+        if name in self.tasks:
+            raise ValueError("Task %s is already in the graph" % name)
+        self.tasks[name] = Task(name, func, outputs=outputs, deps=deps)
+        return self.tasks[name]
+
+    def _check(self):
+        for task in self.tasks.values():
+            missing = [dep for dep in task.deps if dep not in self.tasks]
+            if missing:
+                raise ValueError(
+                    "Task %s depends on unknown task(s): %s"
+                    % (task.name, ", ".join(missing))
+                )
+        # Kahn's algorithm: anything left with dependencies is in a cycle
+        pending = {name: set(task.deps) for name, task in self.tasks.items()}
+        while pending:
+            ready = [name for name, deps in pending.items() if not deps]
+            if not ready:
+                raise ValueError("Task graph has a cycle: %s" % ", ".join(pending))
+            for name in ready:
+                del pending[name]
+            for deps in pending.values():
+                deps.difference_update(ready)
+
+    def load_manifest(self):
+        if not os.path.isfile(self.manifest):
+            return {}
+        with open(self.manifest) as f:
+            return json.load(f)
+
+    def _save_manifest(self, state):
+        os.makedirs(os.path.dirname(self.manifest) or ".", exist_ok=True)
+        with _atomic(self.manifest) as partial, open(partial, "w") as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+
+    def _is_current(self, task, state, rerun):
+        """Whether a task finished and nothing it relies on has changed"""
+        entry = state.get(task.name)
+        if not entry or entry.get("status") != "done":
+            return False
+        if not all(dataset_exists(output) for output in task.outputs):
+            return False
+        for dep in task.deps:
+            if dep in rerun:
+                return False
+            if state.get(dep, {}).get("finished", 0) > entry["finished"]:
+                return False
+        return True
+
+    def run(self, force=False):
+        """
+        Run every task that is not current
+
+        Parameters
+        ----------
+        force : bool, default False
+            Ignore the manifest and run every task
+
+        Returns
+        -------
+        dict
+            Manifest entry of each task, with ``status`` one of "done",
+            "failed" or "blocked"
+        """
+        self._check()
+        state = {} if force else self.load_manifest()
+        remaining = dict(self.tasks)
+        rerun, failed = set(), set()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while remaining or running:
+                for name, task in list(remaining.items()):
+                    unfinished = set(remaining).union(
+                        t.name for t in running.values()
+                    )
+                    if any(dep in failed for dep in task.deps):
+                        state[name] = {"status": "blocked", "finished": time.time()}
+                        failed.add(name)
+                        del remaining[name]
+                    elif not unfinished.intersection(task.deps):
+                        del remaining[name]
+                        if self._is_current(task, state, rerun):
+                            print("{} is up to date, skipping...".format(name))
+                            continue
+                        print("Running {}...".format(name))
+                        running[pool.submit(_timed, task.func)] = task
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    elapsed, error = future.result()
+                    entry = {
+                        "status": "done" if error is None else "failed",
+                        "finished": time.time(),
+                        "seconds": round(elapsed, 3),
+                        "outputs": task.outputs,
+                    }
+                    if error is None:
+                        rerun.add(task.name)
+                    else:
+                        entry["error"] = error
+                        failed.add(task.name)
+                        message = error.splitlines()[-1]
+                        print("{} failed: {}".format(task.name, message))
+                    state[task.name] = entry
+                    self._save_manifest(state)
+
+        self._save_manifest(state)
+        return {name: state[name] for name in self.tasks if name in state}
+
+
+def _timed(func):
+    """Run func, returning its duration and a formatted traceback on failure"""
+    start = time.time()
+    try:
+        func()
+    except Exception:
+        return time.time() - start, traceback.format_exc()
+    return time.time() - start, None
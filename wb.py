@@ -7,7 +7,6 @@ from geodataimport.base import _GeoData
 from geodataimport.compat import lrange, reduce, string_types
 from geodataimport.utils import _raise_country_error, collapse
 from geodataimport.utils.config import _CONFIG
-from geodataimport.utils.countries import country_codes
 
 WB_API_URL = "https://api.worldbank.org/v2"
 _cached_series = None
@@ -50,6 +49,8 @@ class WB(_GeoData):
         elif isinstance(countries, string_types):
             countries = [countries]
 
+        from geodataimport.utils.countries import country_codes
+
         bad_countries = np.setdiff1d(countries, country_codes)
         _raise_country_error(bad_countries, errors)
 
@@ -1,8 +1,14 @@
-from .ticker import Ticker  # noqa
-from .screener import Screener  # noqa
-from .misc import (  # noqa
-    get_currencies,
-    get_exchanges,
-    get_market_summary,
-    get_trending,
-)
+from geodataimport._lazy import lazy_attributes
+
+_LAZY = {
+    "Ticker": ".ticker",
+    "Screener": ".screener",
+    "get_currencies": ".misc",
+    "get_exchanges": ".misc",
+    "get_market_summary": ".misc",
+    "get_trending": ".misc",
+}
+
+__all__ = sorted(_LAZY)
+
+__getattr__, __dir__ = lazy_attributes(globals(), _LAZY)
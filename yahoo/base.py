@@ -6,7 +6,7 @@ from datetime import datetime
 from requests_futures.sessions import FuturesSession
 
 from geodataimport.utils import _convert_to_list, _init_session
-from geodataimport.utils.countries import COUNTRIES
+from geodataimport.utils.metrics import record_request, span
 
 
 from urllib import parse
@@ -744,6 +744,8 @@ class _YahooFinance(object):
 
     @country.setter
     def country(self, country):
+        from geodataimport.utils.countries import COUNTRIES
+
         if country.lower() not in COUNTRIES:
             raise ValueError(
                 "{} is not a valid country.  Valid countries include {}".format(
@@ -842,11 +844,16 @@ class _YahooFinance(object):
         params = self._construct_params(config, params)
         urls = self._construct_urls(config, params, **kwargs)
         response_field = config["response_field"]
+        endpoint = "yahoo." + key
         try:
             if isinstance(self.session, FuturesSession):
-                data = self._async_requests(response_field, urls, params, **kwargs)
+                data = self._async_requests(
+                    response_field, urls, params, endpoint, **kwargs
+                )
             else:
-                data = self._sync_requests(response_field, urls, params, **kwargs)
+                data = self._sync_requests(
+                    response_field, urls, params, endpoint, **kwargs
+                )
             return data
         except ValueError:
             return {"error": "HTTP 404 Not Found.  Please try again"}
@@ -904,24 +911,28 @@ class _YahooFinance(object):
             ]
         return urls
 
-    def _async_requests(self, response_field, urls, params, **kwargs):
+    def _async_requests(self, response_field, urls, params, endpoint=None, **kwargs):
         data = {}
         for future in as_completed(urls):
             response = future.result()
-            json = self._validate_response(response.json(), response_field)
-            symbol = self._get_symbol(response, params)
-            data[symbol] = self._construct_data(json, response_field, **kwargs)
+            record_request(response, endpoint)
+            with span(endpoint, "parse"):
+                json = self._validate_response(response.json(), response_field)
+                symbol = self._get_symbol(response, params)
+                data[symbol] = self._construct_data(json, response_field, **kwargs)
         return data
 
-    def _sync_requests(self, response_field, urls, params, **kwargs):
+    def _sync_requests(self, response_field, urls, params, endpoint=None, **kwargs):
         data = {}
         for response in urls:
-            json = self._validate_response(response.json(), response_field)
-            symbol = self._get_symbol(response, params)
-            if symbol is not None:
-                data[symbol] = self._construct_data(json, response_field, **kwargs)
-            else:
-                data = self._construct_data(json, response_field, **kwargs)
+            record_request(response, endpoint)
+            with span(endpoint, "parse"):
+                json = self._validate_response(response.json(), response_field)
+                symbol = self._get_symbol(response, params)
+                if symbol is not None:
+                    data[symbol] = self._construct_data(json, response_field, **kwargs)
+                else:
+                    data = self._construct_data(json, response_field, **kwargs)
         return data
 
     def _validate_response(self, response, response_field):
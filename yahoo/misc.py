@@ -1,13 +1,13 @@
 import pandas as pd
 import requests
 
-from geodataimport.utils.countries import COUNTRIES
-
 
 BASE_URL = "https://query2.finance.yahoo.com"
 
 
 def _make_request(url, response_field, country):
+    from geodataimport.utils.countries import COUNTRIES
+
     country = country.lower()
     try:
         params = COUNTRIES[country]
@@ -47,6 +47,8 @@ def get_market_summary(country="United States"):
 def get_trending(country="United States"):
     """Get trending stocks for a specific region
     """
+    from geodataimport.utils.countries import COUNTRIES
+
     try:
         region = COUNTRIES[country.lower()]["region"]
     except KeyError:
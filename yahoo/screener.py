@@ -1,11 +1,24 @@
 import re
+from functools import lru_cache
 
 from .base import _YahooFinance
-from geodataimport.utils.screeners import SCREENERS
 
 from urllib import parse
 
 
+def _screeners():
+    # the screener table is large, so it is loaded on first use
+    from geodataimport.utils.screeners import SCREENERS
+
+    return SCREENERS
+
+
+@lru_cache(maxsize=None)
+def _screener_keys():
+    """Screener key of each Yahoo screener id"""
+    return {screener["id"]: key for key, screener in _screeners().items()}
+
+
 class Screener(_YahooFinance):
     def __init__(self, **kwargs):
         super(Screener, self).__init__(**kwargs)
@@ -39,11 +52,10 @@ class Screener(_YahooFinance):
     def _get_symbol(self, response, params, **kwargs):
         query_params = dict(parse.parse_qsl(parse.urlsplit(response.url).query))
         screener_id = query_params["scrIds"]
-        key = next((k for k in SCREENERS if SCREENERS[k]["id"] == screener_id))
-        return key
+        return _screener_keys()[screener_id]
 
     def _check_screen_ids(self, screen_ids):
-        all_screeners = list(SCREENERS.keys())
+        all_screeners = list(_screeners().keys())
         if not isinstance(screen_ids, list):
             screen_ids = re.findall(r"[a-zA-Z_]+", screen_ids)
         if any(elem not in all_screeners for elem in screen_ids):
@@ -60,7 +72,7 @@ class Screener(_YahooFinance):
         """Return list of keys available to pass to
            :func:`Screener.get_screeners`
         """
-        return list(SCREENERS.keys())
+        return list(_screeners().keys())
 
     def get_screeners(self, screen_ids, count=25):
         """Return list of predefined screeners from Yahoo Finance
@@ -72,5 +84,5 @@ class Screener(_YahooFinance):
         count (int): Number of items to return, default=25
         """
         screen_ids = self._check_screen_ids(screen_ids)
-        scrIds = [SCREENERS[screener]["id"] for screener in screen_ids]
+        scrIds = [_screeners()[screener]["id"] for screener in screen_ids]
         return self._get_data("screener", params={"scrIds": scrIds, "count": count})
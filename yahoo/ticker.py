@@ -4,7 +4,29 @@ import re
 import pandas as pd
 
 from .base import _YahooFinance
-from geodataimport.utils import _convert_to_timestamp, _flatten_list, _history_dataframe
+from geodataimport.utils import (
+    _convert_to_timestamp,
+    _flatten_list,
+    _bar_offset,
+    _exchange_time,
+    _history_dataframe,
+    adjust_prices,
+    aggregate_bars,
+)
+from geodataimport.utils.metrics import span
+
+# Yahoo intraday intervals, coarsest first, that bars can be built from
+_BAR_BASES = ["90m", "60m", "30m", "15m", "5m", "2m", "1m"]
+
+
+def _base_interval(offset):
+    """Coarsest chart interval whose bars add up exactly to offset"""
+    if not isinstance(offset, pd.offsets.Tick) or offset.nanos >= 86400 * 10 ** 9:
+        return "1d"
+    minutes, rest = divmod(offset.nanos, 60 * 10 ** 9)
+    if rest or not minutes:
+        raise ValueError("Intraday intervals must be whole minutes")
+    return next(base for base in _BAR_BASES if minutes % int(base[:-1]) == 0)
 
 
 class Ticker(_YahooFinance):
@@ -90,6 +112,9 @@ class Ticker(_YahooFinance):
         super(Ticker, self).__init__(**kwargs)
         self.symbols = symbols
         self.invalid_symbols = None
+        self._gmtoffsets = {}
+        self._session_opens = {}
+        self._timezones = {}
         if kwargs.get("validate"):
             self.validation
 
@@ -102,7 +127,10 @@ class Ticker(_YahooFinance):
         dates = _flatten_list(
             [self._MODULES_DICT[module]["convert_dates"] for module in modules]
         )
-        return data if self.formatted else self._format_data(data, dates)
+        if self.formatted:
+            return data
+        with span("yahoo.quoteSummary", "format"):
+            return self._format_data(data, dates)
 
     def _quote_summary_dataframe(self, module, **kwargs):
         data = self._quote_summary([module])
@@ -1076,11 +1104,80 @@ class Ticker(_YahooFinance):
             df = self._history_1m(adj_timezone, adj_ohlc)
         else:
             data = self._get_data("chart", params)
-            df = self._historical_data_to_dataframe(data, params, adj_timezone)
-        if adj_ohlc and "adjclose" in df:
+            with span("yahoo.chart", "dataframe"):
+                df = self._historical_data_to_dataframe(data, params, adj_timezone)
+        if adj_ohlc and isinstance(df, pd.DataFrame):
             df = self._adjust_ohlc(df)
         return df
 
+    def bars(
+        self,
+        interval,
+        period="ytd",
+        start=None,
+        end=None,
+        adj_timezone=True,
+        adj_ohlc=False,
+        anchor="session",
+    ):
+        """
+        Price bars of any interval
+
+        Intervals served by the chart endpoint are returned as is. Others,
+        such as 10m, 4h or W-FRI, are built from a single download of the
+        coarsest interval that divides them, aggregated across all symbols
+        at once. Intraday bars are anchored on exchange time, following the
+        daylight saving time of each symbol's exchange timezone, and start at
+        the regular session open given in the chart metadata.
+
+        Parameters
+        ----------
+        interval: str
+            A chart interval or a pandas offset alias, e.g. "10m" or "10min",
+            "4h", "W-FRI" or "M"
+        period: str, default ytd, optional
+            Length of time
+        start: str or datetime.datetime, default None, optional
+            Specify a starting point to pull data from
+        end: str of datetime.datetime, default None, optional
+            Specify a ending point to pull data from
+        adj_timezone: bool, default True, optional
+            Label intraday bars in the ticker's timezone rather than GMT
+        adj_ohlc: bool, default False, optional
+            Adjust open, high, low and close prices for dividends
+        anchor: str, default session, optional
+            Start intraday bars at the regular session open ("session") or
+            at midnight ("day")
+
+        Returns
+        -------
+        pandas.DataFrame
+            bars indexed by symbol and date
+        """
+        if interval in self.INTERVALS:
+            return self.history(period, interval, start, end, adj_timezone, adj_ohlc)
+        offset = _bar_offset(interval)
+        base = _base_interval(offset)
+        intraday = base != "1d"
+        df = self.history(period, base, start, end, not intraday, adj_ohlc)
+        if not isinstance(df, pd.DataFrame):
+            return df
+        # the chart's gmtoffset is the current one, so intraday quotes are
+        # read in GMT and moved to exchange time date by date
+        timezones = {
+            symbol: self._timezones.get(symbol) or self._gmtoffsets[symbol]
+            for symbol in self._gmtoffsets
+        }
+        if intraday and not df.empty:
+            df.index = _exchange_time(df.index, timezones)
+        df = aggregate_bars(
+            df, offset, anchor=anchor, session_opens=self._session_opens
+        )
+        if adj_timezone or not intraday or df.empty:
+            return df
+        df.index = _exchange_time(df.index, timezones, to_utc=True)
+        return df
+
     def _history_1m(self, adj_timezone=True, adj_ohlc=False):
         params = {"interval": "1m"}
         today = datetime.today()
@@ -1102,6 +1199,15 @@ class Ticker(_YahooFinance):
         d = {}
         for symbol in self._symbols:
             if "timestamp" in data[symbol]:
+                meta = data[symbol]["meta"]
+                self._gmtoffsets[symbol] = meta["gmtoffset"]
+                self._timezones[symbol] = meta.get("exchangeTimezoneName")
+                regular = meta.get("currentTradingPeriod", {}).get("regular", {})
+                if "start" in regular:
+                    # Regular session open in exchange time
+                    opens = regular["start"] + meta["gmtoffset"]
+                    opens = datetime.utcfromtimestamp(opens).time()
+                    self._session_opens[symbol] = opens
                 d[symbol] = _history_dataframe(data, symbol, params, adj_timezone)
             else:
                 d[symbol] = data[symbol]
@@ -1115,12 +1221,8 @@ class Ticker(_YahooFinance):
         return d
 
     def _adjust_ohlc(self, df):
-        adjust = df["close"] / df["adjclose"]
-        for col in ["open", "high", "low"]:
-            df[col] = df[col] / adjust
-        del df["close"]
-        df.rename(columns={"adjclose": "close"}, inplace=True)
-        return df
+        # Yahoo quotes are split-adjusted already; only dividends are left
+        return adjust_prices(df, splits=False, inplace=True)
 
     @property
     def option_chain(self):